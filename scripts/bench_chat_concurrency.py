@@ -0,0 +1,133 @@
+"""
+Concurrent-stream capacity of the chat data path: threaded vs async.
+
+Each simulated chat request runs the queries `chat_endpoint` makes
+(persona, latest experiments, answer cache, pgvector similarity search),
+then holds the stream open for `--stream-ms` like a token stream would.
+
+- threaded: sync engine inside a thread pool sized like Starlette's default
+  (40 threads), i.e. the previous `db: Session = Depends(get_db)` path
+- async:    `server/services/chat_store.py` on the async engine
+
+    python scripts/bench_chat_concurrency.py --concurrency 10 50 100 200
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.core.config import COLLECTION_NAME
+from server.core.database import SessionLocal, engine, Persona, Experiment
+from server.core.async_database import dispose_async_engine
+from server.services import chat_store
+
+DIM = 1024
+
+
+def random_vec():
+    v = [random.gauss(0, 1) for _ in range(DIM)]
+    norm = sum(x * x for x in v) ** 0.5
+    return [x / norm for x in v]
+
+
+def pick_collection():
+    session = SessionLocal()
+    try:
+        exp = session.query(Experiment).filter(Experiment.rag_type == "vector").order_by(Experiment.created_at.desc()).first()
+        return exp.collection_name if exp and exp.collection_name else COLLECTION_NAME
+    finally:
+        session.close()
+
+
+# --- Threaded (sync) data path ---
+def sync_request(collection, vec):
+    session = SessionLocal()
+    try:
+        session.query(Persona).filter(Persona.active == True).first()
+        for rag_type in ("graph", "vector"):
+            session.query(Experiment).filter(Experiment.rag_type == rag_type).order_by(Experiment.created_at.desc()).first()
+    finally:
+        session.close()
+    literal = chat_store._vec_literal(vec)
+    with engine.connect() as conn:
+        conn.execute(chat_store.CORRECT_ANSWER_SQL, {"vec": literal}).fetchone()
+        conn.execute(chat_store.SIMILARITY_SQL, {"vec": literal, "collection": collection, "k": 10}).fetchall()
+
+
+async def threaded_request(executor, collection, vec, stream_ms):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await loop.run_in_executor(executor, sync_request, collection, vec)
+    await asyncio.sleep(stream_ms / 1000)
+    return time.perf_counter() - start
+
+
+# --- Async data path ---
+async def async_request(collection, vec, stream_ms):
+    start = time.perf_counter()
+    await chat_store.get_active_system_prompt()
+    await chat_store.resolve_graph_experiment("latest")
+    await chat_store.get_latest_experiment("vector")
+    await chat_store.lookup_correct_answer(vec)
+    await chat_store.similarity_search(collection, vec, k=10)
+    await asyncio.sleep(stream_ms / 1000)
+    return time.perf_counter() - start
+
+
+async def run_level(mode, concurrency, total, collection, vectors, stream_ms, executor):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            vec = vectors[i % len(vectors)]
+            if mode == "threaded":
+                return await threaded_request(executor, collection, vec, stream_ms)
+            return await async_request(collection, vec, stream_ms)
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(one(i) for i in range(total))))
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": total / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main_async(args):
+    collection = pick_collection()
+    vectors = [random_vec() for _ in range(32)]
+    executor = ThreadPoolExecutor(max_workers=args.threads)
+    print(f"🏁 Collection: {collection} | stream hold: {args.stream_ms}ms | thread pool: {args.threads}")
+
+    # warm-up (connection pools)
+    await run_level("threaded", 4, 8, collection, vectors, 0, executor)
+    await run_level("async", 4, 8, collection, vectors, 0, executor)
+
+    print(f"\n{'concurrency':>12}{'mode':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 52)
+    for concurrency in args.concurrency:
+        total = max(args.requests, concurrency * 2)
+        for mode in ("threaded", "async"):
+            r = await run_level(mode, concurrency, total, collection, vectors, args.stream_ms, executor)
+            print(f"{concurrency:>12}{mode:>10}{r['rps']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}")
+
+    executor.shutdown()
+    await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat data path concurrency (threaded vs async)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--requests", type=int, default=200, help="requests per level (at least 2x concurrency)")
+    parser.add_argument("--stream-ms", type=int, default=0, help="simulated stream duration after the queries")
+    parser.add_argument("--threads", type=int, default=40, help="thread pool size for the threaded path (Starlette default: 40)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Neo4j index benchmark for the graph retrieval and stats query shapes.
+
+Generates a synthetic graph (default 1M nodes) tagged with a dedicated
+experiment_id, times the project's query shapes without and with the
+indexes from `server/services/graph_indexes.py`, then removes the data.
+
+    python scripts/bench_graph_indexes.py --nodes 1000000
+
+Run against a scratch Neo4j: `--compare` drops the project indexes first.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+from neo4j import GraphDatabase
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.core.config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GRAPH_NODE_LABELS
+from server.services.graph_indexes import ENTITY, FULLTEXT_INDEX, INDEXED_PROPERTIES, ensure_graph_indexes
+
+BENCH_EXP_ID = -424242
+BATCH = 10_000
+WORDS = ["배터리", "네트워크", "통역", "카메라", "충전", "화면", "음성", "보안", "설정", "업데이트",
+         "battery", "network", "camera", "display", "sensor", "module", "wifi", "bluetooth"]
+
+
+class _Graph:
+    """Minimal `query()` adapter so ensure_graph_indexes() can be reused."""
+    def __init__(self, driver):
+        self.driver = driver
+
+    def query(self, cypher, params=None):
+        with self.driver.session() as session:
+            return [r.data() for r in session.run(cypher, params or {})]
+
+
+def generate(g, n_nodes, n_experiments):
+    print(f"🏗️  Generating {n_nodes:,} nodes ({n_experiments} experiments)...")
+    start = time.time()
+    for label in GRAPH_NODE_LABELS:
+        # 한 번에 (a)-[:RELATED_TO]->(b) 쌍을 생성 (이웃 조회용 관계 포함)
+        pairs = n_nodes // len(GRAPH_NODE_LABELS) // 2
+        for offset in range(0, pairs, BATCH):
+            size = min(BATCH, pairs - offset)
+            g.query(f"""
+                UNWIND range($offset, $offset + $size - 1) AS i
+                WITH i, $bench_exp - (i % $n_exp) AS exp_id
+                CREATE (a:`{label}` {{
+                    name: $words[i % size($words)] + ' ' + toString(2 * i) + '-' + $label,
+                    experiment_id: exp_id, source_model: 'bench-model-' + toString(i % 3), source_file: 'bench_' + toString(i % 50) + '.pdf'
+                }})-[:RELATED_TO {{experiment_id: exp_id}}]->(b:`{label}` {{
+                    name: $words[(i + 1) % size($words)] + ' ' + toString(2 * i + 1) + '-' + $label,
+                    experiment_id: exp_id, source_model: 'bench-model-' + toString(i % 3), source_file: 'bench_' + toString(i % 50) + '.pdf'
+                }})
+            """, {"offset": offset, "size": size, "words": WORDS, "label": label,
+                  "n_exp": n_experiments, "bench_exp": BENCH_EXP_ID})
+        print(f"   📦 {label}: {pairs * 2:,} nodes")
+    print(f"   ✅ Generated in {time.time() - start:.1f}s")
+
+
+def timed(g, cypher, params, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        g.query(cypher, params)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return durations[len(durations) // 2]
+
+
+def run_queries(g, repeat):
+    keyword = random.choice(WORDS)
+    names = [r["name"] for r in g.query(f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $e RETURN n.name AS name LIMIT 5", {"e": BENCH_EXP_ID})]
+    queries = {
+        "count by experiment_id": (f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $e RETURN count(n)", {"e": BENCH_EXP_ID}),
+        "files by source_model": (f"MATCH (n:{ENTITY}) WHERE n.source_model = $m RETURN DISTINCT n.source_file", {"m": "bench-model-1"}),
+        "exact name lookup (template)": (f"MATCH (n:{ENTITY})-[r]-(m) WHERE n.name IN $names RETURN n.name, type(r), m.name LIMIT 50", {"names": names}),
+        "CONTAINS scan (legacy)": ("MATCH (n) WHERE toLower(n.name) CONTAINS $k RETURN n.name LIMIT 20", {"k": keyword}),
+    }
+    if _has_fulltext(g):
+        queries["full-text lookup"] = (
+            f"CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', $k) YIELD node RETURN node.name LIMIT 20", {"k": keyword})
+    return {name: timed(g, q, p, repeat) for name, (q, p) in queries.items()}
+
+
+def _has_fulltext(g):
+    return bool(g.query("SHOW INDEXES YIELD name WHERE name = $name RETURN name", {"name": FULLTEXT_INDEX}))
+
+
+def drop_indexes(g):
+    for label in GRAPH_NODE_LABELS:
+        for prop in INDEXED_PROPERTIES:
+            g.query(f"DROP INDEX idx_{label.lower()}_{prop} IF EXISTS")
+    g.query(f"DROP INDEX {FULLTEXT_INDEX} IF EXISTS")
+
+
+def cleanup(g, n_experiments):
+    print("🧹 Removing benchmark nodes...")
+    g.query(f"""
+        MATCH (n:{ENTITY}) WHERE n.experiment_id <= $bench_exp AND n.experiment_id > $bench_exp - $n_exp
+        CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF 10000 ROWS
+    """, {"bench_exp": BENCH_EXP_ID, "n_exp": n_experiments})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Neo4j graph indexes")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--experiments", type=int, default=20, help="number of synthetic experiments sharing the graph")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", action="store_true", help="drop project indexes first and measure without them")
+    parser.add_argument("--keep", action="store_true", help="keep generated nodes")
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    g = _Graph(driver)
+    try:
+        generate(g, args.nodes, args.experiments)
+        results = {}
+        if args.compare:
+            drop_indexes(g)
+            results["no index"] = run_queries(g, args.repeat)
+        ensure_graph_indexes(g)
+        g.query("CALL db.awaitIndexes(600)")
+        results["indexed"] = run_queries(g, args.repeat)
+
+        print(f"\n📊 Median latency (ms), {args.nodes:,} nodes")
+        names = list(results["indexed"].keys())
+        header = f"{'query':32}" + "".join(f"{mode:>14}" for mode in results)
+        print(header)
+        print("-" * len(header))
+        for name in names:
+            print(f"{name:32}" + "".join(f"{results[mode].get(name, float('nan')):>14.1f}" for mode in results))
+    finally:
+        if not args.keep:
+            cleanup(g, args.experiments)
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
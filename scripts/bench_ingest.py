@@ -0,0 +1,308 @@
+"""
+Ingestion micro-benchmarks with regression thresholds.
+
+Runs each ingestion stage separately on generated PDFs of several sizes
+(and optionally the PDFs in data/raw) and reports throughput plus peak RSS:
+
+    parse   pages/sec    PyMuPDFLoader (ingest_vec.load_pdf)
+    split   chunks/sec   ingest_vec.split_pages (--chunk-unit char | token)
+    embed   vectors/sec  embedder (EMBEDDING_BACKEND, bge-m3 by default)
+    poolN   vectors/sec  EmbeddingPool with N worker processes (--embed-workers 2 4 8 ...)
+    insert  rows/sec     PGVector.add_embeddings of precomputed vectors (scratch collection)
+    copy    rows/sec     COPY bulk loader (services/bulk_loader.py), same rows as insert
+    index   rows/sec     pg_bigm GIN build over the inserted chunks (scratch table)
+    stream  rows/sec     end-to-end streaming pipeline (ingest_vec.stream_ingest), peak RSS
+                         should stay flat across sizes; prints stage utilization
+    graph   rows/sec     Neo4j writes of synthetic graph documents (--graph)
+
+    python scripts/bench_ingest.py --save-baseline          # record baseline
+    python scripts/bench_ingest.py --threshold 0.2          # fail if >20% slower
+    python scripts/bench_ingest.py --chunk-unit token --chunk-size 512 --overlap 50
+                                                            # chunk count / time with bge-m3 token chunks
+
+Exit code 1 when any stage regresses past the threshold.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+import resource
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fitz  # PyMuPDF
+from sqlalchemy import text
+
+from server.core.config import RAW_DATA_DIR, project_root
+from server.core.database import engine
+from server.services.embedder import get_bge_m3_embedding
+from server.services.embedding_pool import EmbeddingPool
+from server.pipelines.ingest_vec import load_pdf, split_pages, stream_ingest
+
+DEFAULT_BASELINE = os.path.join(project_root, "data", "bench", "ingest_baseline.json")
+BENCH_COLLECTION = "bench_ingest_scratch"
+BENCH_GRAPH_EXP = -777
+SIZES = {"small": 10, "medium": 100, "large": 400}  # pages
+
+PARAGRAPH = (
+    "제품의 실시간 통역 기능은 네트워크 연결이 필요하며, 배터리 잔량이 15% 이하일 때는 제한됩니다. "
+    "The camera module supports 4K recording at 60 fps when the thermal condition is normal. "
+    "설정 > 일반 > 초기화 메뉴에서 기기를 공장 초기화할 수 있으며, 보안 업데이트는 매월 제공됩니다. "
+)
+
+
+# --- Peak RSS (stage 단위) ---
+class PeakRSS:
+    """Samples RSS while a stage runs (Linux /proc); falls back to ru_maxrss."""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self.peak = self.current()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def measure(stage, unit, count, fn):
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    rate = count(result) / elapsed if elapsed > 0 else float("inf")
+    row = {"stage": stage, "unit": unit, "items": count(result), "seconds": round(elapsed, 3),
+           "rate": round(rate, 2), "peak_rss_mb": round(rss.peak / 2**20, 1)}
+    print(f"   {stage:8}{row['items']:>8} {unit:8}{elapsed:>9.2f}s{rate:>12.1f}/s{row['peak_rss_mb']:>10.1f} MB")
+    return result, row
+
+
+def generate_pdf(path, pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        body = f"Section {i + 1}\n\n" + "\n\n".join(PARAGRAPH for _ in range(6))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), body, fontname="korea", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def bench_dataset(name, path, args, embeddings):
+    print(f"\n📄 [{name}] {os.path.basename(path)}")
+    rows = {}
+    pages, rows["parse"] = measure("parse", "pages", len, lambda: load_pdf(path))
+    chunks, rows["split"] = measure("split", "chunks", len,
+                                    lambda: split_pages(pages, args.chunk_size, args.overlap, source=os.path.basename(path), unit=args.chunk_unit))
+    texts = [c.page_content for c in chunks]
+    metadatas = [c.metadata for c in chunks]
+    vectors, rows["embed"] = measure("embed", "vectors", len, lambda: embeddings.embed_documents(texts))
+    for n, pool in args.pools:
+        # 이상적인 경우 embed 대비 약 N배 (worker 당 thread = 코어 / N)
+        _, rows[f"pool{n}"] = measure(f"pool{n}", "vectors", len, lambda: pool.embed_documents(texts))
+
+    if not args.skip_db:
+        from server.services.vector_store import get_vector_store
+        from server.pipelines.cleanup import delete_collection_vectors
+        store = get_vector_store(embeddings, BENCH_COLLECTION)
+        try:
+            def insert():
+                for i in range(0, len(texts), args.batch_size):
+                    store.add_embeddings(texts[i:i + args.batch_size], vectors[i:i + args.batch_size], metadatas[i:i + args.batch_size])
+                return texts
+            _, rows["insert"] = measure("insert", "rows", len, insert)
+            prepare_scratch_table()
+            _, rows["index"] = measure("index", "rows", lambda n: n, lambda: build_scratch_index(len(texts)))
+        finally:
+            drop_scratch_table()
+            delete_collection_vectors(BENCH_COLLECTION)
+
+        from server.services.bulk_loader import copy_embeddings
+        store = get_vector_store(embeddings, BENCH_COLLECTION)
+        try:
+            def copy():
+                for i in range(0, len(texts), args.batch_size):
+                    copy_embeddings(BENCH_COLLECTION, texts[i:i + args.batch_size], vectors[i:i + args.batch_size], metadatas[i:i + args.batch_size])
+                return texts
+            _, rows["copy"] = measure("copy", "rows", len, copy)
+            # COPY로 쓴 행이 PGVector 읽기 경로에서 그대로 보이는지 확인
+            hit = store.similarity_search_by_vector(vectors[0], k=1)
+            if not hit or hit[0].metadata.get("source") != metadatas[0].get("source"):
+                print("   ⚠️ COPY rows not readable through PGVector")
+        finally:
+            delete_collection_vectors(BENCH_COLLECTION)
+
+    if args.graph:
+        from server.pipelines.cleanup import delete_graph_nodes
+        from server.services.graph_client import get_graph
+        try:
+            _, rows["graph"] = measure("graph", "rows", lambda n: n, lambda: write_synthetic_graph(chunks, args.graph_nodes))
+        finally:
+            delete_graph_nodes(get_graph(), "n.experiment_id = $exp_id", {"exp_id": BENCH_GRAPH_EXP})
+
+    if not args.skip_db:
+        from server.services.vector_store import get_vector_store
+        from server.pipelines.cleanup import delete_collection_vectors
+        # 앞 stage 결과(pages / chunks / vectors)를 해제한 뒤 측정해야 peak RSS가 pipeline 자체 값이 됨
+        del pages, chunks, texts, metadatas, vectors
+        store = get_vector_store(embeddings, BENCH_COLLECTION)
+        try:
+            result, rows["stream"] = measure("stream", "rows", lambda r: r[0],
+                                             lambda: stream_ingest(store, embeddings, [path], args.chunk_size, args.overlap, args.batch_size,
+                                                                                   unit=args.chunk_unit))
+            result[1].print_report()
+        finally:
+            delete_collection_vectors(BENCH_COLLECTION)
+    return rows
+
+
+def prepare_scratch_table():
+    # 실제 langchain_pg_embedding 인덱스는 건드리지 않고 같은 데이터의 별도 테이블에서 빌드 시간 측정
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_ingest_index"))
+        conn.execute(text("""
+            CREATE TABLE bench_ingest_index AS
+            SELECT e.document FROM langchain_pg_embedding e
+            JOIN langchain_pg_collection c ON e.collection_id = c.uuid WHERE c.name = :name
+        """), {"name": BENCH_COLLECTION})
+        conn.commit()
+
+
+def build_scratch_index(n_rows):
+    with engine.connect() as conn:
+        conn.execute(text("CREATE INDEX bench_ingest_bigm ON bench_ingest_index USING GIN (document gin_bigm_ops)"))
+        conn.commit()
+    return n_rows
+
+
+def drop_scratch_table():
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_ingest_index"))
+        conn.commit()
+
+
+def write_synthetic_graph(chunks, nodes_per_chunk):
+    """Graph write stage without LLM extraction: fixed-shape graph documents per chunk."""
+    from langchain_neo4j.graphs.graph_document import GraphDocument, Node, Relationship
+    from server.pipelines.ingest_graph import tag_graph_documents
+    from server.services.graph_client import get_graph
+
+    graph_docs = []
+    for i, chunk in enumerate(chunks):
+        nodes = [Node(id=f"bench-{i}-{j}", type="Feature" if j else "Product") for j in range(nodes_per_chunk)]
+        rels = [Relationship(source=nodes[0], target=n, type="HAS_FEATURE") for n in nodes[1:]]
+        graph_docs.append(GraphDocument(nodes=nodes, relationships=rels, source=chunk))
+    tag_graph_documents(graph_docs, "bench-model", "bench.pdf", BENCH_GRAPH_EXP)
+    get_graph().add_graph_documents(graph_docs)
+    return sum(len(d.nodes) + len(d.relationships) for d in graph_docs)
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    print(f"\n📊 Baseline comparison (threshold {threshold:.0%})")
+    for key, row in results.items():
+        base = baseline.get(key)
+        if not base:
+            print(f"   {key:28} (new, no baseline)")
+            continue
+        change = row["rate"] / base["rate"] - 1 if base["rate"] else 0.0
+        rss_change = row["peak_rss_mb"] / base["peak_rss_mb"] - 1 if base.get("peak_rss_mb") else 0.0
+        status = "✅"
+        if change < -threshold:
+            status = "❌"
+            failures.append(f"{key}: throughput {change:+.1%}")
+        if rss_change > threshold:
+            status = "❌"
+            failures.append(f"{key}: peak RSS {rss_change:+.1%}")
+        print(f"   {status} {key:28}{row['rate']:>12.1f}/s ({change:+.1%})  RSS {row['peak_rss_mb']:.0f} MB ({rss_change:+.1%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion stages")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--samples", action="store_true", help="also benchmark PDFs in data/raw")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--chunk-unit", choices=["char", "token"], default="char", help="chunk_size unit")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--skip-db", action="store_true", help="only parse/split/embed")
+    parser.add_argument("--graph", action="store_true", help="include Neo4j graph write stage")
+    parser.add_argument("--graph-nodes", type=int, default=5, help="synthetic nodes per chunk")
+    parser.add_argument("--embed-workers", type=int, nargs="*", default=[], help="also embed with EmbeddingPool of N workers")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    embeddings = get_bge_m3_embedding()
+    embeddings.embed_documents(["warm-up"])
+    args.pools = []
+    for n in args.embed_workers:
+        pool = EmbeddingPool(workers=n).start()
+        pool.embed_documents(["warm-up"] * n)
+        args.pools.append((n, pool))
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    datasets = []
+    for size in args.sizes:
+        path = os.path.join(tmp_dir, f"generated_{size}.pdf")
+        generate_pdf(path, SIZES[size])
+        datasets.append((f"generated_{size}", path))
+    if args.samples and os.path.exists(RAW_DATA_DIR):
+        datasets += [(f"sample_{f}", os.path.join(RAW_DATA_DIR, f)) for f in sorted(os.listdir(RAW_DATA_DIR)) if f.endswith(".pdf")]
+
+    print(f"\n   {'stage':8}{'items':>8} {'unit':8}{'time':>10}{'throughput':>14}{'peak RSS':>11}")
+    results = {}
+    try:
+        for name, path in datasets:
+            for stage, row in bench_dataset(name, path, args, embeddings).items():
+                # token 단위 결과는 별도 key (문자 단위 baseline과 섞이지 않도록)
+                suffix = "@token" if args.chunk_unit == "token" else ""
+                results[f"{name}{suffix}/{stage}"] = row
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        for _, pool in args.pools:
+            pool.close()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No baseline at {args.baseline} (run with --save-baseline)")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    failures = compare(results, baseline, args.threshold)
+    if failures:
+        print("\n❌ Regressions:\n   " + "\n   ".join(failures))
+        sys.exit(1)
+    print("\n✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Exact vs. two-stage binary-quantized vs. dense + sparse hybrid vector search.
+
+For a set of queries, runs the exact cosine search (chat_store.SIMILARITY_SQL),
+the binary search (Hamming candidates + float rescoring,
+chat_store.BINARY_SIMILARITY_SQL) at several candidate-set sizes and the
+hybrid search (chat_store.HYBRID_SPARSE_SQL), and reports latency percentiles,
+recall@k against the exact result and, for golden questions, hit@k.
+
+    python scripts/bench_vector_search.py --collection vec_exp_12 --candidates 50 100 200 400
+    python scripts/bench_vector_search.py --backfill     # fill missing bit codes first
+
+Queries are the golden questions in correct_answers (dense + sparse encoded
+with bge-m3), or random stored chunk vectors when there are none (no hybrid /
+hit@k then). hit@k: the golden chunk of a question is the exact top-1 chunk for
+its stored answer; a mode hits when that chunk is in its top k.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import text
+
+from server.core.database import engine
+from server.services.binary_quant import backfill_binary_codes
+from server.services.chat_store import similarity_params
+from server.services.sparse_encoder import encode_dense_sparse
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float("nan")
+
+
+def latest_collection():
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT collection_name FROM experiments
+            WHERE rag_type = 'vector' AND collection_name IS NOT NULL AND status IS DISTINCT FROM 'deleting'
+            ORDER BY created_at DESC LIMIT 1
+        """)).scalar()
+
+
+def load_queries(collection, n):
+    """(query vectors, query sparse weights | None, golden chunk ids | None, origin)."""
+    with engine.connect() as conn:
+        pairs = conn.execute(text("SELECT question, answer FROM correct_answers ORDER BY random() LIMIT :n"), {"n": n}).fetchall()
+        if pairs:
+            from server.services.embedder import get_bge_m3_embedding
+            model = get_bge_m3_embedding()
+            vectors, sparse = encode_dense_sparse(model, [p[0] for p in pairs])
+            golden = []
+            for answer_vec in model.embed_documents([p[1] for p in pairs]):
+                ids, _ = run(collection, answer_vec, 1, "exact")
+                golden.append(ids[0] if ids else None)
+            return vectors, sparse, golden, "correct_answers questions"
+        rows = conn.execute(text("""
+            SELECT e.embedding::text FROM langchain_pg_embedding e
+            JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+            WHERE c.name = :name ORDER BY random() LIMIT :n
+        """), {"name": collection, "n": n}).fetchall()
+    return [json.loads(r[0]) for r in rows], None, None, "random stored vectors"
+
+
+def run(collection, vec, k, mode, candidates=None, query_sparse=None):
+    sql, params = similarity_params(collection, vec, k, mode, candidates, query_sparse)
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        ids = [r[0] for r in conn.execute(sql, params)]
+    return ids, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark binary-quantized vector search")
+    parser.add_argument("--collection", help="PGVector collection (default: latest vector experiment)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--backfill", action="store_true", help="write missing embedding_bq codes first")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    collection = args.collection or latest_collection()
+    if not collection:
+        sys.exit("No vector collection found.")
+    if args.backfill:
+        done = backfill_binary_codes(collection, on_progress=lambda n: print(f"   🔢 {n} codes written..."))
+        print(f"🔢 Backfilled {done} binary codes")
+
+    queries, sparse, golden, origin = load_queries(collection, args.queries)
+    if not queries:
+        sys.exit(f"No vectors in '{collection}'.")
+    print(f"📐 Collection '{collection}' | {len(queries)} queries ({origin}) | k={args.k}")
+
+    # warm-up (connection pool / shared buffers)
+    run(collection, queries[0], args.k, "exact")
+    run(collection, queries[0], args.k, "binary", max(args.candidates))
+
+    exact_ids = [set(run(collection, vec, args.k, "exact")[0]) for vec in queries]
+
+    def measure(mode, candidates=None):
+        lat, recall, hits = [], [], []
+        for i, (vec, truth) in enumerate(zip(queries, exact_ids)):
+            ids, ms = run(collection, vec, args.k, mode, candidates, sparse[i] if sparse else None)
+            lat.append(ms)
+            recall.append(len(truth & set(ids)) / len(truth) if truth else 1.0)
+            if golden and golden[i] is not None:
+                hits.append(golden[i] in ids)
+        return {"mode": mode, "candidates": candidates, "p50_ms": percentile(lat, 50), "p95_ms": percentile(lat, 95),
+                "recall": sum(recall) / len(recall), "hit": sum(hits) / len(hits) if hits else None}
+
+    rows = [measure("exact")] + [measure("binary", c) for c in args.candidates]
+    if sparse:
+        rows.append(measure("hybrid_sparse"))
+
+    base = rows[0]["p50_ms"]
+    print(f"\n{'mode':14}{'cand':>6}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>9}{f'recall@{args.k}':>12}{f'hit@{args.k}':>9}")
+    print("-" * 70)
+    for r in rows:
+        speedup = base / r["p50_ms"] if r["p50_ms"] else float("inf")
+        hit = f"{r['hit']:.3f}" if r["hit"] is not None else "-"
+        print(f"{r['mode']:14}{r['candidates'] or '-':>6}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{speedup:>8.1f}x{r['recall']:>12.3f}{hit:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"collection": collection, "queries": len(queries), "k": args.k, "results": rows}, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Side-by-side retrieval comparison of vector experiments (same as POST /api/experiments/compare).
+
+Embeds the question set once and searches every experiment's collection in
+parallel with the same query vectors, so comparing ten chunking configurations
+costs one embedding pass:
+
+    python scripts/compare_experiments.py 12 13 14 --limit 50 --k 10
+    python scripts/compare_experiments.py 12 13 --questions questions.txt --mode hybrid_sparse --output ab.json
+
+overlap: Jaccard of the source text (source, page, character span) covered by
+two experiments' top-k results, averaged over questions.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.core.config import VECTOR_SEARCH_MODE
+from server.core.async_database import dispose_async_engine
+from server.services.embedder import get_bge_m3_embedding
+from server.pipelines.compare import compare_experiments
+
+
+async def run(args, questions):
+    try:
+        return await compare_experiments(get_bge_m3_embedding(), args.experiment_ids, questions=questions,
+                                         limit=args.limit, k=args.k, mode=args.mode)
+    finally:
+        await dispose_async_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retrieval across vector experiments with shared query embeddings")
+    parser.add_argument("experiment_ids", type=int, nargs="+")
+    parser.add_argument("--questions", help="text file, one question per line (default: recent correct_answers)")
+    parser.add_argument("--limit", type=int, default=20, help="number of correct_answers questions")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--mode", default=VECTOR_SEARCH_MODE, choices=["exact", "binary", "hybrid_sparse"])
+    parser.add_argument("--output", help="write the full result (incl. per-question rows) as JSON")
+    args = parser.parse_args()
+
+    questions = None
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    try:
+        result = asyncio.run(run(args, questions))
+    except ValueError as e:
+        sys.exit(str(e))
+
+    k = result["k"]
+    print(f"\n📊 {result['questions']} questions | mode={result['mode']} | k={k} | embedding {result['embedding_ms']:.0f}ms (once)")
+    print(f"\n{'id':>5}  {'name':24}{'p50 ms':>9}{'p95 ms':>9}{'top1':>8}{f'mean@{k}':>9}{'overlap':>9}")
+    print("-" * 73)
+    fmt = lambda v: f"{v:.3f}" if v is not None else "-"
+    for r in result["experiments"]:
+        print(f"{r['id']:>5}  {r['name'][:23]:24}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{fmt(r['top1_score']):>8}{fmt(r[f'mean_score@{k}']):>9}{fmt(r['overlap_with_others']):>9}")
+
+    print("\nPairwise overlap")
+    for pair in result["overlap"]:
+        print(f"   {pair['a']:>5} vs {pair['b']:<5} {fmt(pair['overlap'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
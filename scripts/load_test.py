@@ -0,0 +1,253 @@
+"""
+Concurrent load generator for the chat API (optionally while ingestion runs).
+
+Replays a mix of `/chat` requests in SSE mode and reports throughput, error
+rate, time-to-first-byte, time-to-first-token and latency percentiles per
+load level, then the saturation point.
+
+Offline run against the fake backends:
+
+    LLM_BACKEND=fake EMBEDDING_BACKEND=fake python server/main.py
+    python scripts/load_test.py --concurrency 1 5 10 25 50 --duration 30 --background vector
+
+Modes:
+- closed loop (default): `--concurrency N ...`, N clients send back-to-back
+- open loop:             `--rate R ...`, R new requests/sec regardless of completions
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "실시간 통역 기능의 제약 조건은?",
+    "배터리 교체 방법을 알려줘",
+    "네트워크 연결이 필요한 기능은?",
+    "카메라 설정 초기화 방법",
+    "화면 밝기 자동 조절은 어떻게 켜나요?",
+    "음성 인식이 동작하지 않을 때 해결 방법",
+    "보안 업데이트 주기는?",
+    "충전 중 발열이 심할 때 조치",
+]
+
+
+def parse_mix(text):
+    """'hybrid:0.5,vector:0.3' -> [('hybrid', 0.5), ('vector', 0.3)]"""
+    items = []
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        items.append((name.strip(), float(weight or 1)))
+    return items
+
+
+def pick(mix):
+    names, weights = zip(*mix)
+    return random.choices(names, weights=weights)[0]
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def one_chat(client, args, stats):
+    question = random.choice(args.questions)
+    if args.unique:
+        # 응답 캐시 / 정답 캐시를 우회 (매 요청이 전체 파이프라인 수행)
+        question = f"{question} (#{random.randint(0, 10**9)})"
+    payload = {
+        "question": question,
+        "model": pick(args.models),
+        "rag_type": pick(args.rag_mix),
+        "session_id": f"loadtest-{random.randint(0, 10**6)}",
+        "stream_format": "sse",
+    }
+    start = time.perf_counter()
+    ttfb = ttft = None
+    ok = False
+    try:
+        async with client.stream("POST", "/chat", json=payload, headers={"Accept": "text/event-stream"}) as res:
+            if res.status_code != 200:
+                raise RuntimeError(f"HTTP {res.status_code}")
+            event = None
+            async for line in res.aiter_lines():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    if event == "token" and ttft is None:
+                        ttft = time.perf_counter() - start
+                    elif event == "error":
+                        raise RuntimeError(json.loads(line[6:]).get("message"))
+                    elif event == "final":
+                        ok = True
+        if not ok:
+            raise RuntimeError("stream ended without final event")
+    except Exception as e:
+        stats["errors"] += 1
+        stats["error_samples"].setdefault(str(e)[:80], 0)
+        stats["error_samples"][str(e)[:80]] += 1
+        return
+    stats["latency"].append(time.perf_counter() - start)
+    if ttfb is not None:
+        stats["ttfb"].append(ttfb)
+    if ttft is not None:
+        stats["ttft"].append(ttft)
+
+
+def new_stats():
+    return {"latency": [], "ttfb": [], "ttft": [], "errors": 0, "error_samples": {}}
+
+
+async def run_closed(client, args, concurrency):
+    stats = new_stats()
+    deadline = time.perf_counter() + args.duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await one_chat(client, args, stats)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats, time.perf_counter() - start
+
+
+async def run_open(client, args, rate):
+    stats = new_stats()
+    tasks = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        tasks.append(asyncio.create_task(one_chat(client, args, stats)))
+        # Poisson arrivals
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return stats, time.perf_counter() - start
+
+
+async def start_background(client, kind):
+    if kind == "vector":
+        res = await client.post("/api/ingest", json={"type": "vector", "name": f"loadtest_{int(time.time())}", "config": {}})
+    elif kind == "qa_gen":
+        files = (await client.get("/api/files")).json()
+        if not files:
+            print("⚠️ No PDF files for QA generation, skipping background job.")
+            return
+        res = await client.post("/api/generate_qa", json={"filename": files[0], "count": 50})
+    else:
+        return
+    print(f"🏗️  Background {kind}: {res.json().get('message')}")
+
+
+async def job_status(client):
+    try:
+        return (await client.get("/api/job_status")).json()
+    except Exception:
+        return {}
+
+
+def summarize(level, stats, elapsed):
+    done = len(stats["latency"])
+    total = done + stats["errors"]
+    return {
+        "level": level,
+        "requests": total,
+        "rps": done / elapsed if elapsed else 0.0,
+        "error_rate": stats["errors"] / total if total else 0.0,
+        "ttfb_p50": percentile(stats["ttfb"], 50) * 1000,
+        "ttft_p50": percentile(stats["ttft"], 50) * 1000,
+        "ttft_p95": percentile(stats["ttft"], 95) * 1000,
+        "lat_p50": percentile(stats["latency"], 50) * 1000,
+        "lat_p95": percentile(stats["latency"], 95) * 1000,
+        "lat_p99": percentile(stats["latency"], 99) * 1000,
+        "errors": stats["error_samples"],
+    }
+
+
+def find_saturation(rows, max_error_rate, min_gain):
+    """First level where throughput stops scaling, errors exceed the limit or p95 doubles."""
+    base_p95 = rows[0]["lat_p95"] if rows else None
+    for prev, row in zip(rows, rows[1:]):
+        if row["error_rate"] > max_error_rate:
+            return row, f"error rate {row['error_rate']:.1%} > {max_error_rate:.1%}"
+        if row["rps"] < prev["rps"] * (1 + min_gain):
+            return prev, f"throughput gain < {min_gain:.0%} at next level ({row['level']})"
+        if base_p95 and row["lat_p95"] > base_p95 * 2:
+            return prev, f"p95 latency doubled at next level ({row['level']})"
+    return None, "not reached"
+
+
+async def main_async(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=None, max_keepalive_connections=None)) as client:
+        await start_background(client, args.background)
+
+        levels = args.rate or args.concurrency
+        mode = "rate" if args.rate else "concurrency"
+        rows = []
+        print(f"\n{mode:>12}{'req':>7}{'req/s':>8}{'err%':>7}{'ttfb50':>9}{'ttft50':>9}{'ttft95':>9}{'lat50':>9}{'lat95':>9}{'lat99':>9}  jobs")
+        print("-" * 108)
+        for level in levels:
+            if args.rate:
+                stats, elapsed = await run_open(client, args, level)
+            else:
+                stats, elapsed = await run_closed(client, args, int(level))
+            row = summarize(level, stats, elapsed)
+            rows.append(row)
+            jobs = ",".join(k for k, v in (await job_status(client)).items() if v == "running") or "-"
+            print(f"{level:>12}{row['requests']:>7}{row['rps']:>8.1f}{row['error_rate'] * 100:>7.1f}"
+                  f"{row['ttfb_p50']:>9.0f}{row['ttft_p50']:>9.0f}{row['ttft_p95']:>9.0f}"
+                  f"{row['lat_p50']:>9.0f}{row['lat_p95']:>9.0f}{row['lat_p99']:>9.0f}  {jobs}")
+            for msg, n in row["errors"].items():
+                print(f"{'':>12}  ❌ {n}x {msg}")
+
+        sat, reason = find_saturation(rows, args.max_error_rate, args.min_gain)
+        if sat:
+            print(f"\n📈 Saturation point: {mode}={sat['level']} (~{sat['rps']:.1f} req/s) - {reason}")
+        else:
+            print(f"\n📈 Saturation point not reached up to {mode}={levels[-1]}")
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"mode": mode, "levels": rows, "saturation": sat, "reason": reason}, f, ensure_ascii=False, indent=2)
+            print(f"💾 Results saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--rate", type=float, nargs="+", help="open-loop arrival rates (req/s) instead of concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per level")
+    parser.add_argument("--rag-mix", default="hybrid:0.5,vector:0.3,graph:0.2")
+    parser.add_argument("--model-mix", default="gemini-2.5-flash:1")
+    parser.add_argument("--questions", help="file with one question per line")
+    parser.add_argument("--unique", action="store_true", help="make every question unique to bypass the response/answer caches")
+    parser.add_argument("--background", choices=["none", "vector", "qa_gen"], default="none",
+                        help="job started before the first level")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--min-gain", type=float, default=0.1, help="minimum relative throughput gain per level")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    args.rag_mix = parse_mix(args.rag_mix)
+    args.models = parse_mix(args.model_mix)
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            args.questions = [line.strip() for line in f if line.strip()]
+    else:
+        args.questions = DEFAULT_QUESTIONS
+    if not args.questions:
+        sys.exit("No questions to send.")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
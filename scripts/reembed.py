@@ -0,0 +1,127 @@
+"""
+Bulk re-embedding with the multi-process embedding pool.
+
+Recomputes the stored vectors of a PGVector collection (or of the golden
+correct_answers table) in id order, `--batch-size` rows per UPDATE, e.g. after
+an embedding model upgrade. For collections the binary code (embedding_bq)
+and, with INGEST_SPARSE=1, the sparse weights (embedding_sparse) are rewritten
+in the same UPDATE:
+
+    python scripts/reembed.py --collection vec_exp_12 --workers 8
+    python scripts/reembed.py --answers --workers 4 --threads 4
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import text
+
+from server.core.config import INGEST_SPARSE
+from server.core.database import engine
+from server.services.binary_quant import EMBED_DIM, ensure_binary_column
+from server.services.sparse_encoder import sparse_literal, ensure_sparse_column
+from server.services.embedding_pool import EmbeddingPool
+from server.pipelines.streaming import StreamPipeline
+
+COLLECTION_ROWS_SQL = text("""
+    SELECT e.id, e.document FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = :name AND e.id > :after
+    ORDER BY e.id LIMIT :limit
+""")
+ANSWER_ROWS_SQL = text("""
+    SELECT id, question FROM correct_answers
+    WHERE id > :after ORDER BY id LIMIT :limit
+""")
+
+
+def iter_batches(sql, params, batch_size, first_key):
+    # keyset pagination: 대용량 테이블도 batch 단위로만 메모리에 올림
+    after = first_key
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(sql, {**params, "after": after, "limit": batch_size}).fetchall()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][0]
+
+
+def update_vectors(table, id_cast, ids, vectors, sparse=None):
+    values, params = [], {}
+    for i, (id_, vec) in enumerate(zip(ids, vectors)):
+        row = f"CAST(:id{i} AS {id_cast}), CAST(:v{i} AS vector)"
+        params.update({f"id{i}": id_, f"v{i}": "[" + ",".join(map(str, vec)) + "]"})
+        if sparse is not None:
+            row += f", CAST(:s{i} AS sparsevec)"
+            params[f"s{i}"] = sparse_literal(sparse[i])
+        values.append(f"({row})")
+    columns, assignments = "id, embedding", "embedding = v.embedding"
+    if table == "langchain_pg_embedding":
+        # 파생 컬럼도 같은 UPDATE에서 갱신 (2단계 binary / hybrid 검색이 옛 벡터 기준으로 남지 않도록)
+        assignments += f", embedding_bq = binary_quantize(v.embedding)::bit({EMBED_DIM})"
+        if sparse is not None:
+            columns += ", sparse"
+            assignments += ", embedding_sparse = v.sparse"
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            UPDATE {table} t SET {assignments}
+            FROM (VALUES {', '.join(values)}) AS v({columns})
+            WHERE t.id = v.id
+        """), params)
+        if table == "correct_answers":
+            # 다른 worker의 in-memory 정답 인덱스가 다시 읽도록 version 증가
+            from server.services.answer_index import bump_answer_version
+            bump_answer_version(conn)
+        conn.commit()
+    return len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed stored vectors with the embedding worker pool")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--collection", help="PGVector collection name")
+    target.add_argument("--answers", action="store_true", help="re-embed correct_answers questions")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() // 4 or 1)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (0 = cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with_sparse = False
+    if args.collection:
+        source = iter_batches(COLLECTION_ROWS_SQL, {"name": args.collection}, args.batch_size, "")
+        table, id_cast = "langchain_pg_embedding", "varchar"
+        ensure_binary_column()
+        if INGEST_SPARSE:
+            ensure_sparse_column()
+            with_sparse = True
+    else:
+        source = iter_batches(ANSWER_ROWS_SQL, {}, args.batch_size, 0)
+        table, id_cast = "correct_answers", "integer"
+
+    done = 0
+    start = time.perf_counter()
+    with EmbeddingPool(workers=args.workers, threads=args.threads) as pool:
+        def embed(rows):
+            texts = [r[1] for r in rows]
+            if with_sparse:
+                # dense + sparse를 같은 forward pass에서 계산
+                return ([r[0] for r in rows], *pool.embed_with_sparse(texts))
+            return [r[0] for r in rows], pool.embed_documents(texts)
+
+        def write(embedded):
+            nonlocal done
+            done += update_vectors(table, id_cast, *embedded)
+            print(f"   📦 {done} re-embedded ({done / (time.perf_counter() - start):.1f}/s)")
+
+        # 읽기 / 임베딩 / 쓰기를 겹쳐 실행 (ingestion과 같은 bounded pipeline)
+        pipeline = StreamPipeline("read", source, [("embed", embed), ("write", write)])
+        pipeline.run()
+        pipeline.print_report()
+    print(f"\n✅ Re-embedded {done} rows of {args.collection or 'correct_answers'} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
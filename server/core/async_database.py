@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from server.core.config import (
+    ASYNC_DB_CONNECTION, ASYNC_DB_POOL_SIZE, ASYNC_DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_STATEMENT_TIMEOUT_MS,
+)
+
+# Async SQLAlchemy Setup (chat 경로 전용)
+# 쿼리 대기 중에 worker thread를 점유하지 않으므로 event loop 하나로 많은 stream을 처리한다.
+async_engine = create_async_engine(
+    ASYNC_DB_CONNECTION,
+    pool_size=ASYNC_DB_POOL_SIZE,
+    max_overflow=ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def dispose_async_engine():
+    await async_engine.dispose()
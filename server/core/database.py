@@ -1,13 +1,79 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, Text, TIMESTAMP, Float
+import time
+import threading
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Boolean, Text, TIMESTAMP, Float, UniqueConstraint, Index
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.sql import text, func
-from server.core.config import DB_CONNECTION
+from sqlalchemy.pool import QueuePool
+from server.core.config import DB_CONNECTION, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_STATEMENT_TIMEOUT_MS, INGEST_SPARSE
 
 from sqlalchemy.dialects.postgresql import JSONB
 
+# --- Connection Pool Metrics ---
+class PoolWaitMetrics:
+    """Checkout wait time of the shared pool (how long requests queue for a connection)."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, elapsed, timed_out=False):
+        with self.lock:
+            self.checkouts += 1
+            self.total_wait += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
+
+pool_wait_metrics = PoolWaitMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that measures the time spent waiting for a free connection."""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            pool_wait_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_wait_metrics.record(time.perf_counter() - start)
+        return conn
+
+
 # SQLAlchemy Setup
-engine = create_engine(DB_CONNECTION)
+# 프로세스 전체가 공유하는 단일 pool (PGVector에도 connection=engine으로 주입)
+engine = create_engine(
+    DB_CONNECTION,
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def disable_statement_timeout(conn):
+    """
+    Lift statement_timeout for the current transaction only (SET LOCAL).
+    For bulk / maintenance statements (index builds, backfills); request traffic keeps the pool default.
+    Call again after each commit.
+    """
+    conn.execute(text("SET LOCAL statement_timeout = 0"))
+
 Base = declarative_base()
 
 # Models
@@ -47,6 +113,76 @@ class TokenUsage(Base):
     output_tokens = Column(Integer, default=0)
     cost_usd = Column(Float, default=0.0)
 
+# correct_answers 변경 버전 (worker별 in-memory AnswerIndex 동기화용, 단일 row)
+class AnswerIndexVersion(Base):
+    __tablename__ = "answer_index_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# 검색 대상 데이터(vector/graph) 변경 버전 (응답 캐시 key에 포함, ingest·삭제 시 증가, 단일 row)
+class RetrievalDataVersion(Base):
+    __tablename__ = "retrieval_data_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# token_usage -> rollup 최초 backfill 진행 상태 (단일 row, 하루 단위 batch로 이어서 진행)
+class UsageRollupBackfill(Base):
+    __tablename__ = "usage_rollup_backfill"
+    id = Column(Integer, primary_key=True)
+    cutoff_id = Column(BigInteger, nullable=True)     # 이 id 이하만 backfill (이후 행은 UsageRecorder가 증분 반영)
+    next_bucket = Column(TIMESTAMP, nullable=True)    # 다음에 처리할 day window 시작
+    until = Column(TIMESTAMP, nullable=True)          # cutoff 시점의 max(timestamp)
+    done = Column(Boolean, nullable=False, default=False)
+
+# Shared LLM rate limiter (모델별 token bucket, 모든 프로세스 공유)
+class LLMRateBucket(Base):
+    __tablename__ = "llm_rate_buckets"
+    model_name = Column(String, primary_key=True)
+    request_tokens = Column(Float, nullable=False)  # RPM bucket 잔량
+    token_tokens = Column(Float, nullable=False)    # TPM bucket 잔량
+    updated_at = Column(Float, nullable=False)      # epoch seconds (DB clock)
+
+class LLMRateStat(Base):
+    __tablename__ = "llm_rate_stats"
+    model_name = Column(String, primary_key=True)
+    priority = Column(String, primary_key=True)
+    requests = Column(BigInteger, default=0)
+    tokens = Column(BigInteger, default=0)
+    throttled = Column(BigInteger, default=0)
+    wait_seconds = Column(Float, default=0.0)
+
+# Pre-aggregated usage rollups (UsageRecorder가 flush 시 증분 갱신)
+# session_id가 없는 요청은 '' 로 집계 (UNIQUE 제약에서 NULL은 서로 다른 값으로 취급되므로)
+class TokenUsageHourly(Base):
+    __tablename__ = "token_usage_hourly"
+    id = Column(Integer, primary_key=True)
+    bucket = Column(TIMESTAMP, nullable=False)
+    model_name = Column(String, nullable=False)
+    session_id = Column(String, nullable=False, default="")
+    request_count = Column(Integer, default=0)
+    input_tokens = Column(BigInteger, default=0)
+    output_tokens = Column(BigInteger, default=0)
+    cost_usd = Column(Float, default=0.0)
+    __table_args__ = (
+        UniqueConstraint("bucket", "model_name", "session_id", name="uq_token_usage_hourly"),
+        Index("idx_token_usage_hourly_model_bucket", "model_name", "bucket"),
+    )
+
+class TokenUsageDaily(Base):
+    __tablename__ = "token_usage_daily"
+    id = Column(Integer, primary_key=True)
+    bucket = Column(TIMESTAMP, nullable=False)
+    model_name = Column(String, nullable=False)
+    session_id = Column(String, nullable=False, default="")
+    request_count = Column(Integer, default=0)
+    input_tokens = Column(BigInteger, default=0)
+    output_tokens = Column(BigInteger, default=0)
+    cost_usd = Column(Float, default=0.0)
+    __table_args__ = (
+        UniqueConstraint("bucket", "model_name", "session_id", name="uq_token_usage_daily"),
+        Index("idx_token_usage_daily_model_bucket", "model_name", "bucket"),
+    )
+
 class Experiment(Base):
     __tablename__ = "experiments"
 
@@ -56,10 +192,25 @@ class Experiment(Base):
     config = Column(JSONB)          # 설정값 (Chunk size 등)
     result = Column(JSONB, nullable=True) # 점수 (RAGAS 등)
     collection_name = Column(String, unique=True, nullable=True) 
+    status = Column(String, default="ready")  # 'ingesting' (데이터 적재 중), 'ready', 'deleting' (삭제 중단 시 재시작 시 이어서 삭제)
     
     created_at = Column(TIMESTAMP, server_default=func.now())
 
 
+def get_pool_stats():
+    pool = engine.pool
+    checked_out = pool.checkedout()
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+        **pool_wait_metrics.snapshot(),
+    }
+
 def get_db():
     db = SessionLocal()
     try:
@@ -81,10 +232,30 @@ def init_db():
         
         # Additional Raw SQL for Vector columns and Indexes (if not handled by ORM)
         with engine.connect() as conn:
+            # index build / backfill은 테이블 크기에 비례 -> 이 트랜잭션만 timeout 해제
+            disable_statement_timeout(conn)
+
             # Correct Answers Vector Column
             conn.execute(text("ALTER TABLE correct_answers ADD COLUMN IF NOT EXISTS embedding vector(1024)"))
             conn.execute(text("CREATE INDEX IF NOT EXISTS idx_correct_answers_embedding ON correct_answers USING ivfflat (embedding vector_cosine_ops)"))
             
+            # Experiment lifecycle status (resumable deletion)
+            conn.execute(text("ALTER TABLE experiments ADD COLUMN IF NOT EXISTS status VARCHAR DEFAULT 'ready'"))
+
+            # Raw usage time-range filter (/api/usage)
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_token_usage_timestamp ON token_usage (timestamp)"))
+
+            # AnswerIndex version row
+            conn.execute(text("INSERT INTO answer_index_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"))
+            # Response cache data version row
+            conn.execute(text("INSERT INTO retrieval_data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING"))
+
+            # Binary-quantized copy of PGVector embeddings (2단계 binary 검색, 테이블은 PGVector가 생성)
+            conn.execute(text("ALTER TABLE IF EXISTS langchain_pg_embedding ADD COLUMN IF NOT EXISTS embedding_bq bit(1024)"))
+            # collection 단위 조회 / batch 삭제용 (services/vector_store.ensure_collection_index와 동일)
+            if conn.execute(text("SELECT to_regclass('langchain_pg_embedding')")).scalar():
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_langchain_pg_embedding_collection_id ON langchain_pg_embedding (collection_id)"))
+
             # Feedback Vector Column (Optional, for future use)
             conn.execute(text("ALTER TABLE feedback ADD COLUMN IF NOT EXISTS embedding vector(1024)"))
             
@@ -99,3 +270,13 @@ def init_db():
         print("   ✅ Database initialized successfully.")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
+
+    if INGEST_SPARSE:
+        # bge-m3 sparse lexical weights (hybrid_sparse 검색, 차원 = XLM-R vocab)
+        # sparsevec은 pgvector 0.7+ 전용 -> 별도 트랜잭션 (실패해도 위 초기화는 유지)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("ALTER TABLE IF EXISTS langchain_pg_embedding ADD COLUMN IF NOT EXISTS embedding_sparse sparsevec(250002)"))
+                conn.commit()
+        except Exception as e:
+            print(f"   ⚠️ embedding_sparse column not added (pgvector 0.7+ required, or set INGEST_SPARSE=0): {e}")
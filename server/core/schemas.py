@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 
 class PersonaReq(BaseModel):
     name: str
@@ -18,7 +18,10 @@ class ChatReq(BaseModel):
     model: str
     rag_type: str
     session_id: Optional[str] = None
-    graph_source: Optional[str] = "all"
+    # Graph experiment id to search. None/"latest": 최신 graph 실험, "all": 전체 실험 (범위 제한 없음)
+    graph_source: Optional[str] = "latest"
+    # "text": plain text stream (기존 방식) | "sse": typed Server-Sent Events (stage / sources / token / final)
+    stream_format: Optional[str] = "text"
 
 class GenerateQAReq(BaseModel):
     filename: str  # 파일명을 받도록 수정
@@ -27,3 +30,12 @@ class IngestReq(BaseModel):
     type: str  # 'vector' or 'graph'
     name: str  # Experiment Name
     config: Dict[str, Any] # Flexible config (chunk_size, model, etc.)
+
+class CompareReq(BaseModel):
+    experiment_ids: List[int]
+    # None: 최근 correct_answers 질문 `limit`개
+    questions: Optional[List[str]] = None
+    limit: int = 20
+    k: int = 10
+    # None: VECTOR_SEARCH_MODE
+    mode: Optional[Literal["exact", "binary", "hybrid_sparse"]] = None
@@ -1,5 +1,7 @@
 import os
 import sys
+import json
+import asyncio
 import uvicorn
 import warnings
 import google.generativeai as genai  # [필수] pip install google-generativeai
@@ -7,20 +9,18 @@ import google.generativeai as genai  # [필수] pip install google-generativeai
 # 경고 숨기기
 warnings.filterwarnings("ignore")
 
-from fastapi import FastAPI, UploadFile, File, Depends, BackgroundTasks, HTTPException
+from fastapi import FastAPI, UploadFile, File, Depends, BackgroundTasks, HTTPException, Request
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import text, func
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 # LangChain Logic
-from langchain_postgres import PGVector
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.graphs import Neo4jGraph
-from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
+from langchain_neo4j import GraphCypherQAChain
 from langchain_core.messages import HumanMessage
+from langchain_core.messages.ai import add_usage
 from langchain_core.prompts import PromptTemplate
 
 # [MONKEY PATCH] Google API 'thinking' argument error fix
@@ -46,19 +46,39 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(current_dir)
 sys.path.append(project_root)
 
-from core.config import DB_CONNECTION, COLLECTION_NAME, RAW_DATA_DIR, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GOOGLE_API_KEY
+from server.core.config import COLLECTION_NAME, RAW_DATA_DIR, QA_DEDUPE_THRESHOLD, ANSWER_CACHE_THRESHOLD, CHUNK_UNIT, VECTOR_SEARCH_MODE, GOOGLE_API_KEY
 
 # [CRITICAL] Configure Google API Key for genai.list_models()
 genai.configure(api_key=GOOGLE_API_KEY)
-from core.database import SessionLocal, engine, Persona, Feedback, CorrectAnswer, TokenUsage, Experiment, init_db, get_db
+from server.core.database import engine, Persona, Feedback, CorrectAnswer, TokenUsage, Experiment, init_db, get_db, get_pool_stats
 import uuid
 from datetime import datetime
-from core.schemas import PersonaReq, AnswerReq, FeedbackReq, ChatReq, GenerateQAReq, IngestReq
+from typing import Optional
+from core.schemas import PersonaReq, AnswerReq, FeedbackReq, ChatReq, GenerateQAReq, IngestReq, CompareReq
 from services.embedder import get_bge_m3_embedding
+from server.services.vector_store import get_vector_store
+from server.services.qa_dedupe import dedupe_correct_answers
+from server.services.answer_index import answer_index, bump_answer_version
+from server.services.response_cache import response_cache, make_cache_key, bump_data_version
+from server.services.llm_factory import get_chat_llm
+from server.services.rate_limiter import RateLimiter, RateLimitTimeout, estimate_tokens, get_rate_limit_stats
+from server.core.async_database import dispose_async_engine
+from server.services.chat_store import get_active_system_prompt, get_latest_experiment, resolve_graph_experiment, lookup_correct_answer, similarity_search, retrieval_data_state
+from server.services.sparse_encoder import encode_dense_sparse
 from services.cost_calculator import calculate_cost, PRICING_MAP
+from services.context_builder import build_vector_context
+from services.usage_recorder import usage_recorder
+from services.usage_rollup import backfill_rollups, get_usage_totals, get_usage_series
+from services.graph_templates import template_graph_context, node_name_index, route_metrics
+from services.graph_scope import ScopedGraph
+from server.services.graph_client import get_graph, ensure_graph_schema
+import time
 from pipelines.ingest_vec import run_ingest as run_vector_ingest
 from pipelines.ingest_graph import run_graph_ingest
+from services.graph_indexes import ensure_graph_indexes, ENTITY, FULLTEXT_INDEX
 from pipelines.qa_gen import generate_bulk_qa
+from server.pipelines.compare import compare_experiments
+from pipelines.cleanup import run_experiment_delete, pending_experiment_deletes, delete_collection_vectors, get_delete_status, is_running, start_delete_job, update_delete_job, list_delete_jobs
 
 
 
@@ -70,16 +90,12 @@ init_db()
 
 # Vector Store 연결
 embeddings = get_bge_m3_embedding()
-vector_store = PGVector(
-    embeddings=embeddings,
-    collection_name=COLLECTION_NAME,
-    connection=DB_CONNECTION,
-    use_jsonb=True,
-)
+vector_store = get_vector_store(embeddings, COLLECTION_NAME)
 
 # Neo4j Graph 연결 확인
 try:
-    graph = Neo4jGraph(url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD)
+    # 모든 모듈이 공유하는 pooled driver (스키마 조회는 필요할 때만)
+    graph = get_graph()
     print("   ✅ Neo4j Graph Connected!")
     
     # [FIX] Register property keys to prevent 'UnknownPropertyKeyWarning' in empty DB
@@ -89,6 +105,9 @@ try:
     except Exception as e:
         print(f"   ⚠️ Failed to register property keys: {e}")
 
+    # experiment_id / source_model / source_file / name 인덱스 + name full-text 인덱스
+    ensure_graph_indexes(graph)
+
 except Exception as e:
     print(f"   ⚠️ Neo4j Connection Failed: {e}")
     graph = None
@@ -96,6 +115,23 @@ except Exception as e:
 app = FastAPI()
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
+@app.on_event("startup")
+def start_background_writers():
+    backfill_rollups()
+    usage_recorder.start()
+    answer_index.start()
+    # 중단된 실험 삭제 작업 이어서 진행
+    for exp_id in pending_experiment_deletes():
+        print(f"   ♻️ Resuming deletion of experiment {exp_id}...")
+        threading.Thread(target=delete_experiment_task, args=(exp_id,), daemon=True).start()
+
+@app.on_event("shutdown")
+async def stop_background_writers():
+    # Graceful shutdown 시 버퍼에 남은 사용량 기록 flush
+    usage_recorder.stop()
+    answer_index.stop()
+    await dispose_async_engine()
+
 # --- Static Files ---
 app.mount("/js", StaticFiles(directory=os.path.join(os.path.dirname(current_dir), "client", "js")), name="js")
 # app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(current_dir), "client", "static")), name="static")
@@ -109,6 +145,15 @@ QA_GEN_CANCEL_EVENT = threading.Event()  # Thread-safe cancel event
 def get_job_status():
     return JOB_STATUS
 
+def invalidate_response_cache(experiment_id=None):
+    # 검색 데이터 변경: DB version을 올려 모든 worker의 캐시 key를 바꾸고, 이 프로세스 메모리는 즉시 비운다
+    try:
+        with engine.begin() as conn:
+            bump_data_version(conn)
+    except Exception as e:
+        print(f"⚠️ Failed to bump retrieval data version: {e}")
+    response_cache.invalidate(experiment_id)
+
 def background_ingest_task(type: str, exp_id: int, config: dict, collection_name: str = None, **kwargs):
     global JOB_STATUS
     JOB_STATUS[type] = "running"
@@ -116,16 +161,29 @@ def background_ingest_task(type: str, exp_id: int, config: dict, collection_name
         if type == "vector":
             chunk_size = kwargs.get("chunk_size", 1000)
             overlap = kwargs.get("overlap", 100)
-            run_vector_ingest(collection_name=collection_name, chunk_size=chunk_size, overlap=overlap)
+            run_vector_ingest(collection_name=collection_name, chunk_size=chunk_size, overlap=overlap, chunk_unit=kwargs.get("chunk_unit", CHUNK_UNIT))
         elif type == "graph":
             model_name = kwargs.get("model_name", "gemini-2.0-flash")
             reset_db = kwargs.get("reset_db", False)
             chunk_size = kwargs.get("chunk_size", 2000)
             overlap = kwargs.get("overlap", 200)
-            run_graph_ingest(model_name=model_name, experiment_id=exp_id, chunk_size=chunk_size, overlap=overlap, reset_db=reset_db)
+            run_graph_ingest(model_name=model_name, experiment_id=exp_id, chunk_size=chunk_size, overlap=overlap, reset_db=reset_db,
+                             chunk_unit=kwargs.get("chunk_unit", CHUNK_UNIT))
     except Exception as e:
         print(f"Ingest Error ({type}): {e}")
     finally:
+        # 적재 종료 -> 응답 캐시 사용 재개 (모든 worker가 DB 상태로 판단, 삭제 중이면 그대로 둠)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("UPDATE experiments SET status = 'ready' WHERE id = :id AND status = 'ingesting'"), {"id": exp_id})
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ Failed to mark experiment {exp_id} ready: {e}")
+        if type == "graph":
+            # 새 노드가 생겼으므로 노드 이름 사전 재로딩
+            node_name_index.invalidate()
+        # 검색 대상 데이터가 바뀌었으므로 저장된 답변 폐기 (모든 worker)
+        invalidate_response_cache()
         JOB_STATUS[type] = "idle"
 class QAGenRequest(BaseModel):
     filename: str
@@ -174,7 +232,13 @@ class EvaluationRequest(BaseModel):
 @app.post("/api/ingest")
 async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     global JOB_STATUS
-    
+
+    # chunk_size 단위 (char | token) - 실험 config에 기록해 두어 재현 / 비교 가능하게 함
+    req.config["chunk_unit"] = req.config.get("chunk_unit") or CHUNK_UNIT
+    if req.config["chunk_unit"] not in ("char", "token"):
+        return {"status": "error", "message": f"Unknown chunk_unit '{req.config['chunk_unit']}' (char | token)."}
+    unit_tag = "T" if req.config["chunk_unit"] == "token" else ""
+
     # Auto-generate name if empty
     if not req.name or req.name.strip() == "":
         timestamp = datetime.now().strftime("%y%m%d_%H%M")
@@ -182,7 +246,7 @@ async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Sess
         if req.type == "vector":
             chunk_size = req.config.get("chunk_size", 1000)
             overlap = req.config.get("chunk_overlap", 100)
-            req.name = f"Vec_C{chunk_size}_O{overlap}_{timestamp}"
+            req.name = f"Vec_C{chunk_size}{unit_tag}_O{overlap}_{timestamp}"
             
         elif req.type == "graph":
             # [변경된 부분] Graph 실험 이름 생성 규칙 적용
@@ -193,7 +257,7 @@ async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Sess
             # admin.html에서 payload로 chunk_overlap을 보냅니다.
             overlap = req.config.get("chunk_overlap", req.config.get("overlap", 0))
             
-            req.name = f"Graph_{model_name}_c{chunk_size}_o{overlap}_{timestamp}"
+            req.name = f"Graph_{model_name}_c{chunk_size}{unit_tag}_o{overlap}_{timestamp}"
 
     # Check if name exists
     existing = db.query(Experiment).filter(Experiment.name == req.name).first()
@@ -212,7 +276,8 @@ async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Sess
         name=req.name,
         rag_type=req.type,
         config=req.config,
-        collection_name=None 
+        collection_name=None,
+        status="ingesting",  # 적재 중에는 응답 캐시를 쓰지 않음 (부분 데이터 기반 답변 방지)
     )
     db.add(experiment)
     db.commit()
@@ -234,7 +299,8 @@ async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Sess
     
     task_kwargs = {
         "chunk_size": chunk_size,
-        "overlap": overlap
+        "overlap": overlap,
+        "chunk_unit": req.config["chunk_unit"]
     }
 
     if req.type == "graph":
@@ -259,18 +325,22 @@ async def run_ingest(req: IngestReq, background_tasks: BackgroundTasks, db: Sess
     }
 
 @app.delete("/api/vector_store")
-def reset_vector_store():
-    try:
-        with engine.connect() as conn:
-            # Truncate langchain_pg_embedding table
-            conn.execute(text("""
-                DELETE FROM langchain_pg_embedding 
-                WHERE collection_id IN (SELECT uuid FROM langchain_pg_collection WHERE name = :name)
-            """), {"name": COLLECTION_NAME})
-            conn.commit()
-        return {"status": "ok", "message": "Vector store reset."}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+def reset_vector_store(background_tasks: BackgroundTasks):
+    key = f"collection:{COLLECTION_NAME}"
+    if is_running(key):
+        return {"status": "error", "message": "Vector store reset is already running."}
+
+    def task():
+        start_delete_job(key)
+        try:
+            deleted = delete_collection_vectors(COLLECTION_NAME, on_progress=lambda n: update_delete_job(key, deleted=n))
+            update_delete_job(key, status="done", deleted=deleted)
+        except Exception as e:
+            update_delete_job(key, status="failed", error=str(e))
+        invalidate_response_cache()
+
+    background_tasks.add_task(task)
+    return {"status": "ok", "message": "Vector store reset started.", "job": key}
 
 @app.delete("/api/files/{filename}")
 def delete_file(filename: str):
@@ -340,6 +410,7 @@ def get_personas(db: Session = Depends(get_db)):
 def create_persona(req: PersonaReq, db: Session = Depends(get_db)):
     p = Persona(name=req.name, system_prompt=req.system_prompt)
     db.add(p); db.commit(); db.refresh(p)
+    response_cache.invalidate()
     return p
 
 @app.post("/api/personas/{id}/activate")
@@ -347,6 +418,7 @@ def activate_persona(id: int, db: Session = Depends(get_db)):
     db.query(Persona).update({Persona.active: False})
     db.query(Persona).filter(Persona.id == id).update({Persona.active: True})
     db.commit()
+    response_cache.invalidate()
     return {"status": "ok"}
 
 @app.get("/api/files")
@@ -371,21 +443,33 @@ def get_answers(db: Session = Depends(get_db)):
 def add_answer(req: AnswerReq, db: Session = Depends(get_db)):
     vec = embeddings.embed_query(req.question)
     with engine.connect() as conn:
-        conn.execute(text("INSERT INTO correct_answers (question, answer, embedding) VALUES (:q, :a, :v)"),
-                     {"q": req.question, "a": req.answer, "v": str(vec)})
+        new_id = conn.execute(text("INSERT INTO correct_answers (question, answer, embedding) VALUES (:q, :a, :v) RETURNING id"),
+                              {"q": req.question, "a": req.answer, "v": str(vec)}).scalar()
+        version = bump_answer_version(conn)
         conn.commit()
+    answer_index.add([(new_id, req.answer, vec)], version)
     return {"status": "ok"}
 
 @app.delete("/api/answers/{id}")
 def delete_answer(id: int, db: Session = Depends(get_db)):
     db.query(CorrectAnswer).filter(CorrectAnswer.id == id).delete()
+    version = bump_answer_version(db)
     db.commit()
+    answer_index.remove([id], version)
     return {"status": "ok"}
 
+@app.post("/api/answers/dedupe")
+def dedupe_answers(threshold: float = QA_DEDUPE_THRESHOLD, dry_run: bool = False):
+    # 기존 정답 테이블의 near-duplicate 일괄 정리 (가장 오래된 항목 유지)
+    result = dedupe_correct_answers(threshold=threshold, dry_run=dry_run)
+    return {"status": "ok", **result}
+
 @app.delete("/api/answers_all")
 def delete_all_answers(db: Session = Depends(get_db)):
     count = db.query(CorrectAnswer).delete()
+    version = bump_answer_version(db)
     db.commit()
+    answer_index.clear(version)
     return {"status": "ok", "message": f"{count}개 항목 삭제됨"}
 
 @app.get("/api/feedback")
@@ -433,11 +517,9 @@ def get_models():
         ]
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    # Calculate total cost and tokens
-    total_cost = db.query(func.sum(TokenUsage.cost_usd)).scalar() or 0.0
-    total_input = db.query(func.sum(TokenUsage.input_tokens)).scalar() or 0
-    total_output = db.query(func.sum(TokenUsage.output_tokens)).scalar() or 0
+def get_stats(start: Optional[datetime] = None, end: Optional[datetime] = None, model: Optional[str] = None, db: Session = Depends(get_db)):
+    # Calculate total cost and tokens (pre-aggregated rollups, single query)
+    totals = get_usage_totals(db, start=start, end=end, model_name=model)
     
     # Fetch all experiments
     experiments = db.query(Experiment).order_by(Experiment.created_at.desc()).all()
@@ -481,16 +563,18 @@ def get_stats(db: Session = Depends(get_db)):
                 "id": exp.id,
                 "name": exp.name,
                 "chunk_size": exp.config.get("chunk_size"),
+                "chunk_unit": exp.config.get("chunk_unit", "char"),
                 "overlap": exp.config.get("chunk_overlap") or exp.config.get("overlap"),
                 "created_at": exp.created_at.strftime("%Y-%m-%d %H:%M"),
-                "count": count
+                "count": count,
+                "status": exp.status or "ready"
             })
 
         elif exp.rag_type == "graph":
             if graph:
                 try:
                     # Count nodes with this experiment_id
-                    res = graph.query(f"MATCH (n) WHERE n.experiment_id = {exp.id} RETURN count(n) AS count")
+                    res = graph.query(f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $exp_id RETURN count(n) AS count", {"exp_id": exp.id})
                     if res: count = res[0]["count"]
                 except: count = 0
             
@@ -499,9 +583,11 @@ def get_stats(db: Session = Depends(get_db)):
                 "name": exp.name,
                 "model": exp.config.get("llm_model"),
                 "chunk_size": exp.config.get("chunk_size"),
+                "chunk_unit": exp.config.get("chunk_unit", "char"),
                 "overlap": exp.config.get("chunk_overlap") or exp.config.get("overlap"),
                 "created_at": exp.created_at.strftime("%Y-%m-%d %H:%M"),
-                "count": count
+                "count": count,
+                "status": exp.status or "ready"
             })
     
     # Graph Details (Model breakdown) - Restore for backward compatibility if needed, 
@@ -509,8 +595,8 @@ def get_stats(db: Session = Depends(get_db)):
     graph_details = []
     if graph:
         try:
-             res_breakdown = graph.query("""
-                MATCH (n) 
+             res_breakdown = graph.query(f"""
+                MATCH (n:{ENTITY}) 
                 WHERE n.source_model IS NOT NULL 
                 RETURN n.source_model AS model, count(n) AS count, collect(distinct n.source_file) AS files
                 ORDER BY count DESC
@@ -520,9 +606,10 @@ def get_stats(db: Session = Depends(get_db)):
         except: pass
 
     return {
-        "total_cost": round(total_cost, 4),
-        "total_input_tokens": total_input,
-        "total_output_tokens": total_output,
+        "total_cost": round(totals["total_cost"], 4),
+        "total_input_tokens": totals["total_input_tokens"],
+        "total_output_tokens": totals["total_output_tokens"],
+        "total_requests": totals["total_requests"],
         "vector_count": total_vector_count,
         "graph_count": total_graph_count,
         "vector_experiments": vector_exps,
@@ -557,13 +644,14 @@ def get_experiments(db: Session = Depends(get_db)):
                 "name": exp.name,
                 "date": exp.created_at.strftime("%Y-%m-%d %H:%M"),
                 "config": exp.config,
-                "count": count
+                "count": count,
+                "status": exp.status or "ready"
             })
 
         elif exp.rag_type == "graph":
             if graph:
                 try:
-                    res = graph.query(f"MATCH (n) WHERE n.experiment_id = {exp.id} RETURN count(n) AS count")
+                    res = graph.query(f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $exp_id RETURN count(n) AS count", {"exp_id": exp.id})
                     if res: count = res[0]["count"]
                 except: count = 0
             
@@ -572,7 +660,8 @@ def get_experiments(db: Session = Depends(get_db)):
                 "name": exp.name,
                 "date": exp.created_at.strftime("%Y-%m-%d %H:%M"),
                 "config": exp.config,
-                "count": count
+                "count": count,
+                "status": exp.status or "ready"
             })
 
     return {
@@ -580,63 +669,108 @@ def get_experiments(db: Session = Depends(get_db)):
         "graph": graph_exps
     }
 
+def delete_experiment_task(experiment_id: int):
+    run_experiment_delete(experiment_id, graph=graph)
+    node_name_index.invalidate(experiment_id)
+    invalidate_response_cache(experiment_id)
+
 @app.delete("/api/experiments/{experiment_id}")
-def delete_experiment(experiment_id: int, db: Session = Depends(get_db)):
+def delete_experiment(experiment_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     # 1. Find Experiment
     exp = db.query(Experiment).filter(Experiment.id == experiment_id).first()
     if not exp:
         return {"status": "error", "message": "Experiment not found"}
+    if is_running(f"experiment:{experiment_id}"):
+        return {"status": "ok", "message": f"Experiment '{exp.name}' is already being deleted."}
+    if exp.rag_type == "graph" and not graph:
+        return {"status": "error", "message": "Graph DB not connected"}
+
+    # 2. Mark & delete in background (batched, resumable)
+    exp.status = "deleting"
+    db.commit()
+    background_tasks.add_task(delete_experiment_task, experiment_id)
+    return {"status": "ok", "message": f"Experiment '{exp.name}' deletion started.", "job": f"experiment:{experiment_id}"}
 
+@app.post("/api/experiments/compare")
+async def compare_experiment_retrieval(req: CompareReq):
+    """
+    A/B retrieval comparison: questions are embedded once and searched against
+    every experiment's collection in parallel.
+    """
     try:
-        # 2. Delete Data based on Type
-        if exp.rag_type == "vector":
-            if exp.collection_name:
-                # Delete Collection (Cascade deletes embeddings)
-                with engine.connect() as conn:
-                    # Find collection UUID
-                    res = conn.execute(text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": exp.collection_name}).fetchone()
-                    if res:
-                        collection_uuid = res[0]
-                        # Delete embeddings
-                        conn.execute(text("DELETE FROM langchain_pg_embedding WHERE collection_id = :uuid"), {"uuid": collection_uuid})
-                        # Delete collection
-                        conn.execute(text("DELETE FROM langchain_pg_collection WHERE uuid = :uuid"), {"uuid": collection_uuid})
-                        conn.commit()
-        
-        elif exp.rag_type == "graph":
-            if graph:
-                # Delete nodes with this experiment_id
-                graph.query(f"MATCH (n) WHERE n.experiment_id = {experiment_id} DETACH DELETE n")
+        return await compare_experiments(embeddings, req.experiment_ids, questions=req.questions,
+                                         limit=req.limit, k=req.k, mode=req.mode or VECTOR_SEARCH_MODE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # 3. Delete Experiment Record
-        db.delete(exp)
-        db.commit()
-        
-        return {"status": "ok", "message": f"Experiment '{exp.name}' deleted."}
+@app.get("/api/experiments/{experiment_id}/delete_status")
+def experiment_delete_status(experiment_id: int):
+    return get_delete_status(f"experiment:{experiment_id}")
 
-    except Exception as e:
-        db.rollback()
-        return {"status": "error", "message": str(e)}
+@app.get("/api/delete_jobs")
+def get_delete_jobs():
+    return list_delete_jobs()
 
 # Legacy endpoint - keep for now or remove if unused
 @app.delete("/api/graph/model/{model_name}")
-def delete_graph_model_data(model_name: str):
+def delete_graph_model_data(model_name: str, background_tasks: BackgroundTasks):
     if not graph:
         return {"status": "error", "message": "Graph DB not connected"}
-    
-    try:
+
+    key = f"model:{model_name}"
+    if is_running(key):
+        return {"status": "error", "message": f"Deletion for {model_name} is already running."}
+
+    def task():
         from pipelines.ingest_graph import delete_graph_data
-        success = delete_graph_data(model_name)
-        if success:
-            return {"status": "ok", "message": f"Data for {model_name} deleted."}
-        else:
-            return {"status": "error", "message": "Deletion failed."}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+        start_delete_job(key)
+        success = delete_graph_data(model_name, on_progress=lambda n: update_delete_job(key, deleted=n))
+        update_delete_job(key, status="done" if success else "failed")
+        node_name_index.invalidate()
+        invalidate_response_cache()
+
+    background_tasks.add_task(task)
+    return {"status": "ok", "message": f"Deletion of {model_name} data started.", "job": key}
+
+@app.get("/api/graph/metrics")
+def get_graph_metrics():
+    # Template fast path vs LLM Cypher 사용 비율
+    return route_metrics.snapshot()
+
+@app.get("/api/cache")
+def get_response_cache_stats():
+    return response_cache.snapshot()
+
+@app.delete("/api/cache")
+def clear_response_cache():
+    invalidate_response_cache()
+    return {"status": "ok"}
+
+@app.get("/api/db/pool")
+def get_db_pool():
+    # 공유 Postgres pool 사용률 / connection 대기 시간
+    return get_pool_stats()
+
+@app.get("/api/rate_limits")
+def get_rate_limits():
+    # 모델별 공유 RPM/TPM bucket 잔량 / 사용률, 우선순위별 요청 수 · 대기 시간
+    return get_rate_limit_stats()
 
 @app.get("/api/usage")
-def get_usage(limit: int = 50, db: Session = Depends(get_db)):
-    return db.query(TokenUsage).order_by(TokenUsage.timestamp.desc()).limit(limit).all()
+def get_usage(limit: int = 50, granularity: str = "raw", start: Optional[datetime] = None, end: Optional[datetime] = None,
+              model: Optional[str] = None, session_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    granularity: 'raw' (recent rows, default) | 'hour' | 'day' (rollup time series)
+    """
+    if granularity in ("hour", "day"):
+        return get_usage_series(db, granularity=granularity, start=start, end=end, model_name=model, session_id=session_id, limit=limit)
+
+    query = db.query(TokenUsage)
+    if start: query = query.filter(TokenUsage.timestamp >= start)
+    if end: query = query.filter(TokenUsage.timestamp <= end)
+    if model: query = query.filter(TokenUsage.model_name == model)
+    if session_id: query = query.filter(TokenUsage.session_id == session_id)
+    return query.order_by(TokenUsage.timestamp.desc()).limit(limit).all()
 
 
 @app.post("/api/evaluate")
@@ -656,138 +790,231 @@ async def api_evaluate(req: EvaluationRequest):
 
 # --- [UPDATED] Hybrid Chat Endpoint ---
 @app.post("/chat")
-async def chat_endpoint(req: ChatReq, db: Session = Depends(get_db)):
+async def chat_endpoint(req: ChatReq, request: Request):
     user_query = req.question
     
     # [핵심] 클라이언트가 선택한 모델로 LLM 인스턴스 즉시 생성 (Real-time Switching)
     try:
-        chat_llm = ChatGoogleGenerativeAI(
-            model=req.model, 
-            temperature=0, 
-            google_api_key=GOOGLE_API_KEY
-        )
+        chat_llm = get_chat_llm(req.model, temperature=0)
+        chat_limiter = RateLimiter(req.model, "chat")
     except Exception as e:
         print(f"Model Init Error: {e}, fallback to default.")
-        chat_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0, google_api_key=GOOGLE_API_KEY)
+        chat_llm = get_chat_llm("gemini-2.5-flash", temperature=0)
+        chat_limiter = RateLimiter("gemini-2.5-flash", "chat")
+
+    def run_llm_cypher(question, graph_experiment_id):
+        # [Dynamic Filtering Logic] 실험 범위는 $experiment_id 파라미터로만 전달 (ScopedGraph가 주입)
+        filter_condition = "WHERE n.experiment_id = $experiment_id AND m.experiment_id = $experiment_id" if graph_experiment_id is not None else ""
+        scope_instruction = (
+            "5. **CRITICAL**: Every node you match MUST be filtered with the parameter `$experiment_id` "
+            "(e.g. `WHERE n.experiment_id = $experiment_id`). Never write the id as a literal."
+            if graph_experiment_id is not None else ""
+        )
+        path_filter = "WHERE all(x IN nodes(path) WHERE x.experiment_id = $experiment_id)" if graph_experiment_id is not None else ""
+        
+        CYPHER_GENERATION_TEMPLATE = f"""
+        You are a Neo4j Cypher expert.
+        The user asks a question regarding specific entities and their relationships.
+        
+        [Schema Info]
+        - Node Labels: `Product`, `Feature`, `Spec`, `Requirement`, `Component`, `UserManual`, `Section`
+        - Relationship Types: `HAS_FEATURE`, `HAS_SPEC`, `REQUIRES`, `INCLUDES`, `PART_OF`, `RELATED_TO`
+        - Node Properties: `name` (text content), `source_model`
+        
+        [CRITICAL INSTRUCTION]
+        1. Identify KEY ENTITIES from the question (e.g., '실시간 통역', '네트워크').
+        2. Map user intent to Schema:
+           - "Constraints", "Conditions", "Requirements", "제약", "조건" -> Look for `(:Requirement)` nodes or `[:REQUIRES]` relationships.
+           - "Features", "Functions" -> Look for `(:Feature)` nodes.
+        3. Find entity nodes with the full-text index `{FULLTEXT_INDEX}` (NOT `toLower(n.name) CONTAINS`, which scans every node):
+           `CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', 'keyword1 OR keyword2') YIELD node AS n`
+        4. **CRITICAL**: You MUST start every MATCH clause with `MATCH path = ...` to define the `path` variable.
+        {scope_instruction}
+        
+        [Query Logic Strategy]
+        // Strategy 1: Path between two specific keywords
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', 'keyword1') YIELD node AS start
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', 'keyword2') YIELD node AS end
+        MATCH path = (start)-[*1..3]-(end)
+        {path_filter}
+        RETURN path LIMIT 20
+        UNION
+        // Strategy 2: Neighbors of keywords
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', 'keyword1 OR keyword2') YIELD node AS n
+        MATCH path = (n)-[r]-(m)
+        {filter_condition}
+        RETURN path LIMIT 50
+        
+        [Example]
+        Question: "실시간 통역의 제약 조건은?"
+        Cypher:
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', '실시간') YIELD node AS n
+        MATCH path = (n)-[:REQUIRES]-(m)
+        {filter_condition}
+        RETURN path LIMIT 20
+        UNION
+        CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', '실시간') YIELD node AS n
+        MATCH path = (n)-[r]-(m)
+        {filter_condition}
+        RETURN path LIMIT 50
+        
+        7. The question is:
+        {{question}}
+        
+        8. Cypher Query:
+        """
+        
+        CYPHER_PROMPT = PromptTemplate(
+            input_variables=["schema", "question"], 
+            template=CYPHER_GENERATION_TEMPLATE
+        )
 
-    # Active Persona Check
-    active_persona = db.query(Persona).filter(Persona.active == True).first()
-    system_prompt_text = active_persona.system_prompt if active_persona else "You are a helpful AI assistant."
+        # 캐시된 스키마 사용 (ingestion 후에만 재조회)
+        chain = GraphCypherQAChain.from_llm(
+            llm=chat_llm, 
+            graph=ScopedGraph(ensure_graph_schema(), graph_experiment_id), 
+            verbose=True, 
+            allow_dangerous_requests=True,
+            cypher_prompt=CYPHER_PROMPT
+        )
+        # Cypher 생성 + 결과 요약 = LLM 2회 호출 (공유 rate limit, 최우선 순위)
+        schema_tokens = estimate_tokens(CYPHER_GENERATION_TEMPLATE) + estimate_tokens(question)
+        for _ in range(2):
+            chat_limiter.acquire(tokens=schema_tokens)
+        res = chain.invoke({"query": question})
+        print(f"🔍 Generated Cypher Result: {res}")
+        return res.get("result", "No info in graph.")
+
+    async def events():
+        """
+        Chat pipeline as typed events: (type, payload).
+        stage   - pipeline progress (retrieval 진행 상황, generation 전에 전송)
+        sources - retrieved chunk ids / scores (vector 검색 직후, graph 검색을 기다리지 않음)
+        graph_sources - graph route / experiment (graph 검색 완료 후)
+        token   - generated text
+        final   - usage, timings, cache status, debug
+        error   - failure message
+        """
+        request_start = time.perf_counter()
+        timings = {}
+
+        def elapsed_ms():
+            return round((time.perf_counter() - request_start) * 1000, 1)
 
-    async def gen():
         try:
+            yield "stage", {"stage": "started", "elapsed_ms": elapsed_ms()}
+
+            # Active Persona Check (async DB: 대기 중 worker thread를 점유하지 않음)
+            system_prompt_text = await get_active_system_prompt()
+
+            # Graph 검색 범위 (ChatReq.graph_source -> experiment_id)
+            graph_experiment_id = await resolve_graph_experiment(req.graph_source)
+
             # [NEW] 동적 Vector Store 연결 (가장 최근 실험 찾기)
-            current_vector_store = vector_store 
+            collection_name = COLLECTION_NAME
             
-            latest_exp = db.query(Experiment).filter(Experiment.rag_type == "vector").order_by(Experiment.created_at.desc()).first()
+            latest_exp = await get_latest_experiment("vector")
             
             if latest_exp and latest_exp.collection_name:
-                current_vector_store = PGVector(
-                    embeddings=embeddings,
-                    collection_name=latest_exp.collection_name,
-                    connection=DB_CONNECTION,
-                    use_jsonb=True,
-                )
+                collection_name = latest_exp.collection_name
                 print(f"🔎 Searching in Collection: {latest_exp.collection_name}")
 
-            # 2. 정답 캐시 확인
-            query_vec = embeddings.embed_query(user_query)
+            # 2. 정답 캐시 확인 (임베딩은 CPU 작업이므로 thread에서 실행)
+            yield "stage", {"stage": "embedding", "elapsed_ms": elapsed_ms()}
+            query_sparse = None
+            if VECTOR_SEARCH_MODE == "hybrid_sparse":
+                # 같은 forward pass에서 dense + sparse weight를 함께 계산
+                dense, sparse = await asyncio.to_thread(encode_dense_sparse, embeddings, [user_query])
+                query_vec, query_sparse = dense[0], sparse[0]
+            else:
+                query_vec = await asyncio.to_thread(embeddings.embed_query, user_query)
+            timings["embedding_ms"] = elapsed_ms()
             try:
-                with engine.connect() as conn:
-                    sql = text("SELECT answer, 1 - (embedding <=> :vec) as score FROM correct_answers ORDER BY score DESC LIMIT 1")
-                    result = conn.execute(sql, {"vec": str(query_vec)}).fetchone()
-                    if result and result[1] >= 0.92:
-                        yield f"⚡ {result[0]}"
-                        return
-            except: pass
+                # in-memory 인덱스 (DB 왕복 없음), 로드 실패 시에만 DB 조회
+                if answer_index.loaded:
+                    cached_answer = answer_index.lookup(query_vec, threshold=ANSWER_CACHE_THRESHOLD)
+                else:
+                    cached_answer = await lookup_correct_answer(query_vec, threshold=ANSWER_CACHE_THRESHOLD)
+                if cached_answer:
+                    yield "token", {"text": f"⚡ {cached_answer}"}
+                    yield "final", {"cache": "answer", "timings": {**timings, "total_ms": elapsed_ms()}}
+                    return
+            except Exception as e:
+                print(f"⚠️ Answer cache lookup failed: {e}")
+
+            # 2-1. Semantic response cache (유사 질문의 이전 답변을 stream으로 재생)
+            # data_version: ingest·삭제마다 DB에서 증가 -> 다른 worker의 기존 entry도 miss (graph 범위 "all" 포함)
+            data_version, ingesting = await retrieval_data_state()
+            cache_key = make_cache_key(req.model, req.rag_type, latest_exp.id if latest_exp else None,
+                                       graph_experiment_id if req.graph_source != "all" else "all", system_prompt_text,
+                                       data_version)
+            # 검색 대상 실험이 아직 적재 중이면 캐시 조회/저장 모두 건너뜀 (부분 데이터 답변이 캐시에 남지 않도록)
+            cacheable = not (
+                (req.rag_type in ["hybrid", "vector"] and latest_exp and latest_exp.id in ingesting)
+                or (req.rag_type in ["hybrid", "graph"] and (
+                    graph_experiment_id in ingesting if req.graph_source != "all" else "graph" in ingesting.values()))
+            )
+            cached = response_cache.get(cache_key, query_vec) if cacheable else None
+            if cached:
+                cached_response, score = cached
+                for i in range(0, len(cached_response), 32):
+                    yield "token", {"text": cached_response[i:i + 32]}
+                    await asyncio.sleep(0)
+                yield "final", {
+                    "cache": "response", "cache_score": round(score, 4), "timings": {**timings, "total_ms": elapsed_ms()},
+                    "debug": f"\n\n---\n**📊 Debug Info:**\n- **Model:** {req.model}\n- **Type:** {req.rag_type}\n- **Cache:** hit (score {score:.3f})",
+                }
+                return
 
             vector_context = "Not used"
             graph_context = "Not used"
-            
+
             # 3. Vector Search
             if req.rag_type in ["hybrid", "vector"]:
-                docs = current_vector_store.similarity_search(user_query, k=10)
+                yield "stage", {"stage": "vector_search", "elapsed_ms": elapsed_ms()}
+                # 캐시 확인용으로 계산한 query_vec 재사용 (중복 임베딩 방지)
+                docs = await similarity_search(collection_name, query_vec, k=10, query_sparse=query_sparse)
                 if docs:
-                    vector_context = "\n".join([d.page_content[:500] for d in docs])
+                    # chunk 출처는 context 조립 / graph 검색(LLM Cypher 포함)을 기다리지 않고 바로 전송
+                    yield "sources", {"chunks": [
+                        {"id": d.metadata.get("id"), "score": d.metadata.get("score"),
+                         "source": d.metadata.get("source"), "page": d.metadata.get("page")}
+                        for d in docs
+                    ]}
+                    vector_context = await asyncio.to_thread(build_vector_context, user_query, docs)
                 else:
+                    yield "sources", {"chunks": []}
                     vector_context = "No relevant documents found."
+                timings["vector_search_ms"] = elapsed_ms()
 
             # 3. Graph Search
             if req.rag_type in ["hybrid", "graph"] and graph:
-                # [수정 1] "Analyzing Knowledge Graph..." 메시지 전송 코드 삭제함
-                # yield "🔍 Analyzing Knowledge Graph...\\n\\n" 
+                yield "stage", {"stage": "graph_search", "elapsed_ms": elapsed_ms()}
                 
                 try:
-                    # [Dynamic Filtering Logic]
-                    filter_condition = "" 
-                    
-                    CYPHER_GENERATION_TEMPLATE = f"""
-                    You are a Neo4j Cypher expert.
-                    The user asks a question regarding specific entities and their relationships.
-                    
-                    [Schema Info]
-                    - Node Labels: `Product`, `Feature`, `Spec`, `Requirement`, `Component`, `UserManual`, `Section`
-                    - Relationship Types: `HAS_FEATURE`, `HAS_SPEC`, `REQUIRES`, `INCLUDES`, `PART_OF`, `RELATED_TO`
-                    - Node Properties: `name` (text content), `source_model`
-                    
-                    [CRITICAL INSTRUCTION]
-                    1. Identify KEY ENTITIES from the question (e.g., '실시간 통역', '네트워크').
-                    2. Map user intent to Schema:
-                       - "Constraints", "Conditions", "Requirements", "제약", "조건" -> Look for `(:Requirement)` nodes or `[:REQUIRES]` relationships.
-                       - "Features", "Functions" -> Look for `(:Feature)` nodes.
-                    3. Use `toLower(n.name) CONTAINS` for partial matching of entity names.
-                    4. **CRITICAL**: You MUST start every MATCH clause with `MATCH path = ...` to define the `path` variable.
-                    
-                    [Query Logic Strategy]
-                    // Strategy 1: Path between two specific keywords
-                    MATCH (start), (end)
-                    WHERE toLower(start.name) CONTAINS 'keyword1' AND toLower(end.name) CONTAINS 'keyword2'
-                    MATCH path = (start)-[*1..3]-(end)
-                    RETURN path LIMIT 20
-                    UNION
-                    // Strategy 2: Neighbors of keywords
-                    MATCH path = (n)-[r]-(m)
-                    WHERE (toLower(n.name) CONTAINS 'keyword1' OR toLower(n.name) CONTAINS 'keyword2')
-                    {filter_condition}
-                    RETURN path LIMIT 50
-                    
-                    [Example]
-                    Question: "실시간 통역의 제약 조건은?"
-                    Cypher:
-                    MATCH path = (n)-[:REQUIRES]-(m)
-                    WHERE toLower(n.name) CONTAINS '실시간'
-                    {filter_condition}
-                    RETURN path LIMIT 20
-                    UNION
-                    MATCH path = (n)-[r]-(m)
-                    WHERE toLower(n.name) CONTAINS '실시간'
-                    {filter_condition}
-                    RETURN path LIMIT 50
-                    
-                    7. The question is:
-                    {{question}}
-                    
-                    8. Cypher Query:
-                    """
-                    
-                    CYPHER_PROMPT = PromptTemplate(
-                        input_variables=["schema", "question"], 
-                        template=CYPHER_GENERATION_TEMPLATE
-                    )
-
-                    chain = GraphCypherQAChain.from_llm(
-                        llm=chat_llm, 
-                        graph=graph, 
-                        verbose=True, 
-                        allow_dangerous_requests=True,
-                        cypher_prompt=CYPHER_PROMPT
-                    )
-                    res = chain.invoke({"query": user_query})
-                    print(f"🔍 Generated Cypher Result: {res}")
-                    graph_context = res.get("result", "No info in graph.")
+                    # [Fast Path] 노드 이름 사전 + Cypher 템플릿 (LLM 호출 없음)
+                    route_start = time.time()
+                    fast_context = None
+                    try:
+                        fast_context = await asyncio.to_thread(template_graph_context, graph, user_query, experiment_id=graph_experiment_id)
+                    except Exception as e:
+                        print(f"⚠️ Graph fast path failed, fallback to LLM Cypher: {e}")
+
+                    if fast_context is not None:
+                        graph_context = fast_context
+                        route_metrics.record("template", time.time() - route_start)
+                        graph_route = "template"
+                    else:
+                        graph_context = await asyncio.to_thread(run_llm_cypher, user_query, graph_experiment_id)
+                        route_metrics.record("llm", time.time() - route_start)
+                        graph_route = "llm"
                 except Exception as e:
                     print(f"Graph Error: {e}")
                     graph_context = "Graph search failed."
+                    graph_route = "failed"
+                timings["graph_search_ms"] = elapsed_ms()
+                # graph 출처는 별도 event (생성 시작 전)
+                yield "graph_sources", {"route": graph_route, "experiment_id": graph_experiment_id}
 
             # 4. Final Prompt
             final_prompt = f"""
@@ -812,40 +1039,74 @@ async def chat_endpoint(req: ChatReq, db: Session = Depends(get_db)):
             """
 
             # 5. Generate Stream
+            yield "stage", {"stage": "generating", "elapsed_ms": elapsed_ms()}
             full_response = ""
+            usage = None
+            estimated_tokens = estimate_tokens(final_prompt)
+            await asyncio.to_thread(chat_limiter.acquire, None, estimated_tokens)
             async for chunk in chat_llm.astream(final_prompt):
+                if not full_response and chunk.content:
+                    timings["first_token_ms"] = elapsed_ms()
                 full_response += chunk.content
-                yield chunk.content
-            
-            # 6. Debug Info
-            # [수정 2] 줄바꿈 문자를 \\n (문자열)에서 \n (실제 줄바꿈)으로 변경
-            debug_info = f"\n\n---\n**📊 Debug Info:**\n- **Model:** {req.model}\n- **Type:** {req.rag_type}\n- **Graph:** {graph_context}\n- **Vector:** {vector_context[:100]}..."
-            yield debug_info
-
-            # [NEW] Token Usage Tracking
+                # 스트림 chunk에 포함된 usage_metadata 누적 (별도 토큰 계산 호출 없음)
+                if getattr(chunk, "usage_metadata", None):
+                    usage = chunk.usage_metadata if usage is None else add_usage(usage, chunk.usage_metadata)
+                yield "token", {"text": chunk.content}
+            timings["generation_ms"] = elapsed_ms()
+
+            # 정상 완료된 답변만 캐시 (검색 실패 시 제외)
+            if cacheable and full_response.strip() and graph_context != "Graph search failed.":
+                response_cache.put(cache_key, query_vec, full_response)
+
+            # [NEW] Token Usage Tracking (Background batch writer, non-blocking)
+            usage_info = None
             try:
-                input_tokens = chat_llm.get_num_tokens(final_prompt)
-                output_tokens = chat_llm.get_num_tokens(full_response)
+                if usage:
+                    input_tokens = usage.get("input_tokens", 0)
+                    output_tokens = usage.get("output_tokens", 0)
+                else:
+                    # usage_metadata 미제공 모델: 문자 수 기반 추정 (chars / 3)
+                    input_tokens = len(final_prompt) // 3
+                    output_tokens = len(full_response) // 3
                 cost = calculate_cost(req.model, input_tokens, output_tokens)
-                
-                with SessionLocal() as db_log:
-                    usage = TokenUsage(
-                        session_id=req.session_id,
-                        model_name=req.model,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        cost_usd=cost
-                    )
-                    db_log.add(usage)
-                    db_log.commit()
+                usage_recorder.record(req.session_id, req.model, input_tokens, output_tokens, cost)
+                usage_info = {"input_tokens": input_tokens, "output_tokens": output_tokens, "cost_usd": cost, "estimated": not usage}
+                # 예약한 추정 토큰을 실제 사용량으로 보정 (TPM bucket)
+                await asyncio.to_thread(chat_limiter.reconcile, estimated_tokens, input_tokens + output_tokens)
             except Exception as e:
                 print(f"⚠️ Token tracking failed: {e}")
 
+            # 6. Debug Info
+            # [수정 2] 줄바꿈 문자를 \\n (문자열)에서 \n (실제 줄바꿈)으로 변경
+            debug_info = f"\n\n---\n**📊 Debug Info:**\n- **Model:** {req.model}\n- **Type:** {req.rag_type}\n- **Graph:** {graph_context}\n- **Vector:** {vector_context[:100]}..."
+            yield "final", {"cache": None, "usage": usage_info, "timings": {**timings, "total_ms": elapsed_ms()}, "debug": debug_info}
+
+        except RateLimitTimeout as e:
+            # 공유 bucket이 LLM_CHAT_MAX_WAIT 안에 용량을 주지 못함 -> 무기한 대기 대신 즉시 실패
+            print(f"⚠️ {e}")
+            yield "error", {"message": f"Rate limit exceeded, please retry shortly. ({e})", "status": 429}
         except Exception as e:
             print(f"Error in generation: {e}")
-            yield f"System Error: {e}"
-
-    return StreamingResponse(gen(), media_type="text/plain")
+            yield "error", {"message": f"System Error: {e}"}
+
+    async def text_stream():
+        # Backward-compatible plain text: 답변 토큰 + 마지막 debug 블록만 전송
+        async for event, data in events():
+            if event == "token":
+                yield data["text"]
+            elif event == "final" and data.get("debug"):
+                yield data["debug"]
+            elif event == "error":
+                yield data["message"]
+
+    async def sse_stream():
+        async for event, data in events():
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+    if req.stream_format == "sse" or "text/event-stream" in (request.headers.get("accept") or ""):
+        return StreamingResponse(sse_stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(text_stream(), media_type="text/plain")
 
 # --- Static Files ---
 @app.get("/")
@@ -0,0 +1,167 @@
+import time
+import threading
+from sqlalchemy import text
+
+from server.core.config import DELETE_BATCH_SIZE
+from server.core.database import engine, SessionLocal, Experiment
+from server.services.graph_indexes import ENTITY
+from server.services.vector_store import evict_vector_store, ensure_collection_index
+
+# --- Batched, Resumable Deletion ---
+# 한 트랜잭션에서 전체를 지우면 Neo4j heap 고갈 / 장시간 lock이 발생하므로
+# batch 단위로 나눠 삭제하고 batch마다 commit한다. 각 batch는 멱등이므로
+# 중단되더라도 같은 작업을 다시 실행하면 남은 데이터부터 이어서 삭제된다.
+
+DELETE_JOBS = {}
+_jobs_lock = threading.Lock()
+
+
+def _update(key, **fields):
+    with _jobs_lock:
+        DELETE_JOBS.setdefault(key, {}).update(fields)
+
+
+def start_delete_job(key, **fields):
+    """(Re)start a job entry as running."""
+    with _jobs_lock:
+        DELETE_JOBS[key] = {"status": "running", "deleted": 0, **fields}
+
+
+def update_delete_job(key, **fields):
+    _update(key, **fields)
+
+
+def list_delete_jobs():
+    with _jobs_lock:
+        return {key: dict(job) for key, job in DELETE_JOBS.items()}
+
+
+def get_delete_status(key):
+    with _jobs_lock:
+        return dict(DELETE_JOBS.get(key, {"status": "idle"}))
+
+
+def is_running(key):
+    return get_delete_status(key).get("status") == "running"
+
+
+def delete_graph_nodes(graph, where="", params=None, batch_size=DELETE_BATCH_SIZE, on_progress=None):
+    """
+    DETACH DELETE matching nodes `batch_size` at a time.
+    where: Cypher predicate on `n` (empty = whole graph).
+    """
+    params = dict(params or {})
+    if where:
+        match = f"MATCH (n:{ENTITY}) WHERE {where}"
+    else:
+        match = "MATCH (n)"
+    total = 0
+    while True:
+        res = graph.query(f"{match} WITH n LIMIT $batch_size DETACH DELETE n RETURN count(*) AS deleted",
+                          {**params, "batch_size": batch_size})
+        deleted = res[0]["deleted"] if res else 0
+        if deleted == 0:
+            break
+        total += deleted
+        if on_progress:
+            on_progress(total)
+    return total
+
+
+def count_graph_nodes(graph, where="", params=None):
+    match = f"MATCH (n:{ENTITY}) WHERE {where}" if where else "MATCH (n)"
+    res = graph.query(f"{match} RETURN count(n) AS count", params or {})
+    return res[0]["count"] if res else 0
+
+
+def delete_collection_vectors(collection_name, batch_size=DELETE_BATCH_SIZE, on_progress=None):
+    """Delete a PGVector collection's embeddings in batches, then the collection row."""
+    with engine.connect() as conn:
+        res = conn.execute(text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": collection_name}).fetchone()
+    if not res:
+        return 0
+    collection_uuid = res[0]
+    # batch마다 collection_id로 찾으므로 인덱스 필수 (없으면 batch마다 전체 scan)
+    ensure_collection_index()
+
+    total = 0
+    while True:
+        with engine.connect() as conn:
+            deleted = conn.execute(text("""
+                DELETE FROM langchain_pg_embedding
+                WHERE id IN (SELECT id FROM langchain_pg_embedding WHERE collection_id = :uuid LIMIT :batch_size)
+            """), {"uuid": collection_uuid, "batch_size": batch_size}).rowcount
+            conn.commit()
+        if not deleted:
+            break
+        total += deleted
+        if on_progress:
+            on_progress(total)
+
+    with engine.connect() as conn:
+        conn.execute(text("DELETE FROM langchain_pg_collection WHERE uuid = :uuid"), {"uuid": collection_uuid})
+        conn.commit()
+    evict_vector_store(collection_name)
+    return total
+
+
+def count_collection_vectors(collection_name):
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT count(*) FROM langchain_pg_embedding e
+            JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+            WHERE c.name = :name
+        """), {"name": collection_name}).scalar() or 0
+
+
+def run_experiment_delete(experiment_id, graph=None):
+    """
+    Background job: delete an experiment's data in batches, then its record.
+    The experiment stays in status 'deleting' until everything is gone, so an
+    interrupted job is picked up again by resume_pending_deletes().
+    """
+    key = f"experiment:{experiment_id}"
+    session = SessionLocal()
+    try:
+        exp = session.query(Experiment).filter(Experiment.id == experiment_id).first()
+        if not exp:
+            _update(key, status="done", finished_at=time.time())
+            return
+        exp.status = "deleting"
+        session.commit()
+
+        _update(key, status="running", name=exp.name, rag_type=exp.rag_type, deleted=0, total=None,
+                started_at=time.time(), finished_at=None, error=None)
+        print(f"\n🗑️  [Delete] Experiment {experiment_id} ('{exp.name}', {exp.rag_type}) started...")
+
+        progress = lambda n: _update(key, deleted=n)
+        if exp.rag_type == "vector" and exp.collection_name:
+            _update(key, total=count_collection_vectors(exp.collection_name))
+            deleted = delete_collection_vectors(exp.collection_name, on_progress=progress)
+        elif exp.rag_type == "graph":
+            if graph is None:
+                raise RuntimeError("Graph DB not connected")
+            where, params = "n.experiment_id = $exp_id", {"exp_id": experiment_id}
+            _update(key, total=count_graph_nodes(graph, where, params))
+            deleted = delete_graph_nodes(graph, where, params, on_progress=progress)
+        else:
+            deleted = 0
+
+        session.delete(exp)
+        session.commit()
+        _update(key, status="done", deleted=deleted, finished_at=time.time())
+        print(f"   ✅ [Delete] Experiment {experiment_id} deleted ({deleted} rows/nodes).")
+    except Exception as e:
+        session.rollback()
+        _update(key, status="failed", error=str(e), finished_at=time.time())
+        print(f"   ❌ [Delete] Experiment {experiment_id} failed (resumable): {e}")
+    finally:
+        session.close()
+
+
+def pending_experiment_deletes():
+    session = SessionLocal()
+    try:
+        return [e.id for e in session.query(Experiment).filter(Experiment.status == "deleting").all()]
+    finally:
+        session.close()
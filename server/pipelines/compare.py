@@ -0,0 +1,166 @@
+import time
+import asyncio
+from itertools import combinations
+from typing import List, Optional
+from sqlalchemy import select, text
+
+from server.core.config import VECTOR_SEARCH_MODE
+from server.core.database import engine, Experiment
+from server.core.async_database import AsyncSessionLocal
+from server.services.chat_store import similarity_search
+from server.services.sparse_encoder import encode_dense_sparse
+
+# --- Multi-Experiment Retrieval A/B ---
+# 질문 세트를 한 번만 임베딩하고, 같은 질의 벡터로 여러 실험 collection을 동시에 검색한다.
+# (실험 N개 비교 = 임베딩 1회 + 검색 N회, evaluate처럼 실험마다 재임베딩하지 않음)
+# 실험마다 chunking이 달라 chunk id가 겹치지 않으므로, overlap은 원문 위치
+# (source, page, start_index ~ start_index + len) 구간의 Jaccard로 계산한다.
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else None
+
+
+def _spans(docs):
+    """Retrieved chunks -> {(source, page): [(start, end), ...]} (start_index 없으면 본문 자체를 key로)."""
+    spans = {}
+    for d in docs:
+        meta = d.metadata
+        if meta.get("start_index") is None:
+            spans.setdefault(("text", d.page_content), []).append((0, 1))
+            continue
+        start = int(meta["start_index"])
+        spans.setdefault((meta.get("source"), meta.get("page")), []).append((start, start + len(d.page_content)))
+    return spans
+
+
+def _covered(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _length(ranges):
+    return sum(end - start for start, end in _covered(ranges))
+
+
+def span_overlap(a_docs, b_docs) -> float:
+    """Jaccard of the source text covered by two result lists (1.0 = 같은 원문 구간을 가져옴)."""
+    a, b = _spans(a_docs), _spans(b_docs)
+    inter = union = 0
+    for key in set(a) | set(b):
+        ra, rb = a.get(key, []), b.get(key, [])
+        both = _length(ra) + _length(rb)
+        # |A ∩ B| = |A| + |B| - |A ∪ B|
+        merged = _length(ra + rb)
+        inter += both - merged
+        union += merged
+    return inter / union if union else 1.0
+
+
+def load_question_set(limit: int) -> List[str]:
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text("SELECT question FROM correct_answers ORDER BY id DESC LIMIT :n"), {"n": limit})]
+
+
+async def load_experiments(experiment_ids) -> List[Experiment]:
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(select(Experiment).where(Experiment.id.in_(experiment_ids)))).scalars().all()
+    by_id = {exp.id: exp for exp in rows}
+    missing = [i for i in experiment_ids if i not in by_id]
+    if missing:
+        raise ValueError(f"Experiments not found: {missing}")
+    invalid = [i for i in experiment_ids if by_id[i].rag_type != "vector" or not by_id[i].collection_name or by_id[i].status == "deleting"]
+    if invalid:
+        raise ValueError(f"Not searchable vector experiments: {invalid}")
+    return [by_id[i] for i in experiment_ids]
+
+
+async def _timed_search(collection_name, query_vec, k, mode, query_sparse):
+    start = time.perf_counter()
+    docs = await similarity_search(collection_name, query_vec, k=k, mode=mode, query_sparse=query_sparse)
+    return docs, (time.perf_counter() - start) * 1000
+
+
+async def compare_experiments(embeddings, experiment_ids: List[int], questions: Optional[List[str]] = None,
+                              limit: int = 20, k: int = 10, mode: str = VECTOR_SEARCH_MODE):
+    """
+    Side-by-side retrieval comparison of vector experiments on one question set.
+    questions=None: 최근 correct_answers 질문 `limit`개.
+    Returns per-experiment latency / score summary, pairwise overlap and per-question rows.
+    """
+    if mode not in ("exact", "binary", "hybrid_sparse"):
+        raise ValueError(f"Unknown search mode: {mode!r} (exact | binary | hybrid_sparse)")
+    if len(set(experiment_ids)) < 2:
+        raise ValueError("Select at least two experiments to compare.")
+    experiments = await load_experiments(list(dict.fromkeys(experiment_ids)))
+    if not questions:
+        questions = await asyncio.to_thread(load_question_set, limit)
+    if not questions:
+        raise ValueError("No questions (pass `questions` or add correct answers).")
+
+    # 1. 질문 세트 임베딩 (전체 비교에서 단 한 번)
+    start = time.perf_counter()
+    if mode == "hybrid_sparse":
+        vectors, sparse = await asyncio.to_thread(encode_dense_sparse, embeddings, questions)
+    else:
+        vectors, sparse = await asyncio.to_thread(embeddings.embed_documents, questions), [None] * len(questions)
+    embedding_ms = (time.perf_counter() - start) * 1000
+    print(f"   🧮 [Compare] Embedded {len(questions)} questions once ({embedding_ms:.0f}ms), {len(experiments)} experiments")
+
+    # 2. 질문마다 모든 실험 collection을 동시에 검색
+    latencies = {exp.id: [] for exp in experiments}
+    top1 = {exp.id: [] for exp in experiments}
+    mean_k = {exp.id: [] for exp in experiments}
+    overlaps = {pair: [] for pair in combinations([exp.id for exp in experiments], 2)}
+    per_question = []
+    for question, vec, query_sparse in zip(questions, vectors, sparse):
+        results = await asyncio.gather(*[_timed_search(exp.collection_name, vec, k, mode, query_sparse) for exp in experiments])
+        docs_by_exp = {}
+        row = {"question": question, "results": {}}
+        for exp, (docs, ms) in zip(experiments, results):
+            scores = [d.metadata["score"] for d in docs]
+            docs_by_exp[exp.id] = docs
+            latencies[exp.id].append(ms)
+            if scores:
+                top1[exp.id].append(scores[0])
+                mean_k[exp.id].append(sum(scores) / len(scores))
+            row["results"][exp.id] = {"latency_ms": round(ms, 2), "top_score": scores[0] if scores else None,
+                                      "chunk_ids": [d.metadata["id"] for d in docs]}
+        for a, b in overlaps:
+            overlaps[(a, b)].append(span_overlap(docs_by_exp[a], docs_by_exp[b]))
+        per_question.append(row)
+
+    def mean(values):
+        return round(sum(values) / len(values), 4) if values else None
+
+    summary = []
+    for exp in experiments:
+        lat = latencies[exp.id]
+        others = [v for pair, values in overlaps.items() if exp.id in pair for v in values]
+        summary.append({
+            "id": exp.id,
+            "name": exp.name,
+            "config": exp.config,
+            "p50_ms": round(_percentile(lat, 50), 2),
+            "p95_ms": round(_percentile(lat, 95), 2),
+            "top1_score": mean(top1[exp.id]),
+            f"mean_score@{k}": mean(mean_k[exp.id]),
+            "overlap_with_others": mean(others),
+        })
+
+    return {
+        "status": "success",
+        "mode": mode,
+        "k": k,
+        "questions": len(questions),
+        "embedding_ms": round(embedding_ms, 1),
+        "experiments": summary,
+        "overlap": [{"a": a, "b": b, "overlap": mean(values)} for (a, b), values in overlaps.items()],
+        "per_question": per_question,
+    }
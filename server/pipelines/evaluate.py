@@ -2,12 +2,7 @@
 import os
 import sys
 import json
-import random
-import time
 from sqlalchemy.orm import Session
-from langchain_postgres import PGVector
-from langchain_community.graphs import Neo4jGraph
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from sqlalchemy import text
 
@@ -18,22 +13,22 @@ project_root = os.path.dirname(server_dir)
 sys.path.append(server_dir)
 sys.path.append(project_root)
 
-from core.config import DB_CONNECTION, COLLECTION_NAME, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GOOGLE_API_KEY
-from core.database import CorrectAnswer, SessionLocal, Experiment
+from server.core.config import COLLECTION_NAME
+from server.core.database import CorrectAnswer, SessionLocal, Experiment
 from services.embedder import get_bge_m3_embedding
+from server.services.vector_store import get_vector_store
+from services.graph_indexes import FULLTEXT_INDEX, fulltext_query
+from server.services.graph_client import get_graph
+from server.services.llm_factory import get_chat_llm
+from server.services.rate_limiter import RateLimiter
 
 # Initialize Resources
 print("   [Eval] Initializing resources...")
 embeddings = get_bge_m3_embedding()
-vector_store = PGVector(
-    embeddings=embeddings,
-    collection_name=COLLECTION_NAME,
-    connection=DB_CONNECTION,
-    use_jsonb=True,
-)
+vector_store = get_vector_store(embeddings, COLLECTION_NAME)
 
 try:
-    graph = Neo4jGraph(url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD)
+    graph = get_graph()
 except:
     graph = None
 
@@ -41,26 +36,14 @@ except:
 # llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0, google_api_key=GOOGLE_API_KEY)
 
 def get_llm(model_name="gemini-2.0-flash"):
-    return ChatGoogleGenerativeAI(model=model_name, temperature=0, google_api_key=GOOGLE_API_KEY)
+    return get_chat_llm(model_name, temperature=0)
 
-def safe_invoke(llm, prompt, retries=3, base_delay=10):
+def safe_invoke(llm, prompt, model_name="gemini-2.0-flash", retries=3):
     """
-    Invokes LLM with retry logic for rate limits.
+    Invokes LLM under the shared rate limit (priority: evaluation), with 429 backoff.
     Strictly NO fallback to other models.
     """
-    for i in range(retries):
-        try:
-            return llm.invoke(prompt)
-        except Exception as e:
-            err_msg = str(e)
-            if "RESOURCE_EXHAUSTED" in err_msg or "429" in err_msg:
-                if i < retries - 1:
-                    wait_time = base_delay * (i + 1) + random.uniform(1, 3)
-                    print(f"⚠️ [Eval] Rate limit hit (429). Retrying in {wait_time:.1f}s... (Attempt {i+1}/{retries})")
-                    time.sleep(wait_time)
-                    continue
-            # If not 429 or retries exhausted, re-raise
-            raise e
+    return RateLimiter(model_name, "evaluation").invoke(llm, prompt, retries=retries)
 
 def calculate_metrics(question, answer, context, ground_truth=None, model_name="gemini-2.0-flash"):
     """
@@ -70,8 +53,6 @@ def calculate_metrics(question, answer, context, ground_truth=None, model_name="
     llm = get_llm(model_name)
     
     # 1. Faithfulness
-    # [Delay to prevent burst]
-    time.sleep(2) 
     
     faith_prompt = f"""
     You are a judge. Evaluate if the ANSWER is derived ONLY from the CONTEXT.
@@ -86,12 +67,11 @@ def calculate_metrics(question, answer, context, ground_truth=None, model_name="
     Return ONLY the number.
     """
     try:
-        res = safe_invoke(llm, faith_prompt)
+        res = safe_invoke(llm, faith_prompt, model_name)
         faith_score = float(res.content.strip())
     except: faith_score = 0.5
 
     # 2. Answer Relevancy
-    time.sleep(2)
     
     rel_prompt = f"""
     You are a judge. Evaluate if the ANSWER is relevant to the QUESTION.
@@ -106,12 +86,11 @@ def calculate_metrics(question, answer, context, ground_truth=None, model_name="
     Return ONLY the number.
     """
     try:
-        res = safe_invoke(llm, rel_prompt)
+        res = safe_invoke(llm, rel_prompt, model_name)
         rel_score = float(res.content.strip())
     except: rel_score = 0.5
 
     # 3. Context Precision
-    time.sleep(2)
 
     # If ground_truth is provided, check if context contains it.
     prec_prompt = f"""
@@ -127,7 +106,7 @@ def calculate_metrics(question, answer, context, ground_truth=None, model_name="
     Return ONLY the number.
     """
     try:
-        res = safe_invoke(llm, prec_prompt)
+        res = safe_invoke(llm, prec_prompt, model_name)
         prec_score = float(res.content.strip())
     except: prec_score = 0.5
 
@@ -146,14 +125,9 @@ def run_rag_generation(question, model_name="gemini-2.0-flash"):
     current_vector_store = vector_store
     session = SessionLocal()
     try:
-        latest_exp = session.query(Experiment).filter(Experiment.rag_type == "vector").order_by(Experiment.created_at.desc()).first()
+        latest_exp = session.query(Experiment).filter(Experiment.rag_type == "vector", Experiment.status.is_distinct_from("deleting")).order_by(Experiment.created_at.desc()).first()
         if latest_exp and latest_exp.collection_name:
-            current_vector_store = PGVector(
-                embeddings=embeddings,
-                collection_name=latest_exp.collection_name,
-                connection=DB_CONNECTION,
-                use_jsonb=True,
-            )
+            current_vector_store = get_vector_store(embeddings, latest_exp.collection_name)
             # print(f"🔎 [Eval] Using Collection: {latest_exp.collection_name}")
     except Exception as e:
         print(f"⚠️ [Eval] Vector selection failed: {e}")
@@ -170,9 +144,13 @@ def run_rag_generation(question, model_name="gemini-2.0-flash"):
             # Simple keyword search for now to avoid complex Cypher generation overhead in eval
             # In a real scenario, we should reuse the exact same logic as main.py
             # For this 'Performance Report', we'll use a simplified retrieval
-            res = graph.query(f"MATCH (n) WHERE toLower(n.id) CONTAINS '{question.split()[0]}' RETURN n.id LIMIT 5")
+            # name full-text index 사용 (전체 노드 스캔 방지)
+            res = graph.query(
+                f"CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX}', $q) YIELD node RETURN node.name AS name LIMIT 5",
+                {"q": fulltext_query(question.split()[:3])}
+            )
             if res:
-                graph_context = ", ".join([r['n.id'] for r in res])
+                graph_context = ", ".join([r['name'] for r in res if r['name']])
         except: pass
 
     # 3. Generate
@@ -188,7 +166,7 @@ def run_rag_generation(question, model_name="gemini-2.0-flash"):
     """
     llm = get_llm(model_name)
     # Use safe_invoke
-    res = safe_invoke(llm, final_prompt)
+    res = safe_invoke(llm, final_prompt, model_name)
     response = res.content
     return response, vector_context + "\n" + graph_context
 
@@ -233,9 +211,6 @@ def run_evaluation(limit=5, model_name="gemini-2.0-flash"):
                     "relevancy": metrics['answer_relevancy'],
                     "precision": metrics['context_precision']
                 })
-
-                # [Rate Limit] Cooldown between items
-                time.sleep(5) 
                 
             except Exception as item_error:
                 print(f"   ⚠️ Error processing item {a.id}: {item_error}")
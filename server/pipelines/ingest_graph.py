@@ -1,49 +1,79 @@
 import os
-import time
 import pymupdf4llm
 from langchain_core.documents import Document
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_neo4j import Neo4jGraph
 from langchain_experimental.graph_transformers import LLMGraphTransformer
-from langchain_google_genai import ChatGoogleGenerativeAI
 # OpenAI 사용 시 주석 해제
 # from langchain_openai import ChatOpenAI 
 
-from server.core.config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GOOGLE_API_KEY, RAW_DATA_DIR
+from server.core.config import LLM_BACKEND, RAW_DATA_DIR, GRAPH_NODE_LABELS, GRAPH_REL_TYPES, CHUNK_UNIT
+from server.services.graph_indexes import ensure_graph_indexes, ENTITY
+from server.pipelines.cleanup import delete_graph_nodes
+from server.services.graph_client import get_graph, mark_schema_stale
+from server.services.rate_limiter import RateLimiter, estimate_tokens, is_rate_limit_error
+from server.services.token_chunker import make_splitter
+from server.services.llm_factory import get_chat_llm
 
-def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000, overlap: int = 200, reset_db: bool = False):
-    print(f"\n🕸️  [Graph Ingest] Start setup... Model: [{model_name}] | Exp ID: {experiment_id} | Chunk: {chunk_size} | Overlap: {overlap} | Reset: {reset_db}")
+# LLMGraphTransformer가 chunk 앞뒤로 붙이는 스키마 지시문 + 출력 JSON 대략치 (TPM 예약용)
+TRANSFORMER_TOKEN_OVERHEAD = 2000
+MAX_BATCH_RETRIES = 3
+
+def tag_graph_documents(graph_docs, model_name, filename, experiment_id=None):
+    """Attach source/experiment metadata to extracted nodes and relationships (in place)."""
+    for g_doc in graph_docs:
+        for node in g_doc.nodes:
+            node.properties['source_model'] = model_name
+            node.properties['source_file'] = filename
+            
+            # [수정] 0번 ID도 저장되도록 조건 변경
+            if experiment_id is not None:
+                node.properties['experiment_id'] = experiment_id
+                
+            if 'name' not in node.properties:
+                node.properties['name'] = node.id 
+            
+            # [FIX] Remove 'id' property if it exists to avoid Neo4j reserved keyword error
+            if 'id' in node.properties:
+                del node.properties['id'] 
+
+        for rel in g_doc.relationships:
+            rel.properties['source_model'] = model_name
+            if experiment_id is not None:
+                rel.properties['experiment_id'] = experiment_id
+    return graph_docs
+
+def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000, overlap: int = 200, reset_db: bool = False,
+                     chunk_unit: str = CHUNK_UNIT):
+    print(f"\n🕸️  [Graph Ingest] Start setup... Model: [{model_name}] | Exp ID: {experiment_id} | Chunk: {chunk_size} {chunk_unit}s | Overlap: {overlap} | Reset: {reset_db}")
 
     # 1. Connect Neo4j
     try:
-        graph = Neo4jGraph(
-            url=NEO4J_URI,
-            username=NEO4J_USERNAME,
-            password=NEO4J_PASSWORD
-        )
+        graph = get_graph()
         print("   ✅ Neo4j Connected!")
     except Exception as e:
         print(f"   ❌ Neo4j Connection Failed: {e}")
         return
 
+    # 조회/삭제 필터 속성 인덱스 (이미 있으면 no-op)
+    ensure_graph_indexes(graph)
+
     # 2. Reset DB (초기화 옵션)
     if reset_db:
         print("   🧹 Clearing existing Neo4j data (Reset Mode)...")
         try:
-            graph.query("MATCH (n) DETACH DELETE n")
-            print("   ✅ DB Fully Cleared.")
+            # batch 단위 삭제 (단일 트랜잭션 전체 삭제 시 heap 고갈)
+            deleted = delete_graph_nodes(graph, on_progress=lambda n: print(f"      🗑️ {n} nodes deleted..."))
+            print(f"   ✅ DB Fully Cleared. ({deleted} nodes)")
+            mark_schema_stale()
         except Exception as e:
             print(f"   ⚠️ DB Clear Failed: {e}")
 
     # 3. Prepare LLM (Dynamic Instantiation) - 사용자 선택 존중
     llm = None
-    if "gemini" in model_name.lower():
-        llm = ChatGoogleGenerativeAI(
-            model=model_name,  # 사용자가 선택한 모델 그대로 사용
-            temperature=0,
-            google_api_key=GOOGLE_API_KEY
-        )
+    limit_model = model_name
+    # backend factory 경유 (LLM_BACKEND=fake 이면 모델명과 무관하게 오프라인 가짜 모델)
+    if "gemini" in model_name.lower() or LLM_BACKEND == "fake":
+        llm = get_chat_llm(model_name, temperature=0)  # 사용자가 선택한 모델 그대로 사용
     elif "gpt" in model_name.lower():
         # OpenAI 사용 시
         # llm = ChatOpenAI(model=model_name, temperature=0)
@@ -51,23 +81,17 @@ def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000
         pass 
     else:
         print(f"   ⚠️ Unknown model '{model_name}', using default Gemini Flash.")
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0, google_api_key=GOOGLE_API_KEY)
+        llm = get_chat_llm("gemini-2.0-flash", temperature=0)
+        limit_model = "gemini-2.0-flash"
+    # 모든 프로세스가 공유하는 모델별 RPM/TPM 한도 (chat보다 낮은 우선순위)
+    limiter = RateLimiter(limit_model, "ingestion")
     
     # ---------------------------------------------------------
     # 스키마(Schema) 정의
     # ---------------------------------------------------------
-    allowed_nodes = [
-        "Product", "Feature", "Spec", 
-        "Requirement", "Constraint", "Condition", 
-        "Component", "UserManual", "Section"
-    ]
-    
-    allowed_rels = [
-        "HAS_FEATURE", "HAS_SPEC", 
-        "REQUIRES", "HAS_CONSTRAINT", "HAS_CONDITION",
-        "INCLUDES", "PART_OF", "RELATED_TO", 
-        "HAS_MANUAL", "HAS_SECTION"
-    ]
+    # (core/config.py의 GRAPH_NODE_LABELS 기준으로 인덱스도 생성됨)
+    allowed_nodes = GRAPH_NODE_LABELS
+    allowed_rels = GRAPH_REL_TYPES
 
     llm_transformer = LLMGraphTransformer(
         llm=llm,
@@ -78,27 +102,27 @@ def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000
     # ---------------------------------------------------------
 
     # 4. Load Files
-    # DB에 이미 저장된 파일 목록을 가져옵니다. (main.py의 stats API 활용 로직 등을 참고하거나 직접 쿼리)
+    files = [f for f in os.listdir(RAW_DATA_DIR) if f.endswith('.pdf')]
+    if not files:
+        print("   ❌ No PDF files found.")
+        return
+
+    # 이 실험에 이미 저장된 파일 목록 (중단된 ingestion 재개용)
+    # experiment_id로 한정: 같은 모델이라도 chunk 설정이 다른 실험은 파일을 처음부터 다시 추출해야 함
     try:
-        existing_files = [r['source_file'] for r in graph.query("MATCH (n) WHERE n.source_model = $model RETURN DISTINCT n.source_file as source_file", {"model": model_name})]
+        existing_files = [r['source_file'] for r in graph.query(
+            f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $experiment_id AND n.source_model = $model RETURN DISTINCT n.source_file as source_file",
+            {"experiment_id": experiment_id, "model": model_name})]
     except:
         existing_files = []
 
+    # 5. Processing Loop
     for filename in files:
         # [핵심] 이미 학습한 파일이면 건너뜁니다! (토큰 절약)
         if filename in existing_files:
-            print(f"⏩ Skipping '{filename}' (Already ingested)")
+            print(f"⏩ Skipping '{filename}' (Already ingested for experiment {experiment_id})")
             continue
-            
-        print(f"\n📄 Processing '{filename}'...")
 
-    files = [f for f in os.listdir(RAW_DATA_DIR) if f.endswith('.pdf')]
-    if not files:
-        print("   ❌ No PDF files found.")
-        return
-
-    # 5. Processing Loop
-    for filename in files:
         print(f"\n📄 Processing '{filename}' using {model_name}... (Chunk: {chunk_size})")
         file_path = os.path.join(RAW_DATA_DIR, filename)
         
@@ -114,7 +138,7 @@ def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000
             loader = PyMuPDFLoader(file_path)
             raw_docs = loader.load()
         
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+        text_splitter = make_splitter(chunk_size, overlap, chunk_unit)
         docs = text_splitter.split_documents(raw_docs)
         print(f"   -> {len(docs)} chunks created.")
 
@@ -123,55 +147,43 @@ def run_graph_ingest(model_name: str, experiment_id: int, chunk_size: int = 2000
         
         for i in range(0, len(docs), BATCH_SIZE):
             batch_docs = docs[i : i + BATCH_SIZE]
-            try:
-                # (1) 그래프 문서 변환
-                graph_docs = llm_transformer.convert_to_graph_documents(batch_docs)
-                
-                # (2) 메타데이터 태깅
-                for g_doc in graph_docs:
-                    for node in g_doc.nodes:
-                        node.properties['source_model'] = model_name
-                        node.properties['source_file'] = filename
-                        
-                        # [수정] 0번 ID도 저장되도록 조건 변경
-                        if experiment_id is not None:
-                            node.properties['experiment_id'] = experiment_id
-                            
-                        if 'name' not in node.properties:
-                            node.properties['name'] = node.id 
-                        
-                        # [FIX] Remove 'id' property if it exists to avoid Neo4j reserved keyword error
-                        if 'id' in node.properties:
-                            del node.properties['id'] 
-
-                    for rel in g_doc.relationships:
-                        rel.properties['source_model'] = model_name
-                        if experiment_id is not None:
-                            rel.properties['experiment_id'] = experiment_id
-                
-                # (3) DB 저장
-                graph.add_graph_documents(graph_docs)
-                print(f"      📦 Batch {i//BATCH_SIZE + 1}/{len(docs)} saved.")
-                
-            except Exception as e:
-                print(f"      ⚠️ Error in batch {i}: {e}")
-            
-            # [핵심 수정] 성공하든 실패하든 무조건 대기 (Rate Limit 방지)
-            # try-except 밖으로 빼서 에러 발생 시 연속 호출 방지
-            finally:
-                print("      ⏳ Waiting 21s...") 
-                time.sleep(21)
+            tokens = sum(estimate_tokens(d.page_content) for d in batch_docs) + TRANSFORMER_TOKEN_OVERHEAD
+            for attempt in range(MAX_BATCH_RETRIES):
+                # 고정 sleep 대신 공유 bucket에서 슬롯을 받을 때까지만 대기
+                limiter.acquire(tokens=tokens)
+                try:
+                    # (1) 그래프 문서 변환
+                    graph_docs = llm_transformer.convert_to_graph_documents(batch_docs)
+
+                    # (2) 메타데이터 태깅
+                    tag_graph_documents(graph_docs, model_name, filename, experiment_id)
+
+                    # (3) DB 저장
+                    graph.add_graph_documents(graph_docs)
+                    print(f"      📦 Batch {i//BATCH_SIZE + 1}/{len(docs)} saved.")
+                    break
+
+                except Exception as e:
+                    if is_rate_limit_error(e) and attempt < MAX_BATCH_RETRIES - 1:
+                        wait_time = (attempt + 1) * 30
+                        print(f"      ⚠️ Rate limit hit. Backing off {wait_time}s ({attempt+1}/{MAX_BATCH_RETRIES})...")
+                        limiter.backoff(wait_time)
+                        continue
+                    print(f"      ⚠️ Error in batch {i}: {e}")
+                    break
 
+    # 새 라벨/관계가 생겼을 수 있으므로 다음 cypher chain 생성 시 스키마 재조회
+    mark_schema_stale()
     print(f"\n🎉 [Success] Graph Ingestion Complete with [{model_name}]!")
 
 # --- 삭제 함수는 기존 유지 ---
-def delete_graph_data(model_name: str):
+def delete_graph_data(model_name: str, on_progress=None):
     print(f"\n🗑️  [Graph Delete] Removing data for model: [{model_name}]")
     try:
-        graph = Neo4jGraph(url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD)
-        query = f"MATCH (n) WHERE n.source_model = '{model_name}' DETACH DELETE n"
-        graph.query(query)
-        print(f"   ✅ Successfully deleted nodes/rels for '{model_name}'")
+        graph = get_graph()
+        deleted = delete_graph_nodes(graph, "n.source_model = $model", {"model": model_name}, on_progress=on_progress)
+        mark_schema_stale()
+        print(f"   ✅ Successfully deleted {deleted} nodes for '{model_name}'")
         return True
     except Exception as e:
         print(f"   ❌ Delete Failed: {e}")
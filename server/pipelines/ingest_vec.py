@@ -1,20 +1,116 @@
 import os
 import sys
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_postgres import PGVector
 
-from server.core.config import DB_CONNECTION, RAW_DATA_DIR
-from server.core.database import engine
-from server.services.embedder import get_bge_m3_embedding
+from server.core.config import RAW_DATA_DIR, INGEST_BATCH_SIZE, INGEST_QUEUE_SIZE, INGEST_WRITE_MODE, INGEST_SPARSE, CHUNK_UNIT
+from server.core.database import engine, disable_statement_timeout
+from server.services.embedding_pool import EmbeddingPool, get_ingest_embeddings
+from server.services.bulk_loader import copy_embeddings
+from server.services.vector_store import ensure_collection_index
+from server.services.binary_quant import backfill_binary_codes
+from server.services.sparse_encoder import encode_dense_sparse, update_sparse
+from server.services.token_chunker import make_splitter
+from server.pipelines.streaming import StreamPipeline
 
-def run_ingest(collection_name: str, chunk_size: int = 1000, overlap: int = 100):
-    print(f"\n🏗️  [Ingest] Vector Ingestion Started | Target: {collection_name} | Chunk: {chunk_size} | Overlap: {overlap}")
-    
-    # 1. Prepare Model
-    embeddings = get_bge_m3_embedding()
+# --- Ingestion Stages (scripts/bench_ingest.py 에서도 개별 측정) ---
+def load_pdf(file_path):
+    """PDF -> page Documents."""
+    return PyMuPDFLoader(file_path).load()
+
+def iter_pages(file_path):
+    """PDF -> page Documents, one page at a time (전체 문서를 메모리에 올리지 않음)."""
+    return PyMuPDFLoader(file_path).lazy_load()
+
+def split_pages(raw_docs, chunk_size, overlap, source=None, unit=CHUNK_UNIT):
+    # Use explicit params (start_index: 검색 시 인접 청크 병합에 사용, unit: char | token)
+    text_splitter = make_splitter(chunk_size, overlap, unit, add_start_index=True)
+    chunks = text_splitter.split_documents(raw_docs)
+    if source:
+        for chunk in chunks:
+            chunk.metadata["source"] = source
+    return chunks
+
+def iter_chunk_batches(paths, chunk_size, overlap, batch_size=INGEST_BATCH_SIZE, unit=CHUNK_UNIT):
+    """Parse + split stage: yields lists of at most `batch_size` chunks across all files."""
+    batch = []
+    for path in paths:
+        filename = os.path.basename(path)
+        print(f"\n📄 [Parsing] Processing {filename}...")
+        count = 0
+        for page in iter_pages(path):
+            # split_documents는 page 단위로 분할하므로 page별 분할 결과는 전체 분할과 동일
+            for chunk in split_pages([page], chunk_size, overlap, source=filename, unit=unit):
+                batch.append(chunk)
+                count += 1
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        print(f"   ✅ {count} Chunks created.")
+    if batch:
+        yield batch
+
+def embed_batch(embeddings, batch, with_sparse=INGEST_SPARSE):
+    """Embed stage: chunk batch -> (texts, vectors, metadatas, sparse weights or None)."""
+    texts = [d.page_content for d in batch]
+    if with_sparse:
+        # dense + sparse lexical weight를 같은 forward pass에서 계산 (추가 임베딩 비용 없음)
+        vectors, sparse = encode_dense_sparse(embeddings, texts)
+    else:
+        vectors, sparse = embeddings.embed_documents(texts), None
+    return texts, vectors, [d.metadata for d in batch], sparse
+
+def save_chunks(vector_store, embedded, mode=INGEST_WRITE_MODE):
+    """Write stage: store precomputed vectors (embedding은 이전 stage에서 완료)."""
+    texts, vectors, metadatas, sparse = embedded
+    if mode == "copy":
+        # batch 당 COPY 한 번 + 트랜잭션 한 번 (PGVector 읽기와 호환되는 행 형식)
+        return copy_embeddings(vector_store.collection_name, texts, vectors, metadatas, sparse=sparse)
+    ids = vector_store.add_embeddings(texts, vectors, metadatas)
+    if sparse:
+        update_sparse(ids, sparse)
+    return len(texts)
+
+def stream_ingest(vector_store, embeddings, paths, chunk_size, overlap, batch_size=INGEST_BATCH_SIZE, queue_size=INGEST_QUEUE_SIZE,
+                  unit=CHUNK_UNIT):
+    """
+    Streaming pipeline: parse/split -> embed -> write, each stage in its own thread
+    with bounded queues in between. CPU embedding overlaps with DB inserts and only
+    a few batches are in memory at a time. Returns (saved_count, pipeline).
+    """
+    saved = 0
+    def write(embedded):
+        nonlocal saved
+        saved += save_chunks(vector_store, embedded)
+        print(f"   📦 {saved} Saved")
+
+    pipeline = StreamPipeline(
+        "parse", iter_chunk_batches(paths, chunk_size, overlap, batch_size, unit),
+        [("embed", lambda batch: embed_batch(embeddings, batch)), ("write", write)],
+        queue_size=queue_size,
+    )
+    pipeline.run()
+    return saved, pipeline
+
+def build_text_index():
+    with engine.connect() as conn:
+        disable_statement_timeout(conn)  # GIN build (대용량 테이블)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS bigm_idx ON langchain_pg_embedding USING GIN (document gin_bigm_ops)"))
+        conn.commit()
+
+def run_ingest(collection_name: str, chunk_size: int = 1000, overlap: int = 100, chunk_unit: str = CHUNK_UNIT):
+    print(f"\n🏗️  [Ingest] Vector Ingestion Started | Target: {collection_name} | Chunk: {chunk_size} {chunk_unit}s | Overlap: {overlap}")
     
+    # 1. Prepare Model (EMBED_WORKERS > 0: 멀티 프로세스 embedding pool)
+    embeddings = get_ingest_embeddings()
+    try:
+        _run_ingest(embeddings, collection_name, chunk_size, overlap, chunk_unit)
+    finally:
+        if isinstance(embeddings, EmbeddingPool):
+            embeddings.close()
+
+def _run_ingest(embeddings, collection_name, chunk_size, overlap, chunk_unit):
     # 2. Check Files
     if not os.path.exists(RAW_DATA_DIR):
         print(f"❌ Error: '{RAW_DATA_DIR}' folder missing.")
@@ -40,46 +136,33 @@ def run_ingest(collection_name: str, chunk_size: int = 1000, overlap: int = 100)
         print(f"   ⚠️ Cleanup Error (Ignorable): {e}")
 
     # 4. Connect PGVector
+    # 공유 engine 주입 (별도 pool 생성 방지, 캐시는 하지 않음: 일회성 ingestion)
     vector_store = PGVector(
         embeddings=embeddings,
         collection_name=collection_name, # Use dynamic collection name
-        connection=DB_CONNECTION,
+        connection=engine,
         use_jsonb=True,
     )
+    ensure_collection_index()
 
-    # 5. Process Files
-    total_docs = []
-    for filename in files:
-        file_path = os.path.join(RAW_DATA_DIR, filename)
-        print(f"\n📄 [Parsing] Processing {filename}...")
-        
-        loader = PyMuPDFLoader(file_path)
-        raw_docs = loader.load()
-        
-        # Use explicit params
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
-        chunks = text_splitter.split_documents(raw_docs)
-        
-        for chunk in chunks:
-            chunk.metadata["source"] = filename
-        
-        total_docs.extend(chunks)
-        print(f"   ✅ {len(chunks)} Chunks created.")
-
-    # 6. Save to DB
-    if total_docs:
-        print(f"\n💾 [DB] Saving {len(total_docs)} documents...")
-        BATCH_SIZE = 100
-        for i in range(0, len(total_docs), BATCH_SIZE):
-            batch = total_docs[i : i + BATCH_SIZE]
-            vector_store.add_documents(batch)
-            print(f"   📦 {min(i + BATCH_SIZE, len(total_docs))}/{len(total_docs)} Saved")
-        
+    # 5. Streaming Pipeline (parse/split -> embed -> write, bounded queue로 메모리 일정 유지)
+    saved, pipeline = stream_ingest(vector_store, embeddings, [os.path.join(RAW_DATA_DIR, f) for f in files], chunk_size, overlap,
+                                    unit=chunk_unit)
+    pipeline.print_report()
+
+    # 6. Text Index
+    if saved:
+        print(f"\n💾 [DB] Saved {saved} documents.")
+        if INGEST_WRITE_MODE != "copy":
+            # COPY 경로는 binary code를 같이 쓰므로 insert 경로만 채움 (2단계 binary 검색용)
+            # 실패해도 저장된 chunk는 유효 (binary 검색은 exact로 대체됨) -> index 생성 / 완료 처리는 계속
+            try:
+                print(f"   🔢 Binary codes written: {backfill_binary_codes(collection_name)}")
+            except Exception as e:
+                print(f"   ⚠️ Binary code backfill failed: {e}")
         # Create Index
         try:
-            with engine.connect() as conn:
-                conn.execute(text("CREATE INDEX IF NOT EXISTS bigm_idx ON langchain_pg_embedding USING GIN (document gin_bigm_ops)"))
-                conn.commit()
+            build_text_index()
             print("   ✅ pg_bigm index created.")
         except: pass
 
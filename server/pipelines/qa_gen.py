@@ -1,16 +1,19 @@
 import os
 import json
-import time
-import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from sqlalchemy import text
 
-from server.core.config import RAW_DATA_DIR, GOOGLE_API_KEY
+from server.core.config import RAW_DATA_DIR, QA_GEN_CONCURRENCY, QA_DEDUPE_THRESHOLD, CHUNK_UNIT
 from server.core.database import engine
 from server.services.embedder import get_bge_m3_embedding
+from server.services.rate_limiter import RateLimiter
+from server.services.llm_factory import get_chat_llm
+from server.services.token_chunker import make_splitter
+from server.services.qa_dedupe import unique_mask, load_answer_embeddings, to_matrix
+from server.services.answer_index import answer_index, bump_answer_version
 
 # --- Prompt Template ---
 def get_prompt_template(count_per_chunk=5):
@@ -42,8 +45,60 @@ def get_prompt_fixed_length(count_per_chunk=5):
     fixed_part = template.replace("{context}", "")
     return len(fixed_part)
 
+# --- Chunk Worker ---
+def generate_chunk_qa(llm, prompt, limiter, cancel_event=None, max_retries=3):
+    """
+    One LLM call (with retry) for a chunk. Runs in a worker thread.
+    Returns the parsed Q&A list, [] on failure, or None if cancelled.
+    """
+    # 공유 rate limiter: 모든 프로세스 합산 RPM/TPM 한도, 429 시 backoff 후 재시도 (취소 시 즉시 반환)
+    try:
+        res = limiter.invoke(llm, [HumanMessage(content=prompt)], retries=max_retries, cancel_event=cancel_event)
+        if res is None:
+            return None
+        clean_json = res.content.replace("```json", "").replace("```", "").strip()
+        return json.loads(clean_json)
+    except Exception as e:
+        print(f"      ⚠️ Error: {e}")
+    return []
+
+# --- Bulk Save ---
+def save_qa_pairs(embeddings, qa_list, existing=None, threshold=QA_DEDUPE_THRESHOLD):
+    """
+    Embed all questions in one batch, drop near-duplicates (within the batch and
+    against `existing` embeddings) and write the rest with a single multi-row INSERT.
+    Returns (saved_count, saved_vectors).
+    """
+    pairs = [(item.get("q"), item.get("a")) for item in qa_list if isinstance(item, dict)]
+    pairs = [(q, a) for q, a in pairs if q and a]
+    if not pairs:
+        return 0, []
+
+    vectors = embeddings.embed_documents([q for q, _ in pairs])
+    keep = unique_mask(vectors, existing, threshold)
+    if not keep.all():
+        print(f"      ♻️ Skipped {int((~keep).sum())} near-duplicate questions")
+    pairs = [p for p, k in zip(pairs, keep) if k]
+    vectors = [v for v, k in zip(vectors, keep) if k]
+    if not pairs:
+        return 0, []
+
+    values, params = [], {}
+    for i, ((q, a), vec) in enumerate(zip(pairs, vectors)):
+        values.append(f"(:q{i}, :a{i}, CAST(:v{i} AS vector))")
+        params.update({f"q{i}": q, f"a{i}": a, f"v{i}": str(vec)})
+
+    with engine.connect() as conn:
+        ids = conn.execute(text(f"INSERT INTO correct_answers (question, answer, embedding) VALUES {', '.join(values)} RETURNING id"), params).scalars().all()
+        version = bump_answer_version(conn)
+        conn.commit()
+    # in-memory 정답 인덱스 즉시 반영 (RETURNING 순서 = VALUES 순서)
+    answer_index.add([(i, a, v) for i, (_, a), v in zip(ids, pairs, vectors)], version)
+    return len(pairs), vectors
+
 # --- Main Generation Function ---
-def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chunk_size=5000, chunk_overlap=500, cancel_event=None):
+def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chunk_size=5000, chunk_overlap=500, cancel_event=None,
+                     concurrency=QA_GEN_CONCURRENCY, chunk_unit=CHUNK_UNIT):
     """
     Chunk-based Q&A generation to cover entire document.
     
@@ -51,9 +106,11 @@ def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chu
         filename: Target PDF file
         model_name: LLM model to use
         count: Total Q&A pairs to generate
-        chunk_size: Characters per chunk (default 5000)
+        chunk_size: Characters (or tokens, see chunk_unit) per chunk (default 5000)
         chunk_overlap: Overlap between chunks (default 500)
+        chunk_unit: "char" or "token" (bge-m3 tokens)
         cancel_event: threading.Event for cancellation signal
+        concurrency: Chunks generated in parallel
     """
     
     # Helper function to check cancellation
@@ -61,7 +118,8 @@ def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chu
         return cancel_event is not None and cancel_event.is_set()
     
     print(f"🤖 [Auto QA] Generating {count} Q&A from PDFs using {model_name}...")
-    print(f"   📊 Chunk Size: {chunk_size} chars | Overlap: {chunk_overlap} chars")
+    print(f"   📊 Chunk Size: {chunk_size} {chunk_unit}s | Overlap: {chunk_overlap} {chunk_unit}s")
+    print(f"   ⚡ Concurrency: {concurrency} | Rate limit: shared '{model_name}' bucket (priority qa_gen)")
     
     # Check cancel at start
     if is_cancelled():
@@ -70,11 +128,10 @@ def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chu
     
     # 1. Prepare Components
     embeddings = get_bge_m3_embedding()
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0.7,
-        google_api_key=GOOGLE_API_KEY
-    )
+    llm = get_chat_llm(model_name, temperature=0.7)
+    limiter = RateLimiter(model_name, "qa_gen")
+    # 기존 정답 임베딩 (새 질문 중복 검사용, 저장할 때마다 누적)
+    known = load_answer_embeddings()
 
     # 2. Check Files
     if filename:
@@ -87,122 +144,84 @@ def generate_bulk_qa(filename=None, model_name="gemini-2.0-flash", count=10, chu
         return
 
     total_added = 0
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
 
-    for fname in target_files:
-        # Check cancel before each file
-        if is_cancelled():
-            print("🛑 [Auto QA] Cancelled by user.")
-            return
-            
-        print(f"\n📄 Processing '{fname}'...")
-        file_path = os.path.join(RAW_DATA_DIR, fname)
-        
-        # Load and split document into chunks
-        loader = PyMuPDFLoader(file_path)
-        docs = loader.load()
-        full_text = "\n".join([d.page_content for d in docs])
-        
-        print(f"   📏 Total document length: {len(full_text):,} chars")
-        
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size, 
-            chunk_overlap=chunk_overlap
-        )
-        chunks = text_splitter.split_text(full_text)
-        
-        print(f"   📦 Split into {len(chunks)} chunks")
-        
-        # Calculate Q&A per chunk
-        qa_per_chunk = max(1, count // len(chunks)) if chunks else count
-        remaining_qa = count
-        
-        print(f"   🎯 Target: ~{qa_per_chunk} Q&A per chunk (Total: {count})")
-        
-        file_qa_count = 0
-        
-        for chunk_idx, chunk in enumerate(chunks):
-            # Check cancel before each chunk
+    try:
+        for fname in target_files:
+            # Check cancel before each file
             if is_cancelled():
                 print("🛑 [Auto QA] Cancelled by user.")
                 return
+                
+            print(f"\n📄 Processing '{fname}'...")
+            file_path = os.path.join(RAW_DATA_DIR, fname)
             
-            # Stop if we've generated enough
-            if file_qa_count >= count:
-                print(f"   ✅ Reached target {count} Q&A pairs.")
-                break
+            # Load and split document into chunks
+            loader = PyMuPDFLoader(file_path)
+            docs = loader.load()
+            full_text = "\n".join([d.page_content for d in docs])
             
-            # Adjust Q&A count for last chunks
-            current_target = min(qa_per_chunk, remaining_qa)
-            if current_target <= 0:
-                break
-                
-            print(f"\n   📝 Chunk {chunk_idx + 1}/{len(chunks)} ({len(chunk):,} chars) - Target: {current_target} Q&A")
+            print(f"   📏 Total document length: {len(full_text):,} chars")
             
-            prompt = get_prompt_template(current_target).replace("{context}", chunk)
+            text_splitter = make_splitter(chunk_size, chunk_overlap, chunk_unit)
+            chunks = text_splitter.split_text(full_text)
             
-            # Rate Limiting Sleep with cancel check (15 seconds)
-            print("      💤 Cooling down (15s)...")
-            for _ in range(15):
-                if is_cancelled():
-                    print("🛑 [Auto QA] Cancelled by user.")
-                    return
-                time.sleep(1)
+            print(f"   📦 Split into {len(chunks)} chunks")
+            
+            # Calculate Q&A per chunk
+            qa_per_chunk = max(1, count // len(chunks)) if chunks else count
             
-            # API Call with Retry
-            qa_list = []
-            max_retries = 3
+            print(f"   🎯 Target: ~{qa_per_chunk} Q&A per chunk (Total: {count})")
             
-            for attempt in range(max_retries):
+            file_qa_count = 0
+            pending = {}  # future -> (chunk_idx, target)
+            next_chunk = 0
+
+            while True:
                 if is_cancelled():
                     print("🛑 [Auto QA] Cancelled by user.")
                     return
-                    
-                try:
-                    msg = [HumanMessage(content=prompt)]
-                    res = llm.invoke(msg).content
-                    
-                    clean_json = res.replace("```json", "").replace("```", "").strip()
-                    qa_list = json.loads(clean_json)
-                    break  # Success
-                    
-                except Exception as e:
-                    if "429" in str(e) or "RESOURCE" in str(e):
-                        wait_time = (attempt + 1) * 30
-                        print(f"      ⚠️ Rate limit hit. Waiting {wait_time}s ({attempt+1}/{max_retries})...")
-                        for _ in range(wait_time):
-                            if is_cancelled():
-                                print("🛑 [Auto QA] Cancelled by user.")
-                                return
-                            time.sleep(1)
-                    else:
-                        print(f"      ⚠️ Error: {e}")
+
+                # 남은 목표치만큼 chunk를 worker에 제출 (동시 실행 수 제한)
+                in_flight = sum(target for _, target in pending.values())
+                while len(pending) < concurrency and next_chunk < len(chunks):
+                    current_target = min(qa_per_chunk, count - file_qa_count - in_flight)
+                    if current_target <= 0:
                         break
-            
-            if not qa_list:
-                print(f"      ❌ Failed to generate for chunk {chunk_idx + 1}")
-                continue
-            
-            # Save to DB
-            with engine.connect() as conn:
-                saved_count = 0
-                for item in qa_list:
-                    q = item.get("q")
-                    a = item.get("a")
-                    if q and a:
-                        vec = embeddings.embed_query(q)
-                        conn.execute(
-                            text("INSERT INTO correct_answers (question, answer, embedding) VALUES (:q, :a, :v)"),
-                            {"q": q, "a": a, "v": str(vec)}
-                        )
-                        saved_count += 1
-                conn.commit()
-                
-            print(f"      ✅ Saved {saved_count} Q&A pairs")
-            file_qa_count += saved_count
-            remaining_qa -= saved_count
-            total_added += saved_count
-        
-        print(f"\n   📊 File '{fname}': {file_qa_count} Q&A pairs generated")
+                    chunk = chunks[next_chunk]
+                    print(f"\n   📝 Chunk {next_chunk + 1}/{len(chunks)} ({len(chunk):,} chars) - Target: {current_target} Q&A")
+                    prompt = get_prompt_template(current_target).replace("{context}", chunk)
+                    future = executor.submit(generate_chunk_qa, llm, prompt, limiter, cancel_event)
+                    pending[future] = (next_chunk, current_target)
+                    in_flight += current_target
+                    next_chunk += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_idx, _ = pending.pop(future)
+                    qa_list = future.result()
+                    if qa_list is None:
+                        continue  # cancelled
+                    if not qa_list:
+                        print(f"      ❌ Failed to generate for chunk {chunk_idx + 1}")
+                        continue
+
+                    # Save to DB (batch embedding + multi-row insert)
+                    saved_count, saved_vectors = save_qa_pairs(embeddings, qa_list, existing=known)
+                    if saved_count:
+                        known = to_matrix(saved_vectors) if known.size == 0 else np.vstack([known, to_matrix(saved_vectors)])
+                    print(f"      ✅ Chunk {chunk_idx + 1}: Saved {saved_count} Q&A pairs")
+                    file_qa_count += saved_count
+                    total_added += saved_count
+
+            if file_qa_count >= count:
+                print(f"   ✅ Reached target {count} Q&A pairs.")
+            print(f"\n   📊 File '{fname}': {file_qa_count} Q&A pairs generated")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
     print(f"\n🎉 Total {total_added} Q&A pairs generated!")
 
@@ -0,0 +1,140 @@
+import time
+import queue
+import threading
+
+# --- Bounded Streaming Pipeline ---
+# source -> stage 1 -> stage 2 ... 를 각각 별도 thread로 돌리고, 사이에 크기 제한 queue를 둔다.
+# 하류 stage가 느리면 queue가 차서 상류가 put에서 멈추므로(backpressure)
+# 메모리에 떠 있는 batch 수는 corpus 크기와 무관하게 (stage 수 + queue 크기) 이내로 유지된다.
+
+_DONE = object()
+POLL_INTERVAL = 0.1  # 다른 stage 오류 확인 주기
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0     # 실제 작업 시간
+        self.starved = 0.0  # 상류 queue가 비어 대기한 시간
+        self.blocked = 0.0  # 하류 queue가 가득 차 대기한 시간 (backpressure)
+
+    def as_dict(self, wall):
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_s": round(self.busy, 3),
+            "starved_s": round(self.starved, 3),
+            "blocked_s": round(self.blocked, 3),
+            "utilization": round(self.busy / wall, 3) if wall > 0 else 0.0,
+        }
+
+
+class StreamPipeline:
+    """
+    Runs `source` (an iterable) and `stages` [(name, fn), ...] concurrently.
+    Each fn receives one item from the previous stage and returns the item for
+    the next one (None drops it); the last stage's return value is discarded.
+    """
+    def __init__(self, source_name, source, stages, queue_size=2):
+        self.source_name = source_name
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+        self.stop_event = threading.Event()
+        self.error = None
+        self.wall = 0.0
+
+    def _stopped(self):
+        return self.stop_event.is_set()
+
+    def _put(self, q, item, stats):
+        start = time.perf_counter()
+        while not self._stopped():
+            try:
+                q.put(item, timeout=POLL_INTERVAL)
+                stats.blocked += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, stats):
+        start = time.perf_counter()
+        while not self._stopped():
+            try:
+                item = q.get(timeout=POLL_INTERVAL)
+                stats.starved += time.perf_counter() - start
+                return item
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, e):
+        if self.error is None:
+            self.error = e
+        self.stop_event.set()
+
+    def _run_source(self):
+        stats, out = self.stats[0], self.queues[0]
+        try:
+            it = iter(self.source)
+            while True:
+                start = time.perf_counter()
+                item = next(it, _DONE)
+                stats.busy += time.perf_counter() - start
+                if item is _DONE or not self._put(out, item, stats):
+                    break
+                stats.items += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out, _DONE, stats)
+
+    def _run_stage(self, idx):
+        _, fn = self.stages[idx]
+        stats = self.stats[idx + 1]
+        src = self.queues[idx]
+        out = self.queues[idx + 1] if idx + 1 < len(self.queues) else None
+        try:
+            while True:
+                item = self._get(src, stats)
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                result = fn(item)
+                stats.busy += time.perf_counter() - start
+                stats.items += 1
+                if out is not None and result is not None and not self._put(out, result, stats):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if out is not None:
+                self._put(out, _DONE, stats)
+
+    def run(self):
+        """Block until every stage drains. Re-raises the first stage error."""
+        threads = [threading.Thread(target=self._run_source, name=f"pipeline-{self.source_name}", daemon=True)]
+        threads += [threading.Thread(target=self._run_stage, args=(i,), name=f"pipeline-{name}", daemon=True)
+                    for i, (name, _) in enumerate(self.stages)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.wall = time.perf_counter() - start
+        if self.error is not None:
+            raise self.error
+        return self.report()
+
+    def report(self):
+        return {"wall_s": round(self.wall, 3), "stages": [s.as_dict(self.wall) for s in self.stats]}
+
+    def print_report(self):
+        print(f"   📈 Stage utilization (wall {self.wall:.2f}s)")
+        for s in self.stats:
+            row = s.as_dict(self.wall)
+            print(f"      {s.name:8} {row['items']:>7} items  busy {row['busy_s']:>8.2f}s ({row['utilization']:>6.1%})"
+                  f"  starved {row['starved_s']:>7.2f}s  blocked {row['blocked_s']:>7.2f}s")
@@ -0,0 +1,118 @@
+import threading
+import numpy as np
+from sqlalchemy import text
+
+from server.core.config import ANSWER_CACHE_THRESHOLD, ANSWER_INDEX_SYNC_INTERVAL
+from server.core.database import engine
+from server.services.qa_dedupe import parse_pgvector, to_matrix
+
+# --- In-Memory Answer Index ---
+# correct_answers 임베딩을 float32 행렬로 메모리에 두고 정답 캐시 확인을
+# DB 왕복 없이 dot product 한 번으로 처리한다.
+# 쓰기 경로는 answer_index_version을 +1 하고 로컬 인덱스를 즉시 갱신하며,
+# 다른 worker는 주기적으로 version을 비교해 달라졌으면 전체를 다시 읽는다.
+
+
+def bump_answer_version(conn) -> int:
+    """Increment the shared version inside the writer's transaction."""
+    return conn.execute(text("UPDATE answer_index_version SET version = version + 1 WHERE id = 1 RETURNING version")).scalar()
+
+
+class AnswerIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.answers = []
+        self.version = None  # None = not loaded (fallback to DB)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    def load(self):
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version FROM answer_index_version WHERE id = 1")).scalar() or 0
+            rows = conn.execute(text("SELECT id, answer, embedding FROM correct_answers WHERE embedding IS NOT NULL ORDER BY id")).fetchall()
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        matrix = to_matrix([parse_pgvector(r[2]) for r in rows]) if rows else np.empty((0, 0), dtype=np.float32)
+        with self.lock:
+            self.ids, self.matrix, self.answers, self.version = ids, matrix, [r[1] for r in rows], version
+        print(f"   📚 [AnswerIndex] Loaded {len(ids)} answers (version {version})")
+
+    def lookup(self, query_vec, threshold=ANSWER_CACHE_THRESHOLD):
+        """Best cached answer with cosine >= threshold, else None."""
+        with self.lock:
+            matrix, answers = self.matrix, self.answers
+        if matrix.size == 0:
+            return None
+        scores = matrix @ to_matrix(query_vec)[0]
+        best = int(np.argmax(scores))
+        return answers[best] if scores[best] >= threshold else None
+
+    # --- In-place updates (writer process) ---
+    # version이 로컬 +1 이면 바로 반영, 그 사이 다른 worker 변경이 있었다면 sync가 재로딩
+    def _apply(self, version, fn):
+        with self.lock:
+            if self.version is not None and version == self.version + 1:
+                fn()
+                self.version = version
+
+    def add(self, rows, version):
+        """rows: [(id, answer, vector), ...]"""
+        if not rows:
+            return
+        def fn():
+            vecs = to_matrix([r[2] for r in rows])
+            self.ids = np.concatenate([self.ids, np.array([r[0] for r in rows], dtype=np.int64)])
+            self.matrix = vecs if self.matrix.size == 0 else np.vstack([self.matrix, vecs])
+            self.answers = self.answers + [r[1] for r in rows]
+        self._apply(version, fn)
+
+    def remove(self, ids, version):
+        def fn():
+            keep = ~np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+            self.ids = self.ids[keep]
+            self.matrix = self.matrix[keep] if self.matrix.size else self.matrix
+            self.answers = [a for a, k in zip(self.answers, keep) if k]
+        self._apply(version, fn)
+
+    def clear(self, version):
+        def fn():
+            self.ids = np.empty(0, dtype=np.int64)
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+            self.answers = []
+        self._apply(version, fn)
+
+    # --- Cross-worker sync ---
+    def sync(self):
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version FROM answer_index_version WHERE id = 1")).scalar() or 0
+        if version != self.version:
+            self.load()
+
+    def start(self):
+        try:
+            self.load()
+        except Exception as e:
+            print(f"   ⚠️ [AnswerIndex] Initial load failed (DB fallback): {e}")
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="answer-index-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        while not self.stop_event.wait(ANSWER_INDEX_SYNC_INTERVAL):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"   ⚠️ [AnswerIndex] Sync failed: {e}")
+
+
+answer_index = AnswerIndex()
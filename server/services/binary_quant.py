@@ -0,0 +1,66 @@
+from sqlalchemy import text
+
+from server.core.config import BQ_BACKFILL_BATCH
+from server.core.database import engine, disable_statement_timeout
+
+# --- Binary-Quantized Embeddings ---
+# langchain_pg_embedding.embedding_bq = bge-m3 벡터의 부호 비트 (bit(1024), pgvector binary_quantize와 동일: x > 0 -> 1).
+# 검색 시 Hamming 거리로 후보를 넉넉히 뽑고, 후보만 float 벡터로 cosine 재계산해 top-k를 고른다.
+# (chat_store.BINARY_SIMILARITY_SQL)
+
+EMBED_DIM = 1024
+
+_column_ready = False
+
+
+def binary_code(vec) -> str:
+    """bit string literal for COPY / CAST(... AS bit(1024))."""
+    return "".join("1" if x > 0 else "0" for x in vec)
+
+
+def ensure_binary_column():
+    """Add embedding_bq once per process (langchain_pg_embedding is created by PGVector, not init_db)."""
+    global _column_ready
+    if _column_ready:
+        return
+    with engine.connect() as conn:
+        conn.execute(text(f"ALTER TABLE IF EXISTS langchain_pg_embedding ADD COLUMN IF NOT EXISTS embedding_bq bit({EMBED_DIM})"))
+        conn.commit()
+    _column_ready = True
+
+
+def backfill_binary_codes(collection_name, batch_size=BQ_BACKFILL_BATCH, on_progress=None) -> int:
+    """
+    Fill missing codes of a collection (insert-mode ingestion, collections created before this column).
+    Keyset batches by id, one transaction per batch (대용량 collection도 짧은 트랜잭션으로 나눠 처리).
+    """
+    ensure_binary_column()
+    with engine.connect() as conn:
+        collection_id = conn.execute(text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": collection_name}).scalar()
+    if collection_id is None:
+        return 0
+
+    updated, after = 0, ""
+    while True:
+        with engine.connect() as conn:
+            disable_statement_timeout(conn)
+            # 마지막 id는 DB collation 기준 max (Python 문자열 비교와 다를 수 있음)
+            count, last_id = conn.execute(text(f"""
+                WITH batch AS (
+                    SELECT id FROM langchain_pg_embedding
+                    WHERE collection_id = :cid AND embedding_bq IS NULL AND id > :after
+                    ORDER BY id LIMIT :limit
+                ), upd AS (
+                    UPDATE langchain_pg_embedding e SET embedding_bq = binary_quantize(e.embedding)::bit({EMBED_DIM})
+                    FROM batch WHERE e.id = batch.id
+                    RETURNING e.id
+                )
+                SELECT (SELECT count(*) FROM upd), (SELECT max(id) FROM batch)
+            """), {"cid": collection_id, "after": after, "limit": batch_size}).one()
+            conn.commit()
+        if last_id is None:
+            return updated
+        updated += count
+        after = last_id
+        if on_progress:
+            on_progress(updated)
@@ -0,0 +1,82 @@
+import io
+import json
+import uuid
+
+from server.core.database import engine
+from server.services.binary_quant import binary_code, ensure_binary_column
+from server.services.sparse_encoder import sparse_literal, ensure_sparse_column
+
+# --- COPY Bulk Loader (langchain_pg_embedding) ---
+# PGVector.add_embeddings는 행마다 파라미터 바인딩된 INSERT를 만든다.
+# 여기서는 batch 전체를 COPY ... FROM STDIN (text format) 한 번으로 밀어 넣는다.
+# 컬럼 / 값 형식(id 문자열, collection uuid, vector 텍스트, JSONB)은 PGVector가 쓰는 것과
+# 동일하므로 similarity_search 등 PGVector 읽기 경로와 그대로 호환된다.
+# 2단계 검색용 binary code(embedding_bq)와 bge-m3 sparse weight(embedding_sparse)도 같은 COPY에서 기록한다.
+# (embedding_sparse는 sparse weight를 계산한 batch(INGEST_SPARSE=1)에서만 포함 -> sparsevec 없는 DB에서도 동작)
+
+COPY_COLUMNS = "id, collection_id, embedding, document, cmetadata, embedding_bq"
+COPY_SQL = f"COPY langchain_pg_embedding ({COPY_COLUMNS}) FROM STDIN"
+COPY_SPARSE_SQL = f"COPY langchain_pg_embedding ({COPY_COLUMNS}, embedding_sparse) FROM STDIN"
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\x00": ""})
+
+
+def _copy_field(value: str) -> str:
+    # COPY text format escaping (NUL은 Postgres text에 저장 불가 -> 제거)
+    return value.translate(_ESCAPES)
+
+
+def _copy_rows(collection_id, texts, vectors, metadatas, ids, sparse=None):
+    buf = io.StringIO()
+    for i, (id_, doc, vec, meta) in enumerate(zip(ids, texts, vectors, metadatas)):
+        fields = [
+            _copy_field(id_),
+            str(collection_id),
+            "[" + ",".join(map(str, vec)) + "]",
+            _copy_field(doc),
+            _copy_field(json.dumps(meta or {}, ensure_ascii=False).replace("\\u0000", "")),
+            binary_code(vec),
+        ]
+        if sparse is not None:
+            fields.append(sparse_literal(sparse[i]) if sparse[i] is not None else "\\N")
+        buf.write("\t".join(fields))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+def copy_embeddings(collection_name, texts, vectors, metadatas=None, ids=None, sparse=None) -> int:
+    """
+    Write one batch of precomputed embeddings with COPY, in a single transaction.
+    The collection must already exist (PGVector creates it on construction).
+    """
+    if not texts:
+        return 0
+    metadatas = metadatas or [{} for _ in texts]
+    ids = ids or [str(uuid.uuid4()) for _ in texts]
+    ensure_binary_column()
+    if sparse is not None:
+        ensure_sparse_column()
+    copy_sql = COPY_SPARSE_SQL if sparse is not None else COPY_SQL
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("SELECT uuid FROM langchain_pg_collection WHERE name = %s", (collection_name,))
+        row = cur.fetchone()
+        if row is None:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        data = _copy_rows(row[0], texts, vectors, metadatas, ids, sparse)
+        if hasattr(cur, "copy_expert"):  # psycopg2
+            cur.copy_expert(copy_sql, data)
+        else:  # psycopg 3
+            with cur.copy(copy_sql) as copy:
+                copy.write(data.getvalue())
+        raw.commit()
+        cur.close()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return len(texts)
@@ -0,0 +1,194 @@
+import time
+from typing import List, Optional
+from sqlalchemy import select, text
+from langchain_core.documents import Document
+
+from server.core.async_database import AsyncSessionLocal, async_engine
+from server.core.config import VECTOR_SEARCH_MODE, BQ_CANDIDATES, HYBRID_CANDIDATES, HYBRID_DENSE_WEIGHT, HYBRID_SPARSE_WEIGHT
+from server.core.database import Persona, Experiment
+from server.services.sparse_encoder import sparse_literal
+
+# --- Async Data Access (chat hot path) ---
+# chat_endpoint가 실행하는 조회를 asyncio-native로 수행한다.
+# (persona / 최신 실험 / 정답 캐시 / pgvector 유사도 검색)
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+# langchain_postgres PGVector(cosine) 테이블을 직접 조회
+SIMILARITY_SQL = text("""
+    SELECT e.id, e.document, e.cmetadata, e.embedding <=> CAST(:vec AS vector) AS distance
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = :collection
+    ORDER BY distance
+    LIMIT :k
+""")
+
+# 2단계 검색: bit(1024) Hamming 거리(<~>)로 후보 :candidates개 -> float 벡터 cosine으로 top :k 재정렬
+# (float 벡터는 TOAST 되어 행마다 읽기 비용이 크고, binary code는 행 안에 128 bytes로 저장됨)
+BINARY_SIMILARITY_SQL = text("""
+    WITH candidates AS (
+        SELECT e.id
+        FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+        WHERE c.name = :collection AND e.embedding_bq IS NOT NULL
+        ORDER BY e.embedding_bq <~> binary_quantize(CAST(:vec AS vector))::bit(1024)
+        LIMIT :candidates
+    )
+    SELECT e.id, e.document, e.cmetadata, e.embedding <=> CAST(:vec AS vector) AS distance
+    FROM langchain_pg_embedding e
+    JOIN candidates USING (id)
+    ORDER BY distance
+    LIMIT :k
+""")
+
+# Dense + sparse hybrid: 각 방식의 상위 :candidates개를 합친 뒤
+# score = w_dense * cosine + w_sparse * lexical(sparse 내적, <#>는 음의 내적) 로 top :k
+HYBRID_SPARSE_SQL = text("""
+    WITH coll AS (
+        SELECT uuid FROM langchain_pg_collection WHERE name = :collection
+    ), dense AS (
+        SELECT e.id FROM langchain_pg_embedding e JOIN coll ON e.collection_id = coll.uuid
+        ORDER BY e.embedding <=> CAST(:vec AS vector)
+        LIMIT :candidates
+    ), lexical AS (
+        SELECT e.id FROM langchain_pg_embedding e JOIN coll ON e.collection_id = coll.uuid
+        WHERE e.embedding_sparse IS NOT NULL
+        ORDER BY e.embedding_sparse <#> CAST(:sparse AS sparsevec)
+        LIMIT :candidates
+    ), candidates AS (
+        SELECT id FROM dense UNION SELECT id FROM lexical
+    )
+    SELECT e.id, e.document, e.cmetadata, e.embedding <=> CAST(:vec AS vector) AS distance,
+           :w_dense * (1 - (e.embedding <=> CAST(:vec AS vector)))
+           + :w_sparse * COALESCE(-(e.embedding_sparse <#> CAST(:sparse AS sparsevec)), 0) AS score
+    FROM langchain_pg_embedding e
+    JOIN candidates USING (id)
+    ORDER BY score DESC
+    LIMIT :k
+""")
+
+# binary code가 비어 있는 행이 있으면 (이 변경 이전 collection / insert 경로 backfill 전) 후보에서 누락되므로 exact로 대체
+BQ_MISSING_SQL = text("""
+    SELECT EXISTS (
+        SELECT 1 FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+        WHERE c.name = :collection AND e.embedding_bq IS NULL
+    )
+""")
+BQ_RECHECK_SECONDS = 60  # ingestion 중인 collection은 상태가 바뀌므로 주기적으로 재확인
+
+_bq_ready = {}  # collection -> (ready, checked_at)
+
+CORRECT_ANSWER_SQL = text("""
+    SELECT answer, 1 - (embedding <=> CAST(:vec AS vector)) AS score
+    FROM correct_answers
+    ORDER BY embedding <=> CAST(:vec AS vector)
+    LIMIT 1
+""")
+
+
+def _vec_literal(vec) -> str:
+    return "[" + ",".join(map(str, vec)) + "]"
+
+
+def _live(query):
+    return query.where(Experiment.status.is_distinct_from("deleting"))
+
+
+async def get_active_system_prompt() -> str:
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(select(Persona.system_prompt).where(Persona.active == True).limit(1))
+        prompt = res.scalar_one_or_none()
+    return prompt or DEFAULT_SYSTEM_PROMPT
+
+
+async def get_latest_experiment(rag_type: str) -> Optional[Experiment]:
+    async with AsyncSessionLocal() as session:
+        res = await session.execute(
+            _live(select(Experiment).where(Experiment.rag_type == rag_type)).order_by(Experiment.created_at.desc()).limit(1)
+        )
+        return res.scalars().first()
+
+
+async def retrieval_data_state():
+    """
+    (data version, {experiment id: rag_type} of experiments still being written) — 모든 worker 공통, DB 상태 기준.
+    version은 ingest·삭제마다 증가하며 응답 캐시 key에 들어간다.
+    """
+    async with AsyncSessionLocal() as session:
+        version = (await session.execute(text("SELECT version FROM retrieval_data_version WHERE id = 1"))).scalar()
+        res = await session.execute(select(Experiment.id, Experiment.rag_type).where(Experiment.status == "ingesting"))
+        return version, {row[0]: row[1] for row in res.all()}
+
+
+async def resolve_graph_experiment(graph_source: Optional[str]) -> Optional[int]:
+    """
+    Map ChatReq.graph_source to a graph experiment id.
+    - numeric id: that experiment
+    - "all": no scope (every experiment)
+    - None / "latest" / unknown value: latest graph experiment
+    """
+    if graph_source == "all":
+        return None
+    if graph_source and str(graph_source).isdigit():
+        async with AsyncSessionLocal() as session:
+            res = await session.execute(
+                _live(select(Experiment.id).where(Experiment.id == int(graph_source), Experiment.rag_type == "graph"))
+            )
+            exp_id = res.scalar_one_or_none()
+        if exp_id is not None:
+            return exp_id
+    latest = await get_latest_experiment("graph")
+    return latest.id if latest else None
+
+
+async def lookup_correct_answer(query_vec, threshold=0.92) -> Optional[str]:
+    async with async_engine.connect() as conn:
+        row = (await conn.execute(CORRECT_ANSWER_SQL, {"vec": _vec_literal(query_vec)})).fetchone()
+    if row and row[1] is not None and row[1] >= threshold:
+        return row[0]
+    return None
+
+
+def similarity_params(collection_name, query_vec, k, mode=VECTOR_SEARCH_MODE, candidates=None, query_sparse=None):
+    """(sql, params) for exact, binary-quantized + rescored, or dense + sparse hybrid search."""
+    params = {"vec": _vec_literal(query_vec), "collection": collection_name, "k": k}
+    if mode == "binary":
+        return BINARY_SIMILARITY_SQL, {**params, "candidates": max(candidates or BQ_CANDIDATES, k)}
+    if mode == "hybrid_sparse" and query_sparse is not None:
+        return HYBRID_SPARSE_SQL, {**params, "candidates": max(candidates or HYBRID_CANDIDATES, k), "sparse": sparse_literal(query_sparse),
+                                   "w_dense": HYBRID_DENSE_WEIGHT, "w_sparse": HYBRID_SPARSE_WEIGHT}
+    return SIMILARITY_SQL, params
+
+
+async def binary_codes_ready(collection_name: str) -> bool:
+    """True when every chunk of the collection has embedding_bq (cached for BQ_RECHECK_SECONDS)."""
+    cached = _bq_ready.get(collection_name)
+    if cached and time.monotonic() - cached[1] < BQ_RECHECK_SECONDS:
+        return cached[0]
+    try:
+        async with async_engine.connect() as conn:
+            ready = not (await conn.execute(BQ_MISSING_SQL, {"collection": collection_name})).scalar()
+    except Exception as e:  # embedding_bq 컬럼 자체가 없는 DB
+        print(f"⚠️ [Search] Binary code check failed for '{collection_name}': {e}")
+        ready = False
+    if not ready and (cached is None or cached[0]):
+        print(f"⚠️ [Search] '{collection_name}' has chunks without binary codes -> exact search "
+              f"(run scripts/bench_vector_search.py --backfill --collection {collection_name})")
+    _bq_ready[collection_name] = (ready, time.monotonic())
+    return ready
+
+
+async def similarity_search(collection_name: str, query_vec, k: int = 10, mode: str = VECTOR_SEARCH_MODE, query_sparse=None) -> List[Document]:
+    if mode == "binary" and not await binary_codes_ready(collection_name):
+        mode = "exact"
+    sql, params = similarity_params(collection_name, query_vec, k, mode, query_sparse=query_sparse)
+    async with async_engine.connect() as conn:
+        rows = (await conn.execute(sql, params)).fetchall()
+    # chunk id / score는 metadata로 전달 (SSE sources 이벤트): cosine, hybrid면 dense + sparse 합산 점수
+    return [
+        Document(page_content=row[1], metadata={**(row[2] or {}), "id": row[0],
+                                                "score": round(float(row[4]) if len(row) > 4 else 1 - float(row[3]), 4)})
+        for row in rows
+    ]
@@ -0,0 +1,157 @@
+import re
+import math
+from server.core.config import CONTEXT_TOKEN_BUDGET
+from server.services.embedder import get_bge_m3_tokenizer
+
+# 문장 경계: 종결 부호 뒤 공백 또는 줄바꿈
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。！？])[ \t]+|\n+")
+# chunk_overlap으로 생긴 중복으로 인정할 최소 길이 (우연한 일치 방지)
+MIN_OVERLAP_CHARS = 20
+
+
+def _overlap_length(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    if len(right) < MIN_OVERLAP_CHARS:
+        return 0
+    probe = right[:MIN_OVERLAP_CHARS]
+    pos = left.find(probe, max(0, len(left) - len(right)))
+    while pos != -1:
+        tail = left[pos:]
+        if right.startswith(tail):
+            return len(tail)
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+def _merge_blocks(docs):
+    """(best_rank, text) blocks of merged chunks, ordered by best rank."""
+    groups = {}
+    for rank, doc in enumerate(docs):
+        meta = doc.metadata or {}
+        key = (meta.get("source"), meta.get("page"))
+        groups.setdefault(key, []).append((meta.get("start_index"), rank, doc.page_content))
+
+    blocks = []
+    for items in groups.values():
+        # start_index(ingest 시 기록)가 있으면 위치 기준, 없으면 검색 순위 기준 정렬
+        items.sort(key=lambda x: (x[0] is None, x[0] if x[0] is not None else x[1]))
+        start, best_rank, text = items[0]
+        end = start + len(text) if start is not None else None
+        for pos, rank, content in items[1:]:
+            if end is not None and pos is not None:
+                overlap = max(0, end - pos) if pos <= end else -1
+            elif content in text:
+                overlap = len(content)
+            else:
+                overlap = _overlap_length(text, content) or -1
+
+            if overlap >= 0:
+                # 겹치는 구간은 한 번만 유지
+                text += content[overlap:]
+                best_rank = min(best_rank, rank)
+                if end is not None and pos is not None:
+                    end = max(end, pos + len(content))
+            else:
+                blocks.append((best_rank, text))
+                text, best_rank = content, rank
+                end = pos + len(content) if pos is not None else None
+        blocks.append((best_rank, text))
+
+    blocks.sort(key=lambda x: x[0])
+    return blocks
+
+
+def merge_adjacent_chunks(docs):
+    """
+    Merge retrieved chunks that come from the same source and overlap.
+    Returns a list of text blocks ordered by the best rank of their chunks.
+    """
+    return [text for _, text in _merge_blocks(docs)]
+
+
+def split_sentences(text: str):
+    """
+    [(sentence, separator), ...] where separator is the original text that followed the sentence
+    (줄바꿈 / 목록 들여쓰기 / 표 행 구조를 재조립 시 그대로 유지).
+    """
+    parts, pos = [], 0
+    for m in _SENTENCE_SPLIT.finditer(text):
+        seg = text[pos:m.start()]
+        if seg.strip():
+            parts.append([seg, m.group()])
+        elif parts:
+            parts[-1][1] += seg + m.group()
+        pos = m.end()
+    if text[pos:].strip():
+        parts.append([text[pos:], ""])
+    return [tuple(p) for p in parts]
+
+
+def _lexical_scores(query_ids, sentence_ids):
+    """IDF-weighted token overlap with the query (IDF over the candidate sentences), scaled to [0, 1]."""
+    query = set(query_ids)
+    if not query:
+        return [0.0] * len(sentence_ids)
+    sets = [set(ids) & query for ids in sentence_ids]
+    df = {}
+    for shared in sets:
+        for t in shared:
+            df[t] = df.get(t, 0) + 1
+    n = len(sentence_ids)
+    idf = {t: math.log(1 + n / c) for t, c in df.items()}
+    raw = [sum(idf[t] for t in shared) for shared in sets]
+    top = max(raw) or 1.0
+    return [r / top for r in raw]
+
+
+def build_vector_context(query: str, docs, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Assemble the vector context for the final prompt.
+    1. Merge adjacent/overlapping chunks of the same source.
+    2. If the result exceeds `token_budget` (bge-m3 tokenizer), rank sentences by
+       query token overlap + the retrieval score of their chunk (임베딩 호출 없음)
+       and keep the best ones in document order, with their original separators.
+    """
+    if not docs:
+        return ""
+
+    blocks = _merge_blocks(docs)
+
+    # (block_idx, sentence, separator) 목록과 토큰 수를 배치로 계산
+    sentences = []
+    for b_idx, (_, block) in enumerate(blocks):
+        for sent, sep in split_sentences(block):
+            sentences.append((b_idx, sent, sep))
+    if not sentences:
+        return ""
+
+    tokenizer = get_bge_m3_tokenizer()
+    sentence_ids = tokenizer([s for _, s, _ in sentences], add_special_tokens=False)["input_ids"]
+    token_counts = [len(ids) for ids in sentence_ids]
+    total_tokens = sum(token_counts)
+
+    if total_tokens <= token_budget:
+        selected = set(range(len(sentences)))
+    else:
+        # 예산 초과 시: tokenizer 결과만으로 순위 (lexical overlap + 해당 chunk의 검색 점수)
+        query_ids = tokenizer([query], add_special_tokens=False)["input_ids"][0]
+        lexical = _lexical_scores(query_ids, sentence_ids)
+        block_score = [float((docs[rank].metadata or {}).get("score") or 0.0) for rank, _ in blocks]
+        scores = [lexical[i] + block_score[sentences[i][0]] for i in range(len(sentences))]
+        order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+
+        selected, used = set(), 0
+        for i in order:
+            if used + token_counts[i] > token_budget:
+                continue
+            selected.add(i)
+            used += token_counts[i]
+
+    parts = {}
+    for i in sorted(selected):
+        b_idx, sent, sep = sentences[i]
+        parts.setdefault(b_idx, []).append(sent + sep)
+
+    used_tokens = sum(token_counts[i] for i in selected)
+    print(f"✂️ [Context] {len(docs)} chunks -> {len(blocks)} blocks | {total_tokens} -> {used_tokens} tokens (budget {token_budget})")
+    return "\n\n".join("".join(parts[b]).rstrip() for b in sorted(parts))
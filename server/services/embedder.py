@@ -1,7 +1,16 @@
 import torch
+from functools import lru_cache
+from transformers import AutoTokenizer
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from server.core.config import EMBEDDING_BACKEND
+
 def get_bge_m3_embedding():
+    if EMBEDDING_BACKEND == "fake":
+        from server.services.fake_backends import FakeEmbeddings
+        print("   🧪 [Model] Fake embeddings (EMBEDDING_BACKEND=fake)", flush=True)
+        return FakeEmbeddings(size=1024)
+
     # 1. 장치 확인 (GPU 우선)
     device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"   🚀 [Model] BAAI/bge-m3 로드 중... (Device: {device.upper()})", flush=True)
@@ -14,3 +23,11 @@ def get_bge_m3_embedding():
         encode_kwargs={'normalize_embeddings': True} 
     )
     return embeddings
+
+@lru_cache(maxsize=1)
+def get_bge_m3_tokenizer():
+    # 토큰 수 계산 전용 (Rust fast tokenizer, 모델 가중치는 로드하지 않음)
+    if EMBEDDING_BACKEND == "fake":
+        from server.services.fake_backends import FakeTokenizer
+        return FakeTokenizer()
+    return AutoTokenizer.from_pretrained("BAAI/bge-m3", use_fast=True)
@@ -0,0 +1,169 @@
+import os
+import sys
+import queue
+import threading
+import subprocess
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+from server.core.config import project_root, EMBED_WORKERS, EMBED_WORKER_THREADS, EMBED_SHARD_SIZE, EMBED_MAX_RETRIES
+from server.services.embedding_worker import read_frame, write_frame
+
+# --- Multi-process Embedding Pool ---
+# 한 프로세스의 torch는 thread 경합 / tokenization GIL 때문에 코어 수만큼 확장되지 않는다.
+# batch를 shard로 나눠 N개의 worker 프로세스(각자 모델 1회 로드, thread 수 고정)에 분배하고
+# 결과는 입력 순서대로 합친다. worker가 죽으면 새로 띄워 해당 shard를 재시도한다.
+# worker는 `python -m server.services.embedding_worker`로 실행 (multiprocessing spawn과 달리
+# server/main.py를 다시 import 하지 않음).
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+class _Worker:
+    def __init__(self, threads):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in (project_root, os.environ.get("PYTHONPATH")) if p))
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "server.services.embedding_worker", "--threads", str(threads)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=project_root, env=env,
+        )
+        ready = read_frame(self.proc.stdout)
+        if not ready or ready[0] != "ready":
+            self.close()
+            raise WorkerCrashed(f"worker failed to start (exit code {self.proc.poll()})")
+
+    def embed(self, texts, with_sparse=False):
+        try:
+            write_frame(self.proc.stdin, (texts, with_sparse))
+            res = read_frame(self.proc.stdout)
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashed(str(e))
+        if res is None:
+            raise WorkerCrashed(f"worker exited (code {self.proc.wait()})")
+        status, payload = res
+        if status != "ok":
+            raise RuntimeError(f"Embedding worker error: {payload}")
+        return payload
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=10)
+        except Exception:
+            self.proc.kill()
+
+
+class EmbeddingPool(Embeddings):
+    """
+    Embeddings implementation that shards embed_documents() across worker processes.
+    Use as a context manager (or call close()) to stop the workers.
+    """
+    def __init__(self, workers=EMBED_WORKERS, threads=EMBED_WORKER_THREADS, shard_size=EMBED_SHARD_SIZE, max_retries=EMBED_MAX_RETRIES):
+        self.n_workers = max(1, workers)
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.n_workers)
+        self.shard_size = max(1, shard_size)
+        self.max_retries = max_retries
+        self.workers = [None] * self.n_workers
+        self.lock = threading.Lock()
+        self.restarts = 0
+
+    def start(self):
+        # 모델 로드는 worker마다 병렬로 진행
+        def boot(i):
+            self.workers[i] = _Worker(self.threads)
+        threads = [threading.Thread(target=boot, args=(i,)) for i in range(self.n_workers) if self.workers[i] is None]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if any(w is None for w in self.workers):
+            self.close()
+            raise RuntimeError("Embedding pool failed to start")
+        print(f"   🧵 [EmbeddingPool] {self.n_workers} workers x {self.threads} threads ready")
+        return self
+
+    def _shards(self, texts):
+        # worker 수에 맞춰 고르게 나누되 shard_size를 넘지 않게
+        size = min(self.shard_size, max(1, -(-len(texts) // self.n_workers)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    def _serve(self, idx, tasks, results, errors, with_sparse):
+        while not errors:
+            try:
+                shard_idx, texts, attempt = tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[shard_idx] = self.workers[idx].embed(texts, with_sparse)
+            except WorkerCrashed as e:
+                print(f"   ⚠️ [EmbeddingPool] Worker {idx} crashed on shard {shard_idx} ({e}), restarting...")
+                self.workers[idx].close()
+                self.restarts += 1
+                if attempt >= self.max_retries:
+                    errors.append(RuntimeError(f"Shard {shard_idx} failed after {attempt + 1} attempts: {e}"))
+                try:
+                    self.workers[idx] = _Worker(self.threads)
+                except WorkerCrashed as restart_error:
+                    errors.append(restart_error)
+                    return
+                if attempt < self.max_retries:
+                    tasks.put((shard_idx, texts, attempt + 1))
+            except Exception as e:
+                errors.append(e)
+
+    def _run(self, texts, with_sparse):
+        with self.lock:
+            if any(w is None for w in self.workers):
+                self.start()
+            shards = self._shards(texts)
+            tasks = queue.Queue()
+            for i, shard in enumerate(shards):
+                tasks.put((i, shard, 0))
+            results, errors = [None] * len(shards), []
+            threads = [threading.Thread(target=self._serve, args=(i, tasks, results, errors, with_sparse)) for i in range(self.n_workers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            if errors:
+                raise errors[0]
+        return results
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return [row.tolist() for matrix in self._run(texts, False) for row in matrix]
+
+    def embed_with_sparse(self, texts: List[str]):
+        """Dense vectors + bge-m3 sparse weights from the same forward pass (sparse_encoder)."""
+        if not texts:
+            return [], []
+        results = self._run(texts, True)
+        return [row.tolist() for matrix, _ in results for row in matrix], [w for _, sparse in results for w in sparse]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        for i, w in enumerate(self.workers):
+            if w is not None:
+                w.close()
+                self.workers[i] = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_ingest_embeddings():
+    """
+    EmbeddingPool when EMBED_WORKERS > 0 (workers start on the first batch; caller
+    closes it), else the in-process bge-m3 model.
+    """
+    if EMBED_WORKERS > 0:
+        return EmbeddingPool()
+    from server.services.embedder import get_bge_m3_embedding
+    return get_bge_m3_embedding()
@@ -0,0 +1,75 @@
+"""
+Embedding worker process (started by services/embedding_pool.py).
+
+    python -m server.services.embedding_worker --threads 4
+
+Loads bge-m3 once with a pinned torch thread count, then answers framed
+requests on stdin/stdout: request = (texts, with_sparse), response =
+("ok", float32 matrix) / ("ok", (float32 matrix, sparse weights)) or
+("error", message). EOF on stdin shuts the worker down.
+"""
+import os
+import sys
+import pickle
+import struct
+import argparse
+
+_HEADER = struct.Struct(">I")
+
+
+def read_frame(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return pickle.loads(stream.read(size))
+
+
+def write_frame(stream, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    # torch import 전에 thread 수 고정 (worker끼리 코어 경합 방지)
+    os.environ["OMP_NUM_THREADS"] = str(args.threads)
+    os.environ["MKL_NUM_THREADS"] = str(args.threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    # stdout은 프로토콜 전용: 원래 fd를 복제해 두고, print / C 라이브러리 출력은 stderr로 보냄
+    out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    inp = sys.stdin.buffer
+
+    import torch
+    import numpy as np
+    torch.set_num_threads(args.threads)
+    from server.services.embedder import get_bge_m3_embedding
+    from server.services.sparse_encoder import encode_dense_sparse
+    model = get_bge_m3_embedding()
+    write_frame(out, ("ready", os.getpid()))
+
+    while True:
+        request = read_frame(inp)
+        if request is None:
+            break
+        texts, with_sparse = request
+        try:
+            if with_sparse:
+                dense, sparse = encode_dense_sparse(model, texts)
+                write_frame(out, ("ok", (np.asarray(dense, dtype=np.float32), sparse)))
+            else:
+                write_frame(out, ("ok", np.asarray(model.embed_documents(texts), dtype=np.float32)))
+        except Exception as e:
+            write_frame(out, ("error", f"{type(e).__name__}: {e}"))
+
+
+if __name__ == "__main__":
+    main()
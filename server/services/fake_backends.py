@@ -0,0 +1,113 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from server.core.config import FAKE_LLM_TTFT_MS, FAKE_LLM_TOKEN_MS, FAKE_LLM_TOKENS
+
+# --- Fake Backends (LLM_BACKEND=fake / EMBEDDING_BACKEND=fake) ---
+# 부하 테스트·벤치마크를 오프라인으로 돌리기 위한 결정적(deterministic) 대체 구현.
+# 지연 시간(TTFT, 토큰 간격)은 config로 조절해 실제 스트리밍 패턴을 흉내 낸다.
+
+FAKE_CYPHER = "MATCH path = (n)-[r]-(m) WHERE n.experiment_id = $experiment_id AND m.experiment_id = $experiment_id RETURN path LIMIT 5"
+
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def fake_response(prompt: str, n_tokens: int = FAKE_LLM_TOKENS) -> str:
+    # qa_gen prompt -> JSON Q&A list
+    if "pairs of Question and Answer" in prompt:
+        m = re.search(r"generate (\d+) pairs", prompt)
+        count = int(m.group(1)) if m else 3
+        seed = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8]
+        return json.dumps([{"q": f"가상 질문 {seed}-{i}?", "a": f"가상 답변 {seed}-{i}."} for i in range(count)], ensure_ascii=False)
+    # Cypher generation prompt -> 범위가 지정된 안전한 조회
+    if "Cypher Query:" in prompt:
+        return FAKE_CYPHER
+    return " ".join(f"토큰{i}" for i in range(n_tokens))
+
+
+class FakeChatModel(BaseChatModel):
+    """Streaming chat model with configurable time-to-first-token and inter-token delay."""
+    model_name: str = "fake"
+    ttft_ms: float = FAKE_LLM_TTFT_MS
+    token_ms: float = FAKE_LLM_TOKEN_MS
+    n_tokens: int = FAKE_LLM_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self, messages):
+        prompt = _prompt_text(messages)
+        text = fake_response(prompt, self.n_tokens)
+        tokens = [t + " " for t in text.split(" ")]
+        tokens[-1] = tokens[-1].rstrip()
+        usage = {"input_tokens": len(prompt) // 3, "output_tokens": len(tokens), "total_tokens": len(prompt) // 3 + len(tokens)}
+        return tokens, usage
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        tokens, usage = self._tokens(messages)
+        time.sleep((self.ttft_ms + self.token_ms * len(tokens)) / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens), usage_metadata=usage))])
+
+    def _stream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        tokens, usage = self._tokens(messages)
+        time.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage if i == len(tokens) - 1 else None))
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        tokens, usage = self._tokens(messages)
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage if i == len(tokens) - 1 else None))
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic, L2-normalized hash embeddings (same text -> same vector)."""
+    def __init__(self, size: int = 1024):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vec = np.random.default_rng(seed).standard_normal(self.size).astype(np.float32)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_with_sparse(self, texts: List[str]):
+        """Dense vectors + hashed whitespace-token weights (sparse_encoder.encode_dense_sparse shape)."""
+        from server.services.sparse_encoder import SPARSE_DIM
+        sparse = []
+        for t in texts:
+            tokens = t.split()
+            sparse.append({int(hashlib.md5(tok.encode("utf-8")).hexdigest(), 16) % SPARSE_DIM: 1.0 / len(tokens) ** 0.5
+                           for tok in tokens})
+        return self.embed_documents(texts), sparse
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with the `tokenizer(texts)["input_ids"]` call shape of HF tokenizers."""
+    def __call__(self, texts, add_special_tokens=False, **kwargs):
+        if isinstance(texts, str):
+            return {"input_ids": list(range(len(texts.split())))}
+        return {"input_ids": [list(range(len(t.split()))) for t in texts]}
@@ -0,0 +1,58 @@
+import time
+import threading
+from langchain_neo4j import Neo4jGraph
+
+from server.core.config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, NEO4J_MAX_POOL_SIZE, NEO4J_ACQUIRE_TIMEOUT
+
+# --- Shared Neo4j Client ---
+# 프로세스당 Neo4jGraph(= driver + connection pool) 하나를 공유한다.
+# 스키마 조회(APOC introspection)는 생성 시 하지 않고, ingestion이 그래프를
+# 변경했을 때만 다시 읽어 cypher chain들이 캐시된 스키마 문자열을 재사용한다.
+
+# 다른 worker 프로세스의 ingestion은 stale 표시를 받지 못하므로 TTL로 보완
+SCHEMA_TTL = 600  # seconds
+
+_graph = None
+_schema_stale = True
+_schema_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def get_graph() -> Neo4jGraph:
+    """Process-wide Neo4jGraph with a pooled driver. Raises if Neo4j is unreachable."""
+    global _graph
+    if _graph is None:
+        with _lock:
+            if _graph is None:
+                _graph = Neo4jGraph(
+                    url=NEO4J_URI,
+                    username=NEO4J_USERNAME,
+                    password=NEO4J_PASSWORD,
+                    refresh_schema=False,
+                    driver_config={
+                        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+                        "connection_acquisition_timeout": NEO4J_ACQUIRE_TIMEOUT,
+                    },
+                )
+                print(f"   ✅ [Graph] Shared Neo4j driver created (pool size: {NEO4J_MAX_POOL_SIZE})")
+    return _graph
+
+
+def ensure_graph_schema() -> Neo4jGraph:
+    """Return the shared graph with an up-to-date cached schema (refreshed only when marked stale)."""
+    global _schema_stale, _schema_loaded_at
+    graph = get_graph()
+    if _schema_stale or time.time() - _schema_loaded_at > SCHEMA_TTL:
+        with _lock:
+            if _schema_stale or time.time() - _schema_loaded_at > SCHEMA_TTL:
+                graph.refresh_schema()
+                _schema_stale = False
+                _schema_loaded_at = time.time()
+                print("   🔄 [Graph] Schema cache refreshed.")
+    return graph
+
+
+def mark_schema_stale():
+    """Call after the graph structure changed (ingestion / reset)."""
+    global _schema_stale
+    _schema_stale = True
@@ -0,0 +1,47 @@
+import re
+from server.core.config import GRAPH_NODE_LABELS
+
+# 모든 그래프 조회/통계/삭제가 필터링하는 속성
+INDEXED_PROPERTIES = ["experiment_id", "source_model", "source_file", "name"]
+FULLTEXT_INDEX = "entity_name_fulltext"
+
+# Lucene 특수문자 (full-text 질의 시 escape)
+_LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+def label_expr(labels=GRAPH_NODE_LABELS) -> str:
+    """Label disjunction for MATCH clauses, e.g. `Product|Feature|...` (lets the planner use per-label indexes)."""
+    return "|".join(f"`{label}`" for label in labels)
+
+
+ENTITY = label_expr()
+
+
+def ensure_graph_indexes(graph, labels=GRAPH_NODE_LABELS):
+    """
+    Create range indexes on the filter properties for every schema label,
+    plus a full-text index on `name`. Idempotent (IF NOT EXISTS).
+    """
+    created = 0
+    for label in labels:
+        for prop in INDEXED_PROPERTIES:
+            try:
+                graph.query(f"CREATE INDEX idx_{label.lower()}_{prop} IF NOT EXISTS FOR (n:`{label}`) ON (n.{prop})")
+                created += 1
+            except Exception as e:
+                print(f"   ⚠️ [Graph] Index creation failed ({label}.{prop}): {e}")
+    try:
+        graph.query(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS FOR (n:{label_expr(labels)}) ON EACH [n.name]")
+    except Exception as e:
+        print(f"   ⚠️ [Graph] Full-text index creation failed: {e}")
+    print(f"   ✅ [Graph] Indexes ensured ({created} range + full-text '{FULLTEXT_INDEX}').")
+
+
+def fulltext_query(keywords) -> str:
+    """Build an escaped Lucene query (OR of the keywords) for db.index.fulltext.queryNodes."""
+    terms = []
+    for kw in keywords:
+        kw = _LUCENE_SPECIAL.sub(r"\\\1", kw.strip())
+        if kw:
+            terms.append(f'"{kw}"' if " " in kw else kw)
+    return " OR ".join(terms)
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Optional
+from langchain_neo4j.graphs.graph_store import GraphStore
+
+SCOPE_PARAM = "experiment_id"
+
+
+class ScopedGraph(GraphStore):
+    """
+    Read-only view of a graph restricted to one experiment.
+    Every query receives `$experiment_id` as a parameter; generated Cypher that
+    does not reference it is rejected instead of silently scanning all experiments.
+    """
+
+    def __init__(self, graph, experiment_id: Optional[int]):
+        self._graph = graph
+        self.experiment_id = experiment_id
+
+    @property
+    def get_schema(self) -> str:
+        return self._graph.get_schema
+
+    @property
+    def get_structured_schema(self) -> Dict[str, Any]:
+        return self._graph.get_structured_schema
+
+    def query(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
+        if self.experiment_id is None:
+            return self._graph.query(query, params)
+        if f"${SCOPE_PARAM}" not in query:
+            raise ValueError(f"Generated Cypher is not scoped by ${SCOPE_PARAM}: {query}")
+        return self._graph.query(query, {**params, SCOPE_PARAM: self.experiment_id})
+
+    def refresh_schema(self) -> None:
+        self._graph.refresh_schema()
+
+    def add_graph_documents(self, graph_documents, include_source: bool = False) -> None:
+        raise PermissionError("ScopedGraph is read-only")
@@ -0,0 +1,238 @@
+import re
+import time
+import threading
+from server.services.graph_indexes import ENTITY
+
+# --- Template Cypher Fast Path ---
+# 질문에서 엔티티 키워드를 뽑아 실험별 노드 이름 사전과 매칭하고,
+# 미리 정의된 파라미터화 Cypher 템플릿으로 바로 조회한다 (LLM Cypher 생성 생략).
+
+NAME_CACHE_TTL = 300  # seconds
+MAX_NAMES_PER_KEYWORD = 20
+MAX_NGRAM = 4
+
+# 한국어 조사 (긴 것부터 제거)
+_JOSA = sorted([
+    "에서는", "으로는", "에게서", "이랑", "에서", "에게", "한테", "으로", "까지", "부터", "이나", "처럼",
+    "의", "은", "는", "이", "가", "을", "를", "에", "로", "와", "과", "도", "만", "나", "랑",
+], key=len, reverse=True)
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣][0-9A-Za-z가-힣\-_.]*")
+
+CONSTRAINT_HINTS = ("제약", "조건", "요건", "요구", "필요", "필수", "constraint", "condition", "requirement", "require")
+
+# n.name 조건은 라벨별 range index(idx_<label>_name)로 조회됨
+# {scope}: 실험 범위 조건 ($experiment_id 파라미터, 문자열 포매팅으로 값을 넣지 않음)
+NEIGHBORS_CYPHER = f"""
+MATCH (n:{ENTITY})-[r]-(m)
+WHERE n.name IN $names {{scope}}
+RETURN n.name AS source, type(r) AS rel, m.name AS target
+LIMIT $limit
+"""
+
+CONSTRAINTS_CYPHER = f"""
+MATCH (n:{ENTITY})-[r:REQUIRES|HAS_CONSTRAINT|HAS_CONDITION]-(m)
+WHERE n.name IN $names {{scope}}
+RETURN n.name AS source, type(r) AS rel, m.name AS target
+LIMIT $limit
+"""
+
+PATH_CYPHER = f"""
+MATCH (start:{ENTITY}) WHERE start.name IN $start_names {{start_scope}}
+MATCH (end:{ENTITY}) WHERE end.name IN $end_names {{end_scope}}
+MATCH path = (start)-[*1..3]-(end)
+WHERE {{path_scope}}
+RETURN [x IN nodes(path) | x.name] AS nodes, [x IN relationships(path) | type(x)] AS rels
+LIMIT $limit
+"""
+
+SCOPED_TEMPLATES = {
+    "neighbors": NEIGHBORS_CYPHER.format(scope="AND n.experiment_id = $experiment_id AND m.experiment_id = $experiment_id"),
+    "constraints": CONSTRAINTS_CYPHER.format(scope="AND n.experiment_id = $experiment_id AND m.experiment_id = $experiment_id"),
+    "path": PATH_CYPHER.format(
+        start_scope="AND start.experiment_id = $experiment_id",
+        end_scope="AND end.experiment_id = $experiment_id",
+        path_scope="all(x IN nodes(path) WHERE x.experiment_id = $experiment_id)",
+    ),
+}
+UNSCOPED_TEMPLATES = {
+    "neighbors": NEIGHBORS_CYPHER.format(scope=""),
+    "constraints": CONSTRAINTS_CYPHER.format(scope=""),
+    "path": PATH_CYPHER.format(start_scope="", end_scope="", path_scope="true"),
+}
+
+
+def _strip_josa(word: str) -> str:
+    for josa in _JOSA:
+        if word.endswith(josa) and len(word) - len(josa) >= 2:
+            return word[: -len(josa)]
+    return word
+
+
+def tokenize_question(question: str):
+    return [_strip_josa(w) for w in _WORD_RE.findall(question.lower())]
+
+
+class NodeNameIndex:
+    """In-memory dictionary of node names per experiment (lowercased name -> names, word -> names)."""
+
+    def __init__(self, ttl=NAME_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, graph, experiment_id=None):
+        key = experiment_id if experiment_id is not None else "all"
+        entry = self._entries.get(key)
+        if entry and time.time() - entry["loaded_at"] < self.ttl:
+            return entry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry["loaded_at"] < self.ttl:
+                return entry
+            entry = self._load(graph, experiment_id)
+            self._entries[key] = entry
+            return entry
+
+    def invalidate(self, experiment_id=None):
+        with self._lock:
+            if experiment_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(experiment_id, None)
+                self._entries.pop("all", None)
+
+    def _load(self, graph, experiment_id):
+        if experiment_id is None:
+            rows = graph.query(f"MATCH (n:{ENTITY}) WHERE n.name IS NOT NULL RETURN DISTINCT n.name AS name")
+        else:
+            rows = graph.query(
+                f"MATCH (n:{ENTITY}) WHERE n.experiment_id = $experiment_id AND n.name IS NOT NULL RETURN DISTINCT n.name AS name",
+                {"experiment_id": experiment_id},
+            )
+        by_lower, by_word = {}, {}
+        for row in rows:
+            name = row["name"]
+            if not isinstance(name, str):
+                continue
+            lower = name.lower().strip()
+            by_lower.setdefault(lower, set()).add(name)
+            for word in _WORD_RE.findall(lower):
+                if len(word) >= 2:
+                    by_word.setdefault(word, set()).add(name)
+        print(f"   📚 [Graph] Node name dictionary loaded (exp: {experiment_id if experiment_id is not None else 'all'}, {len(by_lower)} names)")
+        return {"loaded_at": time.time(), "by_lower": by_lower, "by_word": by_word}
+
+
+class GraphRouteMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"template": 0, "llm": 0}
+        self.latency = {"template": 0.0, "llm": 0.0}
+
+    def record(self, route, elapsed):
+        with self._lock:
+            self.counts[route] += 1
+            self.latency[route] += elapsed
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                "total": total,
+                "template": self.counts["template"],
+                "llm": self.counts["llm"],
+                "fast_path_ratio": round(self.counts["template"] / total, 4) if total else 0.0,
+                "avg_latency_ms": {
+                    route: round(self.latency[route] / self.counts[route] * 1000, 1) if self.counts[route] else None
+                    for route in self.counts
+                },
+            }
+
+
+node_name_index = NodeNameIndex()
+route_metrics = GraphRouteMetrics()
+
+
+def match_entities(question, index_entry):
+    """
+    Returns a list of name groups, one per matched keyword.
+    Exact node names (word n-grams of the question) win over partial word matches.
+    """
+    words = tokenize_question(question)
+    by_lower, by_word = index_entry["by_lower"], index_entry["by_word"]
+    groups, used = [], set()
+
+    # 1) 질문의 n-gram이 노드 이름과 정확히 일치
+    for n in range(min(MAX_NGRAM, len(words)), 0, -1):
+        for i in range(len(words) - n + 1):
+            if any(j in used for j in range(i, i + n)):
+                continue
+            phrase = " ".join(words[i : i + n])
+            if len(phrase) >= 2 and phrase in by_lower:
+                groups.append(sorted(by_lower[phrase]))
+                used.update(range(i, i + n))
+
+    # 2) 남은 단어가 노드 이름의 일부 단어와 일치
+    for i, word in enumerate(words):
+        if i in used or len(word) < 2:
+            continue
+        names = by_word.get(word)
+        if names:
+            groups.append(sorted(names)[:MAX_NAMES_PER_KEYWORD])
+            used.add(i)
+    return groups
+
+
+def _format_triples(rows):
+    lines = []
+    for r in rows:
+        line = f"({r['source']}) -[{r['rel']}]- ({r['target']})"
+        if line not in lines:
+            lines.append(line)
+    return lines
+
+
+def _format_paths(rows):
+    lines = []
+    for r in rows:
+        nodes, rels = r["nodes"], r["rels"]
+        parts = [f"({nodes[0]})"]
+        for rel, node in zip(rels, nodes[1:]):
+            parts.append(f"-[{rel}]- ({node})")
+        line = " ".join(parts)
+        if line not in lines:
+            lines.append(line)
+    return lines
+
+
+def template_graph_context(graph, question, experiment_id=None, limit=50):
+    """
+    Fast path: returns graph context text, or None when no template applies
+    (caller falls back to the LLM Cypher generator).
+    experiment_id=None searches every experiment.
+    """
+    groups = match_entities(question, node_name_index.get(graph, experiment_id))
+    if not groups:
+        return None
+
+    all_names = sorted({name for g in groups for name in g})
+    lines = []
+    lowered = question.lower()
+    templates = UNSCOPED_TEMPLATES if experiment_id is None else SCOPED_TEMPLATES
+    scope = {} if experiment_id is None else {"experiment_id": experiment_id}
+
+    if len(groups) >= 2:
+        rows = graph.query(templates["path"], {"start_names": groups[0], "end_names": groups[1], "limit": 20, **scope})
+        lines += [l for l in _format_paths(rows) if l not in lines]
+
+    if any(hint in lowered for hint in CONSTRAINT_HINTS):
+        rows = graph.query(templates["constraints"], {"names": all_names, "limit": 20, **scope})
+        lines += [l for l in _format_triples(rows) if l not in lines]
+
+    rows = graph.query(templates["neighbors"], {"names": all_names, "limit": limit, **scope})
+    lines += [l for l in _format_triples(rows) if l not in lines]
+
+    if not lines:
+        return None
+    print(f"⚡ [Graph] Template fast path: {len(groups)} entities, {len(lines)} facts")
+    return "\n".join(lines)
@@ -0,0 +1,12 @@
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from server.core.config import GOOGLE_API_KEY, LLM_BACKEND
+
+# 모든 chat LLM 생성은 여기서 (LLM_BACKEND=fake 이면 오프라인 가짜 모델)
+
+
+def get_chat_llm(model_name="gemini-2.0-flash", temperature=0):
+    if LLM_BACKEND == "fake":
+        from server.services.fake_backends import FakeChatModel
+        return FakeChatModel(model_name=model_name)
+    return ChatGoogleGenerativeAI(model=model_name, temperature=temperature, google_api_key=GOOGLE_API_KEY)
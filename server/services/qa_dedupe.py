@@ -0,0 +1,83 @@
+import numpy as np
+from sqlalchemy import text
+
+from server.core.config import QA_DEDUPE_THRESHOLD
+from server.core.database import engine
+
+# --- Near-Duplicate Filtering (golden Q&A) ---
+# 질문 임베딩(정규화된 bge-m3)끼리 행렬곱으로 cosine 유사도를 한 번에 계산한다.
+# 먼저 들어온 항목을 남기고, threshold 이상으로 유사한 이후 항목은 버린다.
+
+BLOCK_SIZE = 1024  # n x n 행렬 대신 block 단위로 계산 (메모리 제한)
+
+
+def to_matrix(vectors) -> np.ndarray:
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def parse_pgvector(value) -> np.ndarray:
+    """pgvector text form '[0.1,0.2,...]' -> float32 array."""
+    if isinstance(value, str):
+        return np.fromstring(value.strip("[]"), sep=",", dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def unique_mask(vectors, existing=None, threshold=QA_DEDUPE_THRESHOLD) -> np.ndarray:
+    """
+    Boolean mask of rows to keep: rows too similar to `existing` or to an
+    earlier kept row are dropped. Vectorized per block of BLOCK_SIZE rows.
+    """
+    mat = to_matrix(vectors)
+    if mat.size == 0:
+        return np.zeros(0, dtype=bool)
+    kept = to_matrix(existing) if existing is not None and len(existing) else np.empty((0, mat.shape[1]), dtype=np.float32)
+    keep = np.zeros(len(mat), dtype=bool)
+
+    for start in range(0, len(mat), BLOCK_SIZE):
+        block = mat[start:start + BLOCK_SIZE]
+        drop = np.zeros(len(block), dtype=bool)
+        if len(kept):
+            drop |= (block @ kept.T).max(axis=1) >= threshold
+        sims = block @ block.T
+        for i in range(len(block)):
+            if not drop[i]:
+                drop[i + 1:] |= sims[i, i + 1:] >= threshold
+        keep[start:start + len(block)] = ~drop
+        kept = np.vstack([kept, block[~drop]])
+    return keep
+
+
+def load_answer_embeddings() -> np.ndarray:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT embedding FROM correct_answers WHERE embedding IS NOT NULL")).fetchall()
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    return to_matrix([parse_pgvector(r[0]) for r in rows])
+
+
+def dedupe_correct_answers(threshold=QA_DEDUPE_THRESHOLD, dry_run=False):
+    """Bulk cleanup: keep the oldest of each near-duplicate group, delete the rest."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, embedding FROM correct_answers WHERE embedding IS NOT NULL ORDER BY id")).fetchall()
+    if not rows:
+        return {"total": 0, "duplicates": 0, "deleted": 0}
+
+    ids = np.array([r[0] for r in rows])
+    keep = unique_mask([parse_pgvector(r[1]) for r in rows], threshold=threshold)
+    dup_ids = ids[~keep].tolist()
+
+    deleted = 0
+    if dup_ids and not dry_run:
+        from server.services.answer_index import answer_index, bump_answer_version
+        with engine.connect() as conn:
+            deleted = conn.execute(text("DELETE FROM correct_answers WHERE id = ANY(:ids)"), {"ids": dup_ids}).rowcount
+            version = bump_answer_version(conn)
+            conn.commit()
+        answer_index.remove(dup_ids, version)
+    print(f"🧹 [Dedupe] {len(rows)} answers, {len(dup_ids)} near-duplicates (>= {threshold}), deleted {deleted}")
+    return {"total": len(rows), "duplicates": len(dup_ids), "deleted": deleted}
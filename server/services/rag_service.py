@@ -1,11 +1,11 @@
-from langchain_postgres import PGVector
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.graphs import Neo4jGraph
-from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
+from langchain_neo4j import GraphCypherQAChain
 from sqlalchemy import text
-from server.core.config import DB_CONNECTION, COLLECTION_NAME, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GOOGLE_API_KEY
+from server.core.config import COLLECTION_NAME, GOOGLE_API_KEY
 from server.core.database import engine
 from server.services.embedder import get_bge_m3_embedding
+from server.services.vector_store import get_vector_store
+from server.services.graph_client import ensure_graph_schema
 
 # 1. Initialize Components
 print("🚀 [Service] Initializing RAG components...")
@@ -14,12 +14,7 @@ print("🚀 [Service] Initializing RAG components...")
 embeddings = get_bge_m3_embedding()
 
 # Vector Store
-vector_store = PGVector(
-    embeddings=embeddings,
-    collection_name=COLLECTION_NAME,
-    connection=DB_CONNECTION,
-    use_jsonb=True,
-)
+vector_store = get_vector_store(embeddings, COLLECTION_NAME)
 
 # LLMs
 llm_flash = ChatGoogleGenerativeAI(
@@ -40,11 +35,8 @@ graph_chain_flash = None
 graph_chain_pro = None
 
 try:
-    graph = Neo4jGraph(
-        url=NEO4J_URI,
-        username=NEO4J_USERNAME,
-        password=NEO4J_PASSWORD
-    )
+    # 공유 driver 재사용 (main / pipelines와 같은 connection pool)
+    graph = ensure_graph_schema()
     graph_chain_flash = GraphCypherQAChain.from_llm(
         llm=llm_flash,
         graph=graph,
@@ -0,0 +1,281 @@
+import time
+import atexit
+import threading
+from collections import defaultdict
+from sqlalchemy import text
+
+from server.core.config import (
+    LLM_BACKEND, LLM_DEFAULT_RPM, LLM_DEFAULT_TPM, LLM_RATE_LIMITS, LLM_PRIORITY_RESERVE,
+    LLM_CHAT_RATE_LIMIT, LLM_CHAT_MAX_WAIT, LLM_STATS_FLUSH_INTERVAL,
+)
+from server.core.database import engine
+
+# --- Shared LLM Rate Limiter ---
+# 모델별 RPM / TPM token bucket을 Postgres(llm_rate_buckets) 한 행에 두고
+# SELECT ... FOR UPDATE로 모든 worker 프로세스 / 백그라운드 작업이 같은 한도를 나눠 쓴다.
+# 우선순위가 낮은 작업(ingestion < qa_gen < evaluation < chat)은 bucket의 일정 비율을
+# 남겨둔 상태에서만 토큰을 받으므로, 대량 작업 중에도 chat 요청이 굶지 않는다.
+# chat은 명시적으로 설정한 경우에만 bucket을 쓰고(LLM_CHAT_RATE_LIMIT / LLM_RATE_LIMITS), 최대 LLM_CHAT_MAX_WAIT초만 기다린다.
+# 사용 통계(llm_rate_stats)는 프로세스 내에서 모았다가 백그라운드 thread가 주기적으로 기록한다.
+
+PRIORITIES = ("chat", "evaluation", "qa_gen", "ingestion")
+MAX_WAIT_STEP = 5.0  # 한 번에 기다리는 최대 시간 (취소 / 다른 프로세스 반납 재확인)
+
+BUCKET_INIT_SQL = text("""
+    INSERT INTO llm_rate_buckets (model_name, request_tokens, token_tokens, updated_at)
+    VALUES (:model, :rpm, :tpm, extract(epoch from clock_timestamp()))
+    ON CONFLICT (model_name) DO NOTHING
+""")
+
+BUCKET_LOCK_SQL = text("""
+    SELECT request_tokens, token_tokens, updated_at, extract(epoch from clock_timestamp())
+    FROM llm_rate_buckets WHERE model_name = :model FOR UPDATE
+""")
+
+BUCKET_UPDATE_SQL = text("""
+    UPDATE llm_rate_buckets SET request_tokens = :req, token_tokens = :tok, updated_at = :now
+    WHERE model_name = :model
+""")
+
+STATS_UPSERT_SQL = text("""
+    INSERT INTO llm_rate_stats (model_name, priority, requests, tokens, throttled, wait_seconds)
+    VALUES (:model, :priority, :requests, :tokens, :throttled, :wait)
+    ON CONFLICT (model_name, priority) DO UPDATE SET
+        requests = llm_rate_stats.requests + EXCLUDED.requests,
+        tokens = llm_rate_stats.tokens + EXCLUDED.tokens,
+        throttled = llm_rate_stats.throttled + EXCLUDED.throttled,
+        wait_seconds = llm_rate_stats.wait_seconds + EXCLUDED.wait_seconds
+""")
+
+
+def model_limits(model_name):
+    """(rpm, tpm) for a model: LLM_RATE_LIMITS override, else the defaults."""
+    override = LLM_RATE_LIMITS.get(model_name, {})
+    return float(override.get("rpm", LLM_DEFAULT_RPM)), float(override.get("tpm", LLM_DEFAULT_TPM))
+
+
+def is_rate_limit_error(e):
+    msg = str(e)
+    return "429" in msg or "RESOURCE_EXHAUSTED" in msg
+
+
+def estimate_tokens(prompt):
+    """Rough prompt size (~4 chars/token) used to reserve TPM before the call."""
+    if isinstance(prompt, (list, tuple)):
+        prompt = " ".join(str(getattr(m, "content", m)) for m in prompt)
+    return max(1, len(str(prompt)) // 4)
+
+
+def _refill(row, rpm, tpm):
+    req, tok, updated_at, now = (float(v) for v in row)
+    elapsed = max(0.0, now - updated_at)
+    return min(rpm, req + elapsed * rpm / 60.0), min(tpm, tok + elapsed * tpm / 60.0), now
+
+
+def _try_acquire(model_name, priority, tokens):
+    """
+    One attempt on the shared bucket. Returns 0.0 when granted, otherwise the
+    seconds until enough capacity (above this priority's reserve) refills.
+    """
+    rpm, tpm = model_limits(model_name)
+    reserve = LLM_PRIORITY_RESERVE.get(priority, max(LLM_PRIORITY_RESERVE.values()))
+    # TPM 한도보다 큰 프롬프트가 영원히 대기하지 않도록 상한
+    tokens = min(tokens, tpm * (1 - reserve))
+    with engine.connect() as conn:
+        conn.execute(BUCKET_INIT_SQL, {"model": model_name, "rpm": rpm, "tpm": tpm})
+        req, tok, now = _refill(conn.execute(BUCKET_LOCK_SQL, {"model": model_name}).fetchone(), rpm, tpm)
+        req_floor, tok_floor = rpm * reserve, tpm * reserve
+        if req - 1 >= req_floor and tok - tokens >= tok_floor:
+            req, tok, wait = req - 1, tok - tokens, 0.0
+        else:
+            wait = max((req_floor + 1 - req) * 60.0 / rpm, (tok_floor + tokens - tok) * 60.0 / tpm, 0.05)
+        conn.execute(BUCKET_UPDATE_SQL, {"model": model_name, "req": req, "tok": tok, "now": now})
+        conn.commit()
+    return wait
+
+
+class RateLimitTimeout(Exception):
+    """The shared bucket did not grant capacity within the caller's max wait."""
+
+
+class _StatsBuffer:
+    """In-process llm_rate_stats deltas, flushed by a daemon thread (요청 경로에서 DB 쓰기 없음)."""
+    def __init__(self, interval=LLM_STATS_FLUSH_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = defaultdict(lambda: [0, 0, 0, 0.0])  # (model, priority) -> requests, tokens, throttled, wait
+        self.thread = None
+
+    def add(self, model_name, priority, requests=0, tokens=0, throttled=0, wait=0.0):
+        with self.lock:
+            acc = self.pending[(model_name, priority)]
+            acc[0] += requests
+            acc[1] += int(tokens)
+            acc[2] += throttled
+            acc[3] += wait
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="rate-limit-stats", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(lambda: [0, 0, 0, 0.0])
+        if not pending:
+            return
+        try:
+            with engine.connect() as conn:
+                conn.execute(STATS_UPSERT_SQL, [
+                    {"model": m, "priority": p, "requests": r, "tokens": t, "throttled": th, "wait": w}
+                    for (m, p), (r, t, th, w) in pending.items()
+                ])
+                conn.commit()
+        except Exception as e:
+            print(f"   ⚠️ [RateLimiter] Stats update failed: {e}")
+
+
+_stats = _StatsBuffer()
+atexit.register(_stats.flush)
+
+
+def _record(model_name, priority, requests=0, tokens=0, throttled=0, wait=0.0):
+    _stats.add(model_name, priority, requests, tokens, throttled, wait)
+
+
+class RateLimiter:
+    """
+    Per-(model, priority) handle on the cross-process token bucket.
+    Used by chat, ingestion, Q&A generation and evaluation for every Gemini call.
+    """
+    def __init__(self, model_name, priority="chat"):
+        self.model_name = model_name
+        self.priority = priority if priority in PRIORITIES else "ingestion"
+        self.enabled = LLM_BACKEND != "fake"
+        if self.priority == "chat":
+            self.enabled = self.enabled and (LLM_CHAT_RATE_LIMIT or model_name in LLM_RATE_LIMITS)
+        # chat은 사용자가 기다리므로 최대 대기 시간을 둠 (None: 무기한, 배치 작업)
+        self.max_wait = LLM_CHAT_MAX_WAIT if self.priority == "chat" else None
+
+    def acquire(self, cancel_event=None, tokens=1):
+        """
+        Block until the bucket grants one request + `tokens`. Returns False if cancelled while waiting.
+        Raises RateLimitTimeout when the wait would exceed max_wait.
+        """
+        if not self.enabled:
+            return cancel_event is None or not cancel_event.is_set()
+        waited, throttled = 0.0, 0
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            try:
+                wait = _try_acquire(self.model_name, self.priority, tokens)
+            except Exception as e:
+                # DB 장애 시 LLM 호출 자체를 막지 않는다 (fail-open)
+                print(f"   ⚠️ [RateLimiter] Bucket unavailable, proceeding without limit: {e}")
+                return True
+            if wait <= 0:
+                _record(self.model_name, self.priority, requests=1, tokens=tokens, throttled=throttled, wait=waited)
+                return True
+            throttled = 1
+            if self.max_wait is not None and waited + wait > self.max_wait:
+                _record(self.model_name, self.priority, throttled=1, wait=waited)
+                raise RateLimitTimeout(f"Rate limit for {self.model_name}: no capacity within {self.max_wait:.0f}s")
+            step = min(wait, MAX_WAIT_STEP)
+            waited += step
+            if cancel_event is not None:
+                if cancel_event.wait(step):
+                    return False
+            else:
+                time.sleep(step)
+
+    def backoff(self, seconds):
+        """After a 429, drain the shared bucket so every process pauses ~`seconds`."""
+        if not self.enabled:
+            return
+        rpm, tpm = model_limits(self.model_name)
+        try:
+            with engine.connect() as conn:
+                conn.execute(BUCKET_INIT_SQL, {"model": self.model_name, "rpm": rpm, "tpm": tpm})
+                _, tok, now = _refill(conn.execute(BUCKET_LOCK_SQL, {"model": self.model_name}).fetchone(), rpm, tpm)
+                # request bucket을 음수로 내려 refill에 `seconds`가 걸리도록 함
+                conn.execute(BUCKET_UPDATE_SQL, {"model": self.model_name, "req": -seconds * rpm / 60.0, "tok": tok, "now": now})
+                conn.commit()
+        except Exception as e:
+            print(f"   ⚠️ [RateLimiter] Backoff failed: {e}")
+
+    def reconcile(self, estimated, actual):
+        """Charge (or refund) the difference between the reserved and the reported token count."""
+        if not self.enabled or not actual:
+            return
+        diff = float(actual) - float(estimated)
+        if abs(diff) < 1:
+            return
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("""
+                    UPDATE llm_rate_buckets SET token_tokens = LEAST(:tpm, token_tokens - :diff)
+                    WHERE model_name = :model
+                """), {"model": self.model_name, "tpm": model_limits(self.model_name)[1], "diff": diff})
+                conn.commit()
+            _record(self.model_name, self.priority, tokens=diff)
+        except Exception as e:
+            print(f"   ⚠️ [RateLimiter] Reconcile failed: {e}")
+
+    def invoke(self, llm, prompt, retries=3, cancel_event=None):
+        """
+        llm.invoke() under the shared limit, with 429 backoff.
+        Returns the response, or None if cancelled while waiting. Re-raises other errors.
+        """
+        estimated = estimate_tokens(prompt)
+        for attempt in range(retries):
+            if not self.acquire(cancel_event, tokens=estimated):
+                return None
+            try:
+                res = llm.invoke(prompt)
+            except Exception as e:
+                if is_rate_limit_error(e) and attempt < retries - 1:
+                    wait_time = (attempt + 1) * 30
+                    print(f"      ⚠️ [{self.priority}] Rate limit hit ({self.model_name}). Backing off {wait_time}s ({attempt+1}/{retries})...")
+                    self.backoff(wait_time)
+                    continue
+                raise
+            usage = getattr(res, "usage_metadata", None) or {}
+            self.reconcile(estimated, usage.get("total_tokens"))
+            return res
+
+
+def get_rate_limit_stats():
+    """Bucket levels and per-priority usage for every model seen so far."""
+    _stats.flush()  # 이 프로세스의 미기록 통계 포함
+    with engine.connect() as conn:
+        buckets = conn.execute(text("""
+            SELECT model_name, request_tokens, token_tokens, updated_at, extract(epoch from clock_timestamp())
+            FROM llm_rate_buckets ORDER BY model_name
+        """)).fetchall()
+        stats = conn.execute(text("""
+            SELECT model_name, priority, requests, tokens, throttled, wait_seconds
+            FROM llm_rate_stats ORDER BY model_name, priority
+        """)).fetchall()
+
+    result = {}
+    for name, *row in buckets:
+        rpm, tpm = model_limits(name)
+        req, tok, _ = _refill(row, rpm, tpm)
+        result[name] = {
+            "rpm": rpm, "tpm": tpm,
+            "available_requests": round(req, 2), "available_tokens": int(tok),
+            "request_utilization": round(1 - max(req, 0) / rpm, 3) if rpm else 0.0,
+            "token_utilization": round(1 - max(tok, 0) / tpm, 3) if tpm else 0.0,
+            "priorities": {},
+        }
+    for name, priority, requests, tokens, throttled, wait in stats:
+        entry = result.setdefault(name, {"priorities": {}})
+        entry["priorities"][priority] = {
+            "requests": requests, "tokens": tokens, "throttled": throttled,
+            "avg_wait": round(wait / requests, 3) if requests else 0.0,
+        }
+    return result
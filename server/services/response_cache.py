@@ -0,0 +1,110 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import text
+
+from server.core.config import RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES
+
+# --- Semantic Response Cache ---
+# 같은 (model, rag_type, 실험 범위, persona) 안에서 질문 임베딩이 충분히 가까우면
+# retrieval / Cypher 생성 / LLM 생성을 건너뛰고 저장된 답변을 재생한다.
+# 실험 id와 persona가 key에 포함되므로 재-ingestion(새 실험)·삭제·persona 변경 시
+# 다른 worker에서도 자연히 miss가 나고, 명시적 invalidate는 메모리를 즉시 비운다.
+# 실험 id가 바뀌지 않는 변경(graph 범위 "all", 다른 실험의 ingest/삭제)은 DB의
+# retrieval_data_version을 key에 넣어 처리한다: ingest·삭제가 version을 올리면
+# 모든 worker의 기존 entry가 miss가 되고 TTL/LRU로 정리된다.
+
+
+def persona_fingerprint(system_prompt: str) -> str:
+    return hashlib.sha1((system_prompt or "").encode("utf-8")).hexdigest()[:12]
+
+
+def make_cache_key(model, rag_type, vector_experiment_id, graph_experiment_id, system_prompt, data_version=None):
+    return (model, rag_type, vector_experiment_id, graph_experiment_id, persona_fingerprint(system_prompt), data_version)
+
+
+def bump_data_version(conn) -> int:
+    """Increment the shared retrieval data version inside the writer's transaction."""
+    return conn.execute(text("UPDATE retrieval_data_version SET version = version + 1 WHERE id = 1 RETURNING version")).scalar()
+
+
+class ResponseCache:
+    def __init__(self, threshold=RESPONSE_CACHE_THRESHOLD, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # entry_id -> (key, vector, response, created_at), LRU 순서
+        self.by_key = {}              # key -> set(entry_id)
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, entry_id):
+        key = self.entries.pop(entry_id)[0]
+        ids = self.by_key.get(key)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self.by_key[key]
+
+    def get(self, key, query_vec):
+        """Return (response, score) of the closest fresh entry above the threshold, else None."""
+        now = time.time()
+        with self.lock:
+            ids = [i for i in self.by_key.get(key, ()) if now - self.entries[i][3] <= self.ttl]
+            for i in set(self.by_key.get(key, ())) - set(ids):
+                self._remove(i)
+            if not ids:
+                self.misses += 1
+                return None
+            scores = np.stack([self.entries[i][1] for i in ids]) @ np.asarray(query_vec, dtype=np.float32)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            entry_id = ids[best]
+            self.entries.move_to_end(entry_id)
+            self.hits += 1
+            return self.entries[entry_id][2], float(scores[best])
+
+    def put(self, key, query_vec, response):
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = (key, np.asarray(query_vec, dtype=np.float32), response, time.time())
+            self.by_key.setdefault(key, set()).add(entry_id)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, experiment_id=None):
+        """Drop entries scoped to `experiment_id` (vector or graph), or everything if None."""
+        with self.lock:
+            if experiment_id is None:
+                count = len(self.entries)
+                self.entries.clear()
+                self.by_key.clear()
+            else:
+                stale = [i for i, e in self.entries.items() if experiment_id in (e[0][2], e[0][3])]
+                for i in stale:
+                    self._remove(i)
+                count = len(stale)
+        if count:
+            print(f"   🧹 [ResponseCache] Invalidated {count} entries" + (f" (experiment {experiment_id})" if experiment_id is not None else ""))
+
+    def snapshot(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+            }
+
+
+response_cache = ResponseCache()
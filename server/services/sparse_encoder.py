@@ -0,0 +1,87 @@
+from functools import lru_cache
+from sqlalchemy import text
+
+from server.core.database import engine
+
+# --- bge-m3 Sparse Lexical Weights ---
+# bge-m3는 같은 forward pass의 token hidden state에 sparse_linear(1024 -> 1) + ReLU를 적용해
+# 토큰별 lexical weight를 만든다. HuggingFaceEmbeddings는 dense(CLS) 벡터만 돌려주므로
+# SentenceTransformer를 output_value=None으로 한 번 호출해 dense / sparse를 함께 계산한다.
+# 저장: langchain_pg_embedding.embedding_sparse (pgvector sparsevec, 차원 = XLM-R vocab)
+# 점수: 질의 / 문서 weight의 내적 (공통 토큰만 기여 -> 제품 코드, 한국어 복합어 등 lexical 매칭)
+
+SPARSE_DIM = 250002  # bge-m3 (XLM-RoBERTa) vocab size
+
+_column_ready = False
+
+
+@lru_cache(maxsize=1)
+def _sparse_head():
+    import torch
+    from huggingface_hub import hf_hub_download
+    head = torch.nn.Linear(1024, 1)
+    head.load_state_dict(torch.load(hf_hub_download("BAAI/bge-m3", "sparse_linear.pt"), map_location="cpu"))
+    return head.eval()
+
+
+def _encode_hf(embeddings, texts, batch_size=32):
+    import torch
+    client = embeddings._client  # langchain_huggingface가 보관하는 SentenceTransformer
+    head = _sparse_head().to(client.device)
+    special = set(client.tokenizer.all_special_ids)
+    dense, sparse = [], []
+    with torch.no_grad():
+        for out in client.encode(texts, output_value=None, batch_size=batch_size, convert_to_numpy=False):
+            dense.append(torch.nn.functional.normalize(out["sentence_embedding"].float(), dim=-1).cpu().tolist())
+            mask = out["attention_mask"].bool()
+            ids = out["input_ids"][mask].tolist()
+            scores = torch.relu(head(out["token_embeddings"][mask].float())).squeeze(-1).cpu().tolist()
+            weights = {}
+            for token_id, w in zip(ids, scores):
+                # 같은 토큰이 여러 번 나오면 최대값 (bge-m3 방식)
+                if token_id not in special and w > weights.get(token_id, 0.0):
+                    weights[token_id] = w
+            sparse.append(weights)
+    return dense, sparse
+
+
+def encode_dense_sparse(embeddings, texts):
+    """One forward pass -> (dense vectors, [{token_id: weight}, ...])."""
+    if hasattr(embeddings, "embed_with_sparse"):  # EmbeddingPool / FakeEmbeddings
+        return embeddings.embed_with_sparse(texts)
+    return _encode_hf(embeddings, texts)
+
+
+def sparse_literal(weights) -> str:
+    """pgvector sparsevec literal ('{index:value,...}/dim', 1-based indices)."""
+    items = ",".join(f"{i + 1}:{w:.4f}" for i, w in sorted(weights.items()) if w > 0)
+    return "{" + items + "}/" + str(SPARSE_DIM)
+
+
+def ensure_sparse_column():
+    """Add embedding_sparse once per process (langchain_pg_embedding is created by PGVector, not init_db)."""
+    global _column_ready
+    if _column_ready:
+        return
+    with engine.connect() as conn:
+        conn.execute(text(f"ALTER TABLE IF EXISTS langchain_pg_embedding ADD COLUMN IF NOT EXISTS embedding_sparse sparsevec({SPARSE_DIM})"))
+        conn.commit()
+    _column_ready = True
+
+
+def update_sparse(ids, sparse):
+    """Write sparse weights for rows inserted without them (insert-mode ingestion)."""
+    if not ids:
+        return
+    ensure_sparse_column()
+    values, params = [], {}
+    for i, (id_, weights) in enumerate(zip(ids, sparse)):
+        values.append(f"(CAST(:id{i} AS varchar), CAST(:s{i} AS sparsevec))")
+        params.update({f"id{i}": id_, f"s{i}": sparse_literal(weights)})
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            UPDATE langchain_pg_embedding e SET embedding_sparse = v.sparse
+            FROM (VALUES {', '.join(values)}) AS v(id, sparse)
+            WHERE e.id = v.id
+        """), params)
+        conn.commit()
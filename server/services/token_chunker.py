@@ -0,0 +1,121 @@
+import re
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from server.core.config import EMBED_MAX_TOKENS
+from server.services.embedder import get_bge_m3_tokenizer
+
+# --- Token-aware Chunker ---
+# 한국어는 문자 수와 토큰 수의 비율이 일정하지 않아, 문자 기준 chunk는 bge-m3 입력 한도에서
+# 잘리거나 필요 이상으로 잘게 쪼개진다. 문장 / markdown heading 단위로 나눈 뒤
+# bge-m3 fast tokenizer로 한 번에(batch) 토큰 수를 세고, chunk_size 토큰까지 채운다.
+# chunk 텍스트는 원문 slice 그대로이므로 start_index 기반 인접 chunk 병합과 호환된다.
+
+# 문장 경계: 종결 부호 뒤 공백 또는 줄바꿈 (context_builder와 동일 기준)
+_SEGMENT = re.compile(r".+?(?:[.!?。！？](?=\s)|$)", re.M)
+_HEADING = re.compile(r"#{1,6}\s")
+# heading 앞에서 chunk를 끊는 최소 채움 비율 (너무 작은 chunk 방지)
+HEADING_BREAK_RATIO = 0.25
+
+
+def _segments(text):
+    """(start, end, is_heading) spans of sentences / markdown heading lines."""
+    spans = []
+    for m in _SEGMENT.finditer(text):
+        start, end = m.start(), m.end()
+        while start < end and text[start].isspace():
+            start += 1
+        if start < end:
+            spans.append((start, end, bool(_HEADING.match(text, start))))
+    return spans
+
+
+class TokenChunker:
+    """
+    Splits text into chunks of at most `chunk_size` bge-m3 tokens (`overlap` tokens
+    shared between neighbours), cutting only at sentence / heading boundaries.
+    A single sentence longer than `chunk_size` is cut by characters as a fallback;
+    the pieces are re-counted and cut again until each fits.
+    """
+    def __init__(self, chunk_size, chunk_overlap=0, add_start_index=True):
+        self.chunk_size = max(1, min(int(chunk_size), EMBED_MAX_TOKENS))
+        self.chunk_overlap = max(0, min(int(chunk_overlap), self.chunk_size // 2))
+        self.add_start_index = add_start_index
+        self.tokenizer = get_bge_m3_tokenizer()
+
+    def _count(self, texts):
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _spans(self, text):
+        spans = _segments(text)
+        counts = self._count([text[s:e] for s, e, _ in spans])
+        result = []
+        for (start, end, heading), n in zip(spans, counts):
+            if n <= self.chunk_size:
+                result.append((start, end, heading, n))
+                continue
+            for p, q, m in self._cut(text, start, end, n):
+                result.append((p, q, heading and p == start, m))
+        return result
+
+    def _cut(self, text, start, end, n):
+        """Character cut of one sentence over `chunk_size`; every returned piece is re-counted and fits."""
+        pending, pieces = [(start, end, n)], []
+        while pending:
+            s, e, n = pending.pop()
+            if n <= self.chunk_size or e - s <= 1:
+                pieces.append((s, e, n))
+                continue
+            # 토큰 비율로 문자 구간 분할. 토큰 밀도가 고르지 않거나 단어 중간에서 잘려
+            # 초과한 piece는 다시 세어 더 작게 자른다 (최소 절반씩 줄어 반드시 종료)
+            step = max(1, min((e - s) * self.chunk_size // n, (e - s + 1) // 2))
+            cuts = [(p, min(p + step, e)) for p in range(s, e, step)]
+            counts = self._count([text[p:q] for p, q in cuts])
+            pending.extend(reversed([(p, q, m) for (p, q), m in zip(cuts, counts)]))
+        return pieces
+
+    def split_spans(self, text):
+        """[(start, end), ...] character spans of each chunk."""
+        chunks, current, used = [], [], 0
+        for span in self._spans(text):
+            start, end, heading, n = span
+            full = used + n > self.chunk_size
+            at_heading = heading and used >= self.chunk_size * HEADING_BREAK_RATIO
+            if current and (full or at_heading):
+                chunks.append((current[0][0], current[-1][1]))
+                # 뒤쪽 문장들을 overlap 토큰 한도까지 다음 chunk로 이어감 (heading에서는 이어가지 않음)
+                carry, carried = [], 0
+                if not heading:
+                    for prev in reversed(current):
+                        if carried + prev[3] > self.chunk_overlap or carried + prev[3] + n > self.chunk_size:
+                            break
+                        carry.insert(0, prev)
+                        carried += prev[3]
+                current, used = carry, carried
+            current.append(span)
+            used += n
+        if current:
+            chunks.append((current[0][0], current[-1][1]))
+        return chunks
+
+    def split_text(self, text):
+        return [text[s:e] for s, e in self.split_spans(text)]
+
+    def split_documents(self, documents):
+        chunks = []
+        for doc in documents:
+            for start, end in self.split_spans(doc.page_content):
+                metadata = dict(doc.metadata)
+                if self.add_start_index:
+                    metadata["start_index"] = start
+                chunks.append(Document(page_content=doc.page_content[start:end], metadata=metadata))
+        return chunks
+
+
+def make_splitter(chunk_size, chunk_overlap, unit="char", add_start_index=False):
+    """`unit`: "char" (RecursiveCharacterTextSplitter) | "token" (TokenChunker, bge-m3 tokens)."""
+    if unit == "token":
+        return TokenChunker(chunk_size, chunk_overlap, add_start_index=add_start_index)
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=add_start_index)
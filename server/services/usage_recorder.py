@@ -0,0 +1,127 @@
+import os
+import json
+import queue
+import threading
+from datetime import datetime
+
+from server.core.config import USAGE_FLUSH_INTERVAL, USAGE_FLUSH_BATCH, USAGE_SPOOL_PATH
+from server.core.database import SessionLocal, TokenUsage
+from server.services.usage_rollup import apply_rollups
+
+
+class UsageRecorder:
+    """
+    Buffers TokenUsage records in memory and writes them in batches from a
+    background thread, so chat requests never wait on the accounting write.
+    Records that cannot be written at shutdown are spooled to a local JSONL
+    file and replayed on the next start.
+    """
+
+    def __init__(self, flush_interval=USAGE_FLUSH_INTERVAL, batch_size=USAGE_FLUSH_BATCH, spool_path=USAGE_SPOOL_PATH):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.spool_path = spool_path
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._load_spool()
+            self._thread = threading.Thread(target=self._run, name="usage-recorder", daemon=True)
+            self._thread.start()
+        print("   ✅ [Usage] Background usage recorder started.")
+
+    def record(self, session_id, model_name, input_tokens, output_tokens, cost_usd):
+        """Non-blocking: only enqueues the record."""
+        self._queue.put({
+            "timestamp": datetime.now(),
+            "session_id": session_id,
+            "model_name": model_name,
+            "input_tokens": int(input_tokens),
+            "output_tokens": int(output_tokens),
+            "cost_usd": float(cost_usd),
+        })
+
+    def stop(self, timeout=10.0):
+        """Stop the writer thread and flush everything still buffered."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        rows = self._drain()
+        if rows and not self._write(rows):
+            self._spool(rows)
+        print("   ✅ [Usage] Usage recorder stopped (buffer flushed).")
+
+    # --- internals ---
+
+    def _drain(self, limit=None):
+        rows = []
+        while limit is None or len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self):
+        pending = []
+        while not self._stop.is_set():
+            try:
+                # 첫 레코드가 올 때까지 대기 후, 쌓인 만큼 한 번에 가져옴
+                pending.append(self._queue.get(timeout=self.flush_interval))
+            except queue.Empty:
+                pass
+            pending.extend(self._drain(self.batch_size - len(pending)))
+            if not pending:
+                continue
+            if self._write(pending):
+                pending = []
+            else:
+                # DB 장애 시 다음 주기에 재시도 (stop 시 spool 파일로 보존)
+                self._stop.wait(self.flush_interval)
+        for row in pending:
+            self._queue.put(row)
+
+    def _write(self, rows):
+        try:
+            with SessionLocal() as db:
+                db.bulk_insert_mappings(TokenUsage, rows)
+                # 원본 행과 같은 트랜잭션에서 rollup 증분 반영
+                apply_rollups(db, rows)
+                db.commit()
+            return True
+        except Exception as e:
+            print(f"⚠️ [Usage] Failed to write {len(rows)} usage records: {e}")
+            return False
+
+    def _spool(self, rows):
+        try:
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({**row, "timestamp": row["timestamp"].isoformat()}, ensure_ascii=False) + "\n")
+            print(f"   💾 [Usage] Spooled {len(rows)} records to {self.spool_path}")
+        except Exception as e:
+            print(f"❌ [Usage] Failed to spool usage records: {e}")
+
+    def _load_spool(self):
+        if not os.path.exists(self.spool_path):
+            return
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                        self._queue.put(row)
+            os.remove(self.spool_path)
+            print(f"   ♻️ [Usage] Replaying spooled usage records ({self._queue.qsize()}).")
+        except Exception as e:
+            print(f"⚠️ [Usage] Failed to load usage spool: {e}")
+
+
+usage_recorder = UsageRecorder()
@@ -0,0 +1,194 @@
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from server.core.database import engine, disable_statement_timeout, TokenUsageHourly, TokenUsageDaily
+
+ROLLUP_TABLES = {"hour": TokenUsageHourly, "day": TokenUsageDaily}
+
+
+def _bucket(ts, granularity):
+    if granularity == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def apply_rollups(db, rows):
+    """
+    Incrementally add a batch of raw usage rows to the hourly/daily rollups.
+    Runs inside the caller's transaction (same commit as the raw insert).
+    """
+    for granularity, model in ROLLUP_TABLES.items():
+        agg = defaultdict(lambda: [0, 0, 0, 0.0])
+        for row in rows:
+            key = (_bucket(row["timestamp"], granularity), row["model_name"], row.get("session_id") or "")
+            acc = agg[key]
+            acc[0] += 1
+            acc[1] += row["input_tokens"]
+            acc[2] += row["output_tokens"]
+            acc[3] += row["cost_usd"]
+        if not agg:
+            continue
+
+        values = [
+            {"bucket": b, "model_name": m, "session_id": sid,
+             "request_count": c, "input_tokens": i, "output_tokens": o, "cost_usd": cost}
+            for (b, m, sid), (c, i, o, cost) in agg.items()
+        ]
+        stmt = pg_insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "model_name", "session_id"],
+            set_={
+                "request_count": model.request_count + stmt.excluded.request_count,
+                "input_tokens": model.input_tokens + stmt.excluded.input_tokens,
+                "output_tokens": model.output_tokens + stmt.excluded.output_tokens,
+                "cost_usd": model.cost_usd + stmt.excluded.cost_usd,
+            },
+        )
+        db.execute(stmt)
+
+
+BACKFILL_WINDOW = timedelta(days=1)  # day 경계로 나누므로 hour/day bucket이 window를 걸치지 않음
+
+
+def _init_backfill(conn):
+    """Create the backfill state row once; returns False when there is nothing (left) to backfill."""
+    state = conn.execute(text("SELECT done FROM usage_rollup_backfill WHERE id = 1")).fetchone()
+    if state is not None:
+        return not state[0]
+    if conn.execute(text("SELECT EXISTS (SELECT 1 FROM token_usage_daily)")).scalar():
+        # rollup이 이미 있는 DB (이 state 테이블 도입 이전에 backfill 완료)
+        conn.execute(text("INSERT INTO usage_rollup_backfill (id, done) VALUES (1, TRUE) ON CONFLICT (id) DO NOTHING"))
+        conn.commit()
+        return False
+    # cutoff 이후 행은 UsageRecorder(이 함수 반환 후 시작)가 raw insert와 같은 트랜잭션에서 반영
+    conn.execute(text("""
+        INSERT INTO usage_rollup_backfill (id, cutoff_id, next_bucket, until, done)
+        SELECT 1, max(id), date_trunc('day', min(timestamp)), max(timestamp), count(timestamp) = 0 FROM token_usage
+        ON CONFLICT (id) DO NOTHING
+    """))
+    conn.commit()
+    return not conn.execute(text("SELECT done FROM usage_rollup_backfill WHERE id = 1")).scalar()
+
+
+def _backfill_windows():
+    total = 0
+    try:
+        while True:
+            with engine.connect() as conn:
+                disable_statement_timeout(conn)  # 하루치가 매우 큰 경우 대비 (window 트랜잭션 한정)
+                # 여러 worker가 동시에 시작해도 window마다 한 프로세스만 처리 (state row lock)
+                state = conn.execute(text(
+                    "SELECT cutoff_id, next_bucket, until, done FROM usage_rollup_backfill WHERE id = 1 FOR UPDATE"
+                )).fetchone()
+                if state is None or state.done:
+                    break
+                start, end = state.next_bucket, state.next_bucket + BACKFILL_WINDOW
+                params = {"cutoff": state.cutoff_id, "start": start, "end": end}
+                for granularity, table in (("hour", "token_usage_hourly"), ("day", "token_usage_daily")):
+                    # cutoff 이후 UsageRecorder가 이미 더한 bucket과 겹칠 수 있으므로 덮어쓰지 않고 더함
+                    conn.execute(text(f"""
+                        INSERT INTO {table} (bucket, model_name, session_id, request_count, input_tokens, output_tokens, cost_usd)
+                        SELECT date_trunc('{granularity}', timestamp), model_name, COALESCE(session_id, ''),
+                               count(*), COALESCE(sum(input_tokens), 0), COALESCE(sum(output_tokens), 0), COALESCE(sum(cost_usd), 0)
+                        FROM token_usage
+                        WHERE id <= :cutoff AND timestamp >= :start AND timestamp < :end
+                        GROUP BY 1, 2, 3
+                        ON CONFLICT (bucket, model_name, session_id) DO UPDATE SET
+                            request_count = {table}.request_count + EXCLUDED.request_count,
+                            input_tokens = {table}.input_tokens + EXCLUDED.input_tokens,
+                            output_tokens = {table}.output_tokens + EXCLUDED.output_tokens,
+                            cost_usd = {table}.cost_usd + EXCLUDED.cost_usd
+                    """), params)
+                # window 결과와 진행 상태를 같은 트랜잭션에서 commit (중단 시 다음 window부터 재개)
+                conn.execute(text("UPDATE usage_rollup_backfill SET next_bucket = :end, done = :done WHERE id = 1"),
+                             {"end": end, "done": end > state.until})
+                conn.commit()
+                total += 1
+        if total:
+            print(f"   ✅ [Usage] Rollup backfill complete ({total} day windows).")
+    except Exception as e:
+        print(f"⚠️ [Usage] Rollup backfill failed (resumes on next start): {e}")
+
+
+def backfill_rollups():
+    """
+    Build rollups from the token_usage rows written before rollups existed.
+    Day windows, one transaction each, in a background thread (startup을 막지 않음); resumable.
+    """
+    try:
+        with engine.connect() as conn:
+            if not _init_backfill(conn):
+                return None
+    except Exception as e:
+        print(f"⚠️ [Usage] Rollup backfill failed: {e}")
+        return None
+    print("   📊 [Usage] Backfilling usage rollups from token_usage (background)...")
+    thread = threading.Thread(target=_backfill_windows, name="usage-rollup-backfill", daemon=True)
+    thread.start()
+    return thread
+
+
+def _pick_granularity(start, end):
+    # 범위 지정이 없으면 행 수가 가장 적은 daily, 범위가 있으면 시간 단위 정밀도를 위해 hourly
+    if start is None and end is None:
+        return "day"
+    return "hour"
+
+
+def _filtered(query, model, start, end, model_name=None, session_id=None):
+    if start is not None:
+        query = query.filter(model.bucket >= _bucket(start, "hour"))
+    if end is not None:
+        query = query.filter(model.bucket <= end)
+    if model_name:
+        query = query.filter(model.model_name == model_name)
+    if session_id:
+        query = query.filter(model.session_id == session_id)
+    return query
+
+
+def get_usage_totals(db, start=None, end=None, model_name=None):
+    """Totals (cost, tokens, requests) read from the rollups in a single query."""
+    model = ROLLUP_TABLES[_pick_granularity(start, end)]
+    query = db.query(
+        func.coalesce(func.sum(model.cost_usd), 0.0),
+        func.coalesce(func.sum(model.input_tokens), 0),
+        func.coalesce(func.sum(model.output_tokens), 0),
+        func.coalesce(func.sum(model.request_count), 0),
+    )
+    cost, input_tokens, output_tokens, requests = _filtered(query, model, start, end, model_name).one()
+    return {
+        "total_cost": float(cost),
+        "total_input_tokens": int(input_tokens),
+        "total_output_tokens": int(output_tokens),
+        "total_requests": int(requests),
+    }
+
+
+def get_usage_series(db, granularity="hour", start=None, end=None, model_name=None, session_id=None, limit=500):
+    """Time series per (bucket, model), newest first."""
+    model = ROLLUP_TABLES[granularity]
+    query = db.query(
+        model.bucket,
+        model.model_name,
+        func.sum(model.request_count),
+        func.sum(model.input_tokens),
+        func.sum(model.output_tokens),
+        func.sum(model.cost_usd),
+    )
+    query = _filtered(query, model, start, end, model_name, session_id)
+    rows = query.group_by(model.bucket, model.model_name).order_by(model.bucket.desc()).limit(limit).all()
+    return [
+        {
+            "bucket": bucket,
+            "model_name": name,
+            "request_count": int(count),
+            "input_tokens": int(i),
+            "output_tokens": int(o),
+            "cost_usd": round(float(cost), 6),
+        }
+        for bucket, name, count, i, o, cost in rows
+    ]
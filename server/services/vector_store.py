@@ -0,0 +1,54 @@
+import threading
+from sqlalchemy import text
+from langchain_postgres import PGVector
+
+from server.core.database import engine, disable_statement_timeout
+
+# --- Shared PGVector Stores ---
+# PGVector(connection=<url>)는 호출마다 자체 engine/pool을 만들고 extension/collection
+# 확인 쿼리를 실행한다. collection별 인스턴스를 캐시하고 공유 engine을 주입한다.
+
+_stores = {}
+_lock = threading.Lock()
+_index_ready = False
+
+# PGVector는 collection_id에 인덱스를 만들지 않음 -> collection 단위 조회/batch 삭제가 매번 전체 테이블 scan
+COLLECTION_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_langchain_pg_embedding_collection_id ON langchain_pg_embedding (collection_id)"
+
+
+def ensure_collection_index():
+    """Index langchain_pg_embedding.collection_id once per process (no-op until PGVector created the table)."""
+    global _index_ready
+    if _index_ready:
+        return
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT to_regclass('langchain_pg_embedding')")).scalar():
+            return
+        disable_statement_timeout(conn)  # 기존 대용량 테이블이면 build에 시간이 걸림
+        conn.execute(text(COLLECTION_INDEX_SQL))
+        conn.commit()
+    _index_ready = True
+
+
+def get_vector_store(embeddings, collection_name):
+    key = (id(embeddings), collection_name)
+    store = _stores.get(key)
+    if store is None:
+        with _lock:
+            store = _stores.get(key)
+            if store is None:
+                store = PGVector(
+                    embeddings=embeddings,
+                    collection_name=collection_name,
+                    connection=engine,
+                    use_jsonb=True,
+                )
+                _stores[key] = store
+    return store
+
+
+def evict_vector_store(collection_name):
+    """Drop cached stores of a collection (after it was deleted / re-created)."""
+    with _lock:
+        for key in [k for k in _stores if k[1] == collection_name]:
+            del _stores[key]